@@ -0,0 +1,216 @@
+"""
+Wire-format encoding for synthesized audio.
+
+Output formats negotiated per WebSocket connection:
+- float32: raw little-endian float32 PCM (legacy default)
+- pcm16:   raw little-endian int16 PCM (half the bytes of float32)
+- opus:    Opus packets, each prefixed with a big-endian uint16 length,
+           concatenated into one binary message per synthesized chunk
+
+Whole-file formats for HTTP responses (/tts/file, /tts/batch):
+- wav:  16-bit PCM WAV
+- opus: Ogg Opus (libsndfile >= 1.0.31)
+
+Negotiation (query string or config message):
+    /ws/tts/{user_id}?format=pcm16&sample_rate=16000
+    {"type": "config", "format": "opus", "sample_rate": 24000}
+
+An AudioEncoder carries state across the chunks of an utterance (resampler
+history, partial Opus frames): call flush() after the last chunk, or
+reset() when the utterance fails.
+"""
+
+import io
+import struct
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import librosa
+import soundfile as sf
+import soxr
+from loguru import logger
+
+# ===========================================
+# Opus Import
+# ===========================================
+OPUS_AVAILABLE = False
+opuslib = None
+
+try:
+    import opuslib
+    OPUS_AVAILABLE = True
+except ImportError as e:
+    logger.warning(f"opuslib ImportError: {e}")
+except Exception as e:
+    logger.warning(f"opuslib import failed: {e}")
+
+# ===========================================
+# Configuration
+# ===========================================
+OUTPUT_FORMATS = ("float32", "pcm16", "opus")
+DEFAULT_OUTPUT_FORMAT = "float32"
+
+# libopus only accepts these input rates
+OPUS_SAMPLE_RATES = (8000, 12000, 16000, 24000, 48000)
+OPUS_FRAME_MS = 20
+OPUS_BITRATE = 32000
+
+# Allowed target rates for PCM formats
+PCM_SAMPLE_RATES = (8000, 16000, 22050, 24000, 32000, 44100, 48000)
+
+# File format -> (soundfile format, subtype, media type, extension)
+FILE_FORMATS = {
+    "wav": ("WAV", "PCM_16", "audio/wav", "wav"),
+    "opus": ("OGG", "OPUS", "audio/ogg", "ogg"),
+}
+
+
+def float32_to_pcm16(audio: np.ndarray) -> np.ndarray:
+    """Vectorized float32 [-1, 1] -> little-endian int16 conversion"""
+    scaled = np.clip(audio, -1.0, 1.0) * 32767.0
+    return np.rint(scaled).astype("<i2")
+
+
+def resample_for_wire(audio: np.ndarray, orig_sr: int, target_sr: int) -> np.ndarray:
+    """Resample a complete utterance for the wire (streamed chunks use AudioEncoder's stateful resampler)"""
+    if orig_sr == target_sr:
+        return audio
+    return librosa.resample(audio, orig_sr=orig_sr, target_sr=target_sr, res_type="soxr_hq")
+
+
+def encode_file(audio: np.ndarray, sample_rate: int, file_format: str = "wav") -> Tuple[bytes, str]:
+    """
+    Encode a complete utterance in memory.
+
+    Returns: (encoded bytes, media type)
+    """
+    if file_format not in FILE_FORMATS:
+        raise ValueError(f"Unsupported file format: {file_format}")
+
+    sf_format, subtype, media_type, _ = FILE_FORMATS[file_format]
+    if file_format == "opus" and sample_rate not in OPUS_SAMPLE_RATES:
+        audio = resample_for_wire(audio, sample_rate, 48000)
+        sample_rate = 48000
+
+    buffer = io.BytesIO()
+    sf.write(buffer, np.clip(audio, -1.0, 1.0), sample_rate, format=sf_format, subtype=subtype)
+    return buffer.getvalue(), media_type
+
+
+class AudioEncoder:
+    """Per-connection audio encoder for WebSocket output"""
+
+    def __init__(
+        self,
+        output_format: str = DEFAULT_OUTPUT_FORMAT,
+        source_rate: int = 24000,
+        sample_rate: Optional[int] = None
+    ):
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"Unsupported output format: {output_format}")
+
+        target_rate = sample_rate or source_rate
+        if output_format == "opus":
+            if not OPUS_AVAILABLE:
+                raise ValueError("Opus output not available (opuslib not installed)")
+            if target_rate not in OPUS_SAMPLE_RATES:
+                raise ValueError(f"Unsupported Opus sample rate: {target_rate}")
+        elif target_rate != source_rate and target_rate not in PCM_SAMPLE_RATES:
+            raise ValueError(f"Unsupported sample rate: {target_rate}")
+
+        self.output_format = output_format
+        self.source_rate = source_rate
+        self.sample_rate = target_rate
+
+        self._resampler = None
+        self._reset_resampler()
+
+        self._opus_encoder = None
+        self._opus_frame_size = 0
+        self._opus_pending = np.zeros(0, dtype=np.int16)
+
+        if output_format == "opus":
+            self._opus_encoder = opuslib.Encoder(target_rate, 1, opuslib.APPLICATION_VOIP)
+            self._opus_encoder.bitrate = OPUS_BITRATE
+            self._opus_frame_size = target_rate * OPUS_FRAME_MS // 1000
+
+    @classmethod
+    def from_params(cls, params: Dict[str, Any], source_rate: int) -> "AudioEncoder":
+        """Build an encoder from query params or a config message"""
+        output_format = params.get("format") or DEFAULT_OUTPUT_FORMAT
+        sample_rate = params.get("sample_rate")
+        if sample_rate is not None:
+            try:
+                sample_rate = int(sample_rate)
+            except (TypeError, ValueError):
+                raise ValueError(f"Invalid sample rate: {sample_rate}")
+        return cls(output_format, source_rate=source_rate, sample_rate=sample_rate)
+
+    def describe(self) -> Dict[str, Any]:
+        """Negotiated format, sent back to the client"""
+        info = {
+            "format": self.output_format,
+            "sample_rate": self.sample_rate,
+            "channels": 1,
+        }
+        if self.output_format == "opus":
+            info["frame_ms"] = OPUS_FRAME_MS
+            info["framing"] = "u16be-length-prefixed"
+        return info
+
+    def encode(self, audio: np.ndarray) -> bytes:
+        """Encode one float32 chunk at source_rate into wire bytes"""
+        audio = audio.astype(np.float32, copy=False)
+        if self._resampler is not None:
+            # One stream per utterance, so chunk boundaries don't click
+            audio = self._resampler.resample_chunk(audio)
+        return self._encode(audio, final=False)
+
+    def flush(self) -> bytes:
+        """End of utterance: the resampler's tail and any partial Opus frame"""
+        audio = np.zeros(0, dtype=np.float32)
+        if self._resampler is not None:
+            audio = self._resampler.resample_chunk(audio, last=True)
+            self._reset_resampler()
+        return self._encode(audio, final=True)
+
+    def reset(self):
+        """Drop buffered state after a failed utterance, so none of it leaks into the next one"""
+        self._reset_resampler()
+        self._opus_pending = np.zeros(0, dtype=np.int16)
+
+    def _reset_resampler(self):
+        if self.source_rate != self.sample_rate:
+            self._resampler = soxr.ResampleStream(
+                self.source_rate, self.sample_rate, 1, dtype="float32", quality="HQ"
+            )
+
+    def _encode(self, audio: np.ndarray, final: bool) -> bytes:
+        if self.output_format == "float32":
+            return audio.astype("<f4", copy=False).tobytes()
+
+        pcm16 = float32_to_pcm16(audio)
+        if self.output_format == "pcm16":
+            return pcm16.tobytes()
+
+        if final and len(self._opus_pending) + len(pcm16) == 0:
+            return b""
+        return self._encode_opus(pcm16, final=final)
+
+    def _encode_opus(self, pcm16: np.ndarray, final: bool) -> bytes:
+        """Encode whole frames, carrying the remainder to the next chunk"""
+        samples = np.concatenate([self._opus_pending, pcm16])
+        frame_size = self._opus_frame_size
+
+        if final and len(samples) % frame_size:
+            pad = frame_size - len(samples) % frame_size
+            samples = np.concatenate([samples, np.zeros(pad, dtype=np.int16)])
+
+        n_frames = len(samples) // frame_size
+        self._opus_pending = samples[n_frames * frame_size:]
+
+        packets: List[bytes] = []
+        for frame in samples[:n_frames * frame_size].reshape(n_frames, frame_size):
+            packet = self._opus_encoder.encode(frame.astype("<i2").tobytes(), frame_size)
+            packets.append(struct.pack(">H", len(packet)) + packet)
+        return b"".join(packets)
@@ -0,0 +1 @@
+"""Offline benchmarks: stub models (stubs.py), server runner, load generator / replay, micro-benchmarks"""
@@ -0,0 +1,271 @@
+"""
+Load generator for the AI servers' /ws/tts and /enroll endpoints.
+
+    cd ai-server
+    python -m benchmarks.loadgen --url http://127.0.0.1:8000 --clients 8 --utterances 20
+    python -m benchmarks.loadgen --clients 32 --languages ko,en --think-ms 500 --json out.json
+    python -m benchmarks.loadgen --url http://127.0.0.1:8001 --schedules 20 8,16,32 4,12,32
+
+Each client enrolls its own user (unless --no-enroll), opens one WebSocket
+with pcm16 output and sends utterances back to back (plus --think-ms).
+Reported per run:
+
+- enrollment latency p50 / p99
+- time-to-first-audio (TTFA) p50 / p99
+- utterance latency (send -> complete) p50 / p99
+- real-time factor (latency / audio duration) p50 / p99
+- throughput: utterances/s and audio seconds per wall second
+
+--schedules runs once per XTTS chunk schedule (sent as "chunk_schedule") and
+prints TTFA / RTF side by side.
+
+Requires: websockets, httpx (see benchmarks/requirements.txt)
+"""
+
+import io
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import copy
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import soundfile as sf
+
+import httpx
+import websockets
+
+SAMPLE_RATE = 24000
+PCM16_BYTES_PER_SAMPLE = 2
+
+# Meeting-style utterances: mostly short, a few long
+TEXTS = {
+    "ko": [
+        "안녕하세요.",
+        "네, 좋습니다.",
+        "오늘 회의를 시작하겠습니다.",
+        "지난주에 논의한 일정은 그대로 진행하겠습니다.",
+        "이번 분기 목표와 관련해서 몇 가지 말씀드리겠습니다. 먼저 매출 현황부터 보겠습니다.",
+    ],
+    "en": [
+        "Hello.",
+        "Sounds good to me.",
+        "Let's get started with today's meeting.",
+        "We will keep the schedule we discussed last week.",
+        "I have a few points about this quarter's goals. Let's start with the revenue numbers.",
+    ],
+    "ja": ["こんにちは。", "今日の会議を始めます。", "先週話し合った日程はそのまま進めます。"],
+    "zh": ["你好。", "我们开始今天的会议。", "上周讨论的日程照常进行。"],
+}
+
+
+@dataclass
+class RunStats:
+    enroll_s: List[float] = field(default_factory=list)
+    ttfa_s: List[float] = field(default_factory=list)
+    latency_s: List[float] = field(default_factory=list)
+    rtf: List[float] = field(default_factory=list)
+    audio_s: float = 0.0
+    utterances: int = 0
+    errors: List[str] = field(default_factory=list)
+
+
+def percentiles(values: List[float]) -> Dict[str, Optional[float]]:
+    if not values:
+        return {"count": 0, "mean": None, "p50": None, "p90": None, "p99": None}
+    arr = np.asarray(values)
+    return {
+        "count": len(values),
+        "mean": round(float(arr.mean()), 4),
+        "p50": round(float(np.percentile(arr, 50)), 4),
+        "p90": round(float(np.percentile(arr, 90)), 4),
+        "p99": round(float(np.percentile(arr, 99)), 4),
+    }
+
+
+def reference_wav(seconds: float = 6.0, sample_rate: int = 16000) -> bytes:
+    """Synthetic enrollment clip (harmonics + noise)"""
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    audio = sum(0.1 / k * np.sin(2 * np.pi * 140 * k * t) for k in range(1, 6))
+    audio = audio + 0.01 * np.random.randn(len(t))
+    buffer = io.BytesIO()
+    sf.write(buffer, audio.astype(np.float32), sample_rate, format="WAV", subtype="PCM_16")
+    return buffer.getvalue()
+
+
+async def enroll(client: httpx.AsyncClient, url: str, user_id: str, stats: RunStats) -> bool:
+    started = time.perf_counter()
+    try:
+        response = await client.post(
+            f"{url}/enroll/{user_id}",
+            files={"audio": (f"{user_id}.wav", reference_wav(), "audio/wav")},
+            timeout=300,
+        )
+        response.raise_for_status()
+    except Exception as e:
+        stats.errors.append(f"enroll {user_id}: {e}")
+        return False
+    stats.enroll_s.append(time.perf_counter() - started)
+    return True
+
+
+async def run_client(index: int, args: argparse.Namespace, stats: RunStats, start_at: float):
+    user_id = f"{args.user_prefix}-{index}"
+    rng = random.Random(args.seed + index)
+    languages = args.languages.split(",")
+
+    if args.enroll:
+        async with httpx.AsyncClient() as client:
+            if not await enroll(client, args.url, user_id, stats):
+                return
+
+    # Stagger connections over the ramp-up window
+    await asyncio.sleep(max(0.0, start_at + rng.uniform(0, args.ramp_s) - time.perf_counter()))
+
+    ws_url = args.url.replace("http", "ws", 1) + f"/ws/tts/{user_id}?format=pcm16&sample_rate={SAMPLE_RATE}"
+    try:
+        async with websockets.connect(ws_url, max_size=None) as ws:
+            for _ in range(args.utterances):
+                language = rng.choice(languages)
+                text = rng.choice(TEXTS.get(language, TEXTS["en"]))
+
+                sent = time.perf_counter()
+                first_audio: Optional[float] = None
+                audio_bytes = 0
+                message = {"text": text, "language": language}
+                if args.chunk_schedule:
+                    message["chunk_schedule"] = args.chunk_schedule
+                await ws.send(json.dumps(message))
+
+                while True:
+                    message = await ws.recv()
+                    if isinstance(message, bytes):
+                        if first_audio is None:
+                            first_audio = time.perf_counter() - sent
+                        audio_bytes += len(message)
+                        continue
+                    data = json.loads(message)
+                    if data.get("status") == "complete":
+                        break
+                    if "error" in data:
+                        stats.errors.append(f"{user_id}: {data['error']}")
+                        break
+
+                latency = time.perf_counter() - sent
+                audio_s = audio_bytes / PCM16_BYTES_PER_SAMPLE / SAMPLE_RATE
+                if first_audio is not None:
+                    stats.ttfa_s.append(first_audio)
+                    stats.latency_s.append(latency)
+                    stats.audio_s += audio_s
+                    stats.utterances += 1
+                    if audio_s > 0:
+                        stats.rtf.append(latency / audio_s)
+
+                if args.think_ms:
+                    await asyncio.sleep(rng.uniform(0.5, 1.5) * args.think_ms / 1000)
+    except Exception as e:
+        stats.errors.append(f"{user_id}: {type(e).__name__}: {e}")
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    stats = RunStats()
+    started = time.perf_counter()
+    await asyncio.gather(*[run_client(i, args, stats, started) for i in range(args.clients)])
+    wall = time.perf_counter() - started
+
+    return {
+        "config": {
+            "url": args.url,
+            "clients": args.clients,
+            "utterances_per_client": args.utterances,
+            "languages": args.languages,
+            "think_ms": args.think_ms,
+            "chunk_schedule": args.chunk_schedule,
+        },
+        "wall_s": round(wall, 3),
+        "utterances": stats.utterances,
+        "errors": len(stats.errors),
+        "error_samples": stats.errors[:10],
+        "throughput_utt_per_s": round(stats.utterances / wall, 3),
+        "throughput_audio_s_per_s": round(stats.audio_s / wall, 3),
+        "enroll_s": percentiles(stats.enroll_s),
+        "ttfa_s": percentiles(stats.ttfa_s),
+        "latency_s": percentiles(stats.latency_s),
+        "rtf": percentiles(stats.rtf),
+    }
+
+
+def print_report(report: Dict[str, Any]):
+    print(f"\n{report['utterances']} utterances in {report['wall_s']}s, {report['errors']} errors")
+    print(f"throughput: {report['throughput_utt_per_s']} utt/s, {report['throughput_audio_s_per_s']} audio s/s")
+    print(f"{'metric':<12}{'count':>7}{'mean':>10}{'p50':>10}{'p90':>10}{'p99':>10}")
+    for name in ("enroll_s", "ttfa_s", "latency_s", "rtf"):
+        p = report[name]
+        cells = [f"{p[k]:>10.3f}" if p[k] is not None else f"{'-':>10}" for k in ("mean", "p50", "p90", "p99")]
+        print(f"{name:<12}{p['count']:>7}{''.join(cells)}")
+    for sample in report["error_samples"]:
+        print(f"  error: {sample}")
+
+
+def print_schedule_comparison(reports: Dict[str, Dict[str, Any]]):
+    columns = ("ttfa p50", "ttfa p99", "rtf p50", "rtf p99", "lat p50")
+    print(f"\n{'schedule':<16}{''.join(f'{c:>10}' for c in columns)}{'audio s/s':>11}")
+    for schedule, report in reports.items():
+        cells = [
+            report[name][key] for name, key in
+            (("ttfa_s", "p50"), ("ttfa_s", "p99"), ("rtf", "p50"), ("rtf", "p99"), ("latency_s", "p50"))
+        ]
+        row = "".join(f"{v:>10.3f}" if v is not None else f"{'-':>10}" for v in cells)
+        print(f"{schedule:<16}{row}{report['throughput_audio_s_per_s']:>11.3f}")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Load test /ws/tts and /enroll")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--utterances", type=int, default=10, help="Per client")
+    parser.add_argument("--languages", default="ko", help="Comma list, picked at random per utterance")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="Mean pause between utterances")
+    parser.add_argument("--ramp-s", type=float, default=1.0, help="Spread client starts over this window")
+    parser.add_argument("--no-enroll", dest="enroll", action="store_false")
+    parser.add_argument("--user-prefix", default="bench-user")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chunk-schedule", help="XTTS chunk schedule for every request, e.g. 8,16,32")
+    parser.add_argument("--schedules", nargs="+", help="Compare XTTS chunk schedules (one run each)")
+    parser.add_argument("--json", dest="json_path", help="Write the report here")
+    return parser
+
+
+def main():
+    args = build_parser().parse_args()
+
+    if args.schedules:
+        reports = {}
+        for schedule in args.schedules:
+            run_args = copy.copy(args)
+            run_args.chunk_schedule = schedule
+            print(f"\n=== chunk schedule {schedule} ===")
+            reports[schedule] = asyncio.run(run(run_args))
+            print_report(reports[schedule])
+        print_schedule_comparison(reports)
+        output: Dict[str, Any] = {"schedules": reports}
+        failed = any(r["utterances"] == 0 for r in reports.values())
+    else:
+        output = asyncio.run(run(args))
+        print_report(output)
+        failed = output["utterances"] == 0
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(output, f, indent=2)
+        print(f"\nReport written: {args.json_path}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
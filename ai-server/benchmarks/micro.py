@@ -0,0 +1,322 @@
+"""
+Micro-benchmarks for the per-request building blocks of both servers.
+
+    cd ai-server
+    python -m benchmarks.micro --json results.json
+    python -m benchmarks.micro --baseline baseline.json --threshold 1.2
+    python -m benchmarks.micro --filter resample --repeat 15
+
+Runs offline on stub models (stubs.py, zero cost, so only the server code
+is measured):
+
+- resample/*:   AudioProcessor.resample_audio across rate pairs and res_types
+- deepfilter/*: enhance_with_deepfilter around a no-op DeepFilterNet
+- load_audio/*: AudioProcessor.load_audio on WAV / FLAC / Ogg of various lengths
+- wire/*:       float32 -> wire format (AudioEncoder, encode_file)
+- split/*:      split_into_sentences / split_into_segments on long ko / ja text
+- embedding/*:  OpenVoice embedding and XTTS latent save / load paths
+
+Results are JSON (median / min / p90 per case plus environment info). With
+--baseline, cases whose median grew by more than --threshold are reported
+as regressions and the exit code is 1.
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import tempfile
+import statistics
+import subprocess
+from importlib import metadata
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+import soundfile as sf  # noqa: E402
+import torch  # noqa: E402
+
+from benchmarks import stubs  # noqa: E402
+from benchmarks.run_server import load_server  # noqa: E402
+
+SEED = 1234
+SAMPLE_SECONDS = 3.0
+TARGET_SAMPLE_S = 0.02  # Each timing sample runs the case this long (loops calibrated)
+
+RESAMPLE_PAIRS = [(16000, 24000), (22050, 24000), (44100, 24000), (48000, 24000), (44100, 22050), (24000, 48000)]
+LOAD_FORMATS = {
+    "wav_pcm16": ("WAV", "PCM_16", "wav"),
+    "wav_float": ("WAV", "FLOAT", "wav"),
+    "flac": ("FLAC", "PCM_16", "flac"),
+    "ogg_vorbis": ("OGG", "VORBIS", "ogg"),
+}
+LOAD_SECONDS = (3, 10, 30)
+
+LONG_TEXT = {
+    "ko": "오늘 회의를 시작하겠습니다. 지난주에 논의한 일정은 그대로 진행하겠습니다! "
+          "이번 분기 목표와 관련해서 몇 가지 말씀드리겠습니다. 먼저 매출 현황부터 보겠습니다? ",
+    "ja": "今日の会議を始めます。先週話し合った日程はそのまま進めます！"
+          "今期の目標について、いくつか説明します。まず売上の状況から見ていきましょう？",
+}
+LONG_TEXT_CHARS = 5000
+
+Case = Tuple[str, Callable[[], Any]]
+
+
+# ===========================================
+# Timing
+# ===========================================
+def measure(fn: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    """Warm up, calibrate loops per sample, then time repeat samples (ms per call)"""
+    fn()
+    loops = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        if time.perf_counter() - started >= TARGET_SAMPLE_S or loops >= 1 << 16:
+            break
+        loops *= 2
+
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        samples.append((time.perf_counter() - started) / loops * 1000)
+
+    samples.sort()
+    return {
+        "median_ms": round(statistics.median(samples), 4),
+        "min_ms": round(samples[0], 4),
+        "p90_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.9))], 4),
+        "mean_ms": round(statistics.fmean(samples), 4),
+        "stdev_ms": round(statistics.stdev(samples), 4) if len(samples) > 1 else 0.0,
+        "loops": loops,
+        "repeat": repeat,
+    }
+
+
+def signal(seconds: float, sample_rate: int) -> np.ndarray:
+    """Deterministic speech-like test signal (harmonics + noise)"""
+    rng = np.random.default_rng(SEED)
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    audio = sum(0.1 / k * np.sin(2 * np.pi * 140 * k * t) for k in range(1, 8))
+    return (audio + 0.01 * rng.standard_normal(len(t))).astype(np.float32)
+
+
+# ===========================================
+# Cases
+# ===========================================
+def resample_cases(ov, xtts) -> Iterator[Case]:
+    for orig_sr, target_sr in RESAMPLE_PAIRS:
+        audio = signal(SAMPLE_SECONDS, orig_sr)
+        for res_type in ("kaiser_best", "soxr_hq"):
+            yield (
+                f"resample/openvoice/{orig_sr}->{target_sr}/{res_type}",
+                lambda a=audio, o=orig_sr, t=target_sr, r=res_type: ov.AudioProcessor.resample_audio(a, o, t, r),
+            )
+        yield (
+            f"resample/xtts/{orig_sr}->{target_sr}",
+            lambda a=audio, o=orig_sr, t=target_sr: xtts.AudioProcessor.resample_audio(a, o, t),
+        )
+
+
+def deepfilter_cases(ov, xtts) -> Iterator[Case]:
+    from tts_common import DeepFilter
+    DeepFilter.model, DeepFilter.state, _ = stubs.init_df()
+    for module, name in ((ov, "openvoice"), (xtts, "xtts")):
+        for sample_rate in (16000, 48000):
+            audio = signal(SAMPLE_SECONDS, sample_rate)
+            yield (
+                f"deepfilter/{name}/{sample_rate}",
+                lambda m=module, a=audio, sr=sample_rate: m.AudioProcessor.enhance_with_deepfilter(a, sr),
+            )
+
+
+def load_audio_cases(ov, workdir: str) -> Iterator[Case]:
+    for seconds in LOAD_SECONDS:
+        audio = signal(seconds, 44100)
+        for name, (sf_format, subtype, extension) in LOAD_FORMATS.items():
+            path = os.path.join(workdir, f"load_{seconds}s.{name}.{extension}")
+            try:
+                sf.write(path, audio, 44100, format=sf_format, subtype=subtype)
+            except Exception as e:
+                print(f"skip load_audio/{name}: {e}")
+                continue
+            yield f"load_audio/{name}/{seconds}s", lambda p=path: ov.AudioProcessor.load_audio(p)
+
+
+def wire_cases(ov) -> Iterator[Case]:
+    from audio_codec import OPUS_AVAILABLE, AudioEncoder, encode_file
+
+    chunk = signal(0.5, ov.SAMPLE_RATE_OUTPUT)  # One streamed sentence chunk
+    formats = ["float32", "pcm16"] + (["opus"] if OPUS_AVAILABLE else [])
+    for output_format in formats:
+        for sample_rate in (24000, 16000):
+            encoder = AudioEncoder(output_format, source_rate=ov.SAMPLE_RATE_OUTPUT, sample_rate=sample_rate)
+            yield f"wire/{output_format}/{sample_rate}", lambda e=encoder, c=chunk: e.encode(c)
+
+    utterance = signal(10.0, ov.SAMPLE_RATE_OUTPUT)
+    for file_format in ("wav", "opus"):
+        try:
+            encode_file(utterance[:2400], ov.SAMPLE_RATE_OUTPUT, file_format)
+        except Exception as e:
+            print(f"skip wire/file/{file_format}: {e}")
+            continue
+        yield (
+            f"wire/file/{file_format}/10s",
+            lambda f=file_format: encode_file(utterance, ov.SAMPLE_RATE_OUTPUT, f),
+        )
+
+
+def split_cases(ov) -> Iterator[Case]:
+    for language, base in LONG_TEXT.items():
+        text = (base * (LONG_TEXT_CHARS // len(base) + 1))[:LONG_TEXT_CHARS]
+        yield f"split/sentences/{language}", lambda t=text, l=language: ov.TTSPipeline.split_into_sentences(t, l)
+        yield f"split/segments/{language}", lambda t=text, l=language: ov.TTSPipeline.split_into_segments(t, l)
+
+
+def embedding_cases(ov, xtts) -> Iterator[Case]:
+    user_id = "bench-user"
+
+    # OpenVoice: save to the local tier, cold load from it (memory cache cleared)
+    embedding = torch.randn(1, 256, 1)
+    local_path = os.path.join(ov.USER_EMBEDDINGS_DIR, f"{user_id}.pth")
+    torch.save(embedding, local_path)
+
+    def openvoice_load():
+        ov.user_embeddings_cache.pop(user_id, None)
+        return ov.SpeakerEmbeddingManager.get_embedding(user_id)
+
+    yield "embedding/openvoice/save", lambda: torch.save(embedding.cpu(), local_path)
+    yield "embedding/openvoice/load_local", openvoice_load
+
+    # XTTS latents: persist (fp16 / fp32) and cold load from disk
+    gpt_cond_latent = torch.randn(1, 32, 1024)
+    speaker_embedding = torch.randn(1, 512, 1)
+
+    def xtts_put(latent_user: str, fp16: bool):
+        xtts.LATENTS_FP16 = fp16
+        xtts.LatentStore.put(latent_user, gpt_cond_latent, speaker_embedding)
+
+    def xtts_load(latent_user: str):
+        xtts.user_latents.pop(latent_user, None)
+        return xtts.LatentStore.get(latent_user)
+
+    # One user per dtype, so each load case reads a file of its own dtype
+    for fp16 in (True, False):
+        dtype = "fp16" if fp16 else "fp32"
+        latent_user = f"{user_id}-{dtype}"
+        yield f"embedding/xtts/save_{dtype}", lambda u=latent_user, f=fp16: xtts_put(u, f)
+        yield f"embedding/xtts/load_{dtype}", lambda u=latent_user: xtts_load(u)
+
+
+# ===========================================
+# Reporting
+# ===========================================
+def environment() -> Dict[str, Any]:
+    packages = {}
+    for package in ("numpy", "librosa", "soxr", "soundfile", "torch"):
+        try:
+            packages[package] = metadata.version(package)
+        except metadata.PackageNotFoundError:
+            packages[package] = None
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+    except Exception:
+        commit = None
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "torch_threads": torch.get_num_threads(),
+        "packages": packages,
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], threshold: float) -> List[str]:
+    """Print results next to the baseline; returns regressed case names"""
+    regressions = []
+    print(f"\n{'case':<52}{'median ms':>12}{'baseline':>12}{'ratio':>8}")
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            print(f"{name:<52}{result['median_ms']:>12.3f}{'-':>12}{'new':>8}")
+            continue
+        ratio = result["median_ms"] / base["median_ms"] if base["median_ms"] else float("inf")
+        flag = "  REGRESSION" if ratio > threshold else ""
+        if flag:
+            regressions.append(name)
+        print(f"{name:<52}{result['median_ms']:>12.3f}{base['median_ms']:>12.3f}{ratio:>8.2f}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for AI server building blocks")
+    parser.add_argument("--filter", help="Only cases whose name contains this")
+    parser.add_argument("--repeat", type=int, default=9, help="Timing samples per case")
+    parser.add_argument("--threads", type=int, default=1, help="torch threads (1 = most reproducible)")
+    parser.add_argument("--json", dest="json_path", help="Write results here")
+    parser.add_argument("--baseline", help="Results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=1.2, help="Median ratio that counts as a regression")
+    args = parser.parse_args()
+
+    torch.set_num_threads(args.threads)
+    torch.manual_seed(SEED)
+
+    # Zero-cost stubs: only the servers' own code is timed
+    zero = stubs.StubConfig(
+        frontend_ms_per_char=0, melo_ms_per_audio_s=0, convert_ms_per_audio_s=0, df_ms_per_audio_s=0,
+        enroll_ms=0, xtts_ms_per_audio_s=0, xtts_decoder_ms_per_audio_s=0, xtts_chunk_overhead_ms=0, busy=False,
+    )
+    ov = load_server("openvoice", zero)
+    xtts = load_server("xtts", zero)
+    workdir = tempfile.mkdtemp(prefix="bench-micro-")
+
+    cases: List[Case] = [
+        *resample_cases(ov, xtts),
+        *deepfilter_cases(ov, xtts),
+        *load_audio_cases(ov, workdir),
+        *wire_cases(ov),
+        *split_cases(ov),
+        *embedding_cases(ov, xtts),
+    ]
+
+    results: Dict[str, Dict[str, float]] = {}
+    try:
+        for name, fn in cases:
+            if args.filter and args.filter not in name:
+                continue
+            results[name] = measure(fn, args.repeat)
+            print(f"{name:<52}{results[name]['median_ms']:>12.3f} ms")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    output = {"environment": environment(), "results": results}
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(output, f, indent=2)
+        print(f"\nResults written: {args.json_path}")
+
+    regressions: List[str] = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline.get("results", {}), args.threshold)
+        print(f"\n{len(regressions)} regression(s) over {args.threshold:.2f}x")
+
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,338 @@
+"""
+Replay a recorded traffic trace (TRAFFIC_RECORD_PATH, see traffic_recorder.py)
+against a server, keeping the recorded arrival pattern.
+
+    cd ai-server
+    python -m benchmarks.replay traffic.jsonl --url http://127.0.0.1:8000
+    python -m benchmarks.replay traffic.jsonl --speed 4 --json replay.json
+
+- Every recorded WebSocket session gets its own connection; its messages are
+  sent at the recorded offsets (divided by --speed), without waiting for the
+  previous utterance (open loop, like real clients).
+- Texts are regenerated per language with the recorded length. With text
+  hashes in the trace, equal hashes get equal texts (cache behaviour holds).
+- File and batch requests are re-posted to /tts/file and /tts/batch (one
+  batch request per recorded batch session, with all its items).
+- Every recorded user is enrolled first as <prefix>-<user hash>.
+
+Reports the loadgen metrics plus schedule lag (how late events were sent;
+if it grows, the replay machine is the bottleneck) and overload rejections.
+"""
+
+import sys
+import json
+import time
+import random
+import asyncio
+import hashlib
+import argparse
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional
+
+import httpx
+import websockets
+
+from benchmarks.loadgen import (
+    PCM16_BYTES_PER_SAMPLE, SAMPLE_RATE, TEXTS, RunStats, enroll, percentiles, print_report
+)
+
+WAV_HEADER_BYTES = 44
+ENROLL_CONCURRENCY = 8
+
+
+@dataclass
+class ReplayStats(RunStats):
+    lag_s: List[float] = field(default_factory=list)
+    file_latency_s: List[float] = field(default_factory=list)
+    batch_latency_s: List[float] = field(default_factory=list)
+    rejected: int = 0
+
+
+@dataclass
+class Utterance:
+    sent: float
+    first_audio: Optional[float] = None
+    audio_bytes: int = 0
+
+
+def load_trace(path: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    events = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                events.append(json.loads(line))
+    events.sort(key=lambda e: e["t"])
+    return events[:limit] if limit else events
+
+
+def make_text(language: Optional[str], chars: Optional[int], key: Optional[str], rng: random.Random) -> str:
+    """Text of the recorded length; deterministic per text hash when there is one"""
+    corpus = TEXTS.get(language or "ko", TEXTS["en"])
+    source = random.Random(int(hashlib.md5(key.encode()).hexdigest(), 16)) if key else rng
+    chars = max(1, chars or 1)
+    text = ""
+    while len(text) < chars:
+        text += source.choice(corpus) + " "
+    return text[:chars].strip() or corpus[0]
+
+
+def bench_user(prefix: str, user_hash: str) -> str:
+    return f"{prefix}-{user_hash}"
+
+
+def finish_utterance(utterance: Utterance, stats: ReplayStats):
+    latency = time.perf_counter() - utterance.sent
+    if utterance.first_audio is None:
+        return
+    audio_s = utterance.audio_bytes / PCM16_BYTES_PER_SAMPLE / SAMPLE_RATE
+    stats.ttfa_s.append(utterance.first_audio)
+    stats.latency_s.append(latency)
+    stats.audio_s += audio_s
+    stats.utterances += 1
+    if audio_s > 0:
+        stats.rtf.append(latency / audio_s)
+
+
+async def receive_loop(ws, pending: Deque[Utterance], stats: ReplayStats):
+    """Attribute audio / completions to the oldest open utterance (the server answers in order)"""
+    async for message in ws:
+        if isinstance(message, bytes):
+            if pending:
+                utterance = pending[0]
+                if utterance.first_audio is None:
+                    utterance.first_audio = time.perf_counter() - utterance.sent
+                utterance.audio_bytes += len(message)
+            continue
+
+        data = json.loads(message)
+        if data.get("status") == "complete":
+            if pending:
+                finish_utterance(pending.popleft(), stats)
+        elif "error" in data:
+            if data["error"] == "overloaded":
+                stats.rejected += 1
+            else:
+                stats.errors.append(data["error"])
+            if pending:
+                pending.popleft()
+
+
+async def wait_until(at: float, stats: ReplayStats):
+    delay = at - time.perf_counter()
+    if delay > 0:
+        await asyncio.sleep(delay)
+    stats.lag_s.append(max(0.0, time.perf_counter() - at))
+
+
+async def replay_session(events: List[Dict[str, Any]], args: argparse.Namespace, stats: ReplayStats, schedule):
+    rng = random.Random(args.seed)
+    user_id = bench_user(args.user_prefix, events[0]["user"])
+    ws_url = args.url.replace("http", "ws", 1) + f"/ws/tts/{user_id}?format=pcm16&sample_rate={SAMPLE_RATE}"
+
+    await asyncio.sleep(max(0.0, schedule(events[0]) - time.perf_counter()))
+    pending: Deque[Utterance] = deque()
+    open_utterance: Optional[Utterance] = None
+
+    try:
+        async with websockets.connect(ws_url, max_size=None) as ws:
+            receiver = asyncio.create_task(receive_loop(ws, pending, stats))
+
+            for event in events:
+                await wait_until(schedule(event), stats)
+                kind = event["event"]
+
+                if kind == "text":
+                    text = make_text(event.get("language"), event.get("chars"), event.get("text"), rng)
+                    pending.append(Utterance(time.perf_counter()))
+                    await ws.send(json.dumps({"text": text, "language": event.get("language") or "ko"}))
+                elif kind == "append":
+                    if open_utterance is None:
+                        open_utterance = Utterance(time.perf_counter())
+                        pending.append(open_utterance)
+                    text = make_text(event.get("language"), event.get("chars"), event.get("text"), rng)
+                    await ws.send(json.dumps({"type": "append", "text": text, "language": event.get("language") or "ko"}))
+                elif kind == "flush":
+                    await ws.send(json.dumps({"type": "flush"}))
+                elif kind == "end":
+                    if open_utterance is None:
+                        pending.append(Utterance(time.perf_counter()))  # Server still sends complete
+                    open_utterance = None
+                    await ws.send(json.dumps({"type": "end"}))
+
+            # Let outstanding utterances finish
+            drain_until = time.perf_counter() + args.drain_s
+            while pending and time.perf_counter() < drain_until and not receiver.done():
+                await asyncio.sleep(0.05)
+            if pending:
+                stats.errors.append(f"{user_id}: {len(pending)} utterances unfinished")
+            receiver.cancel()
+    except Exception as e:
+        stats.errors.append(f"{user_id}: {type(e).__name__}: {e}")
+
+
+async def replay_file(event: Dict[str, Any], client: httpx.AsyncClient, args: argparse.Namespace,
+                      stats: ReplayStats, schedule):
+    await wait_until(schedule(event), stats)
+    user_id = bench_user(args.user_prefix, event["user"])
+    text = make_text(event.get("language"), event.get("chars"), event.get("text"), random.Random(args.seed))
+
+    started = time.perf_counter()
+    try:
+        response = await client.post(
+            f"{args.url}/tts/file/{user_id}",
+            json={"text": text, "language": event.get("language") or "ko", "format": "wav"},
+            timeout=600,
+        )
+        if response.status_code == 503:
+            stats.rejected += 1
+            return
+        response.raise_for_status()
+    except Exception as e:
+        stats.errors.append(f"file {user_id}: {e}")
+        return
+    stats.file_latency_s.append(time.perf_counter() - started)
+    stats.audio_s += max(0, len(response.content) - WAV_HEADER_BYTES) / PCM16_BYTES_PER_SAMPLE / SAMPLE_RATE
+
+
+async def replay_batch(events: List[Dict[str, Any]], client: httpx.AsyncClient, args: argparse.Namespace,
+                       stats: ReplayStats, schedule):
+    await wait_until(schedule(events[0]), stats)
+    rng = random.Random(args.seed)
+    items = [
+        {
+            "user_id": bench_user(args.user_prefix, event["user"]),
+            "language": event.get("language") or "ko",
+            "text": make_text(event.get("language"), event.get("chars"), event.get("text"), rng),
+        }
+        for event in events
+    ]
+
+    started = time.perf_counter()
+    try:
+        response = await client.post(f"{args.url}/tts/batch", json={"items": items, "format": "wav"}, timeout=600)
+        if response.status_code == 503:
+            stats.rejected += 1
+            return
+        response.raise_for_status()
+    except Exception as e:
+        stats.errors.append(f"batch ({len(items)} items): {e}")
+        return
+    stats.batch_latency_s.append(time.perf_counter() - started)
+
+    for line in response.text.splitlines():
+        result = json.loads(line)
+        if "error" in result:
+            stats.errors.append(f"batch {result['user_id']}: {result['error']}")
+        else:
+            stats.audio_s += result["duration_ms"] / 1000
+
+
+async def enroll_users(user_hashes: List[str], args: argparse.Namespace, stats: ReplayStats):
+    semaphore = asyncio.Semaphore(ENROLL_CONCURRENCY)
+
+    async def enroll_one(client: httpx.AsyncClient, user_hash: str):
+        async with semaphore:
+            await enroll(client, args.url, bench_user(args.user_prefix, user_hash), stats)
+
+    async with httpx.AsyncClient() as client:
+        await asyncio.gather(*[enroll_one(client, h) for h in user_hashes])
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    events = load_trace(args.trace, args.limit)
+    if not events:
+        raise SystemExit("Empty trace")
+
+    stats = ReplayStats()
+    sessions: Dict[str, List[Dict[str, Any]]] = {}
+    files = []
+    batches: Dict[str, List[Dict[str, Any]]] = {}
+    for event in events:
+        if event.get("endpoint") == "file":
+            files.append(event)
+        elif event.get("endpoint") == "batch":
+            batches.setdefault(event.get("session") or event["user"], []).append(event)
+        else:
+            sessions.setdefault(event.get("session") or event["user"], []).append(event)
+
+    if args.enroll:
+        await enroll_users(sorted({e["user"] for e in events}), args, stats)
+
+    first_t = events[0]["t"]
+    started = time.perf_counter()
+
+    def schedule(event: Dict[str, Any]) -> float:
+        return started + (event["t"] - first_t) / args.speed
+
+    async with httpx.AsyncClient() as client:
+        await asyncio.gather(
+            *[replay_session(session_events, args, stats, schedule) for session_events in sessions.values()],
+            *[replay_file(event, client, args, stats, schedule) for event in files],
+            *[replay_batch(batch_events, client, args, stats, schedule) for batch_events in batches.values()],
+        )
+    wall = time.perf_counter() - started
+
+    return {
+        "config": {
+            "url": args.url,
+            "trace": args.trace,
+            "speed": args.speed,
+            "events": len(events),
+            "sessions": len(sessions),
+            "file_requests": len(files),
+            "batch_requests": len(batches),
+            "trace_span_s": round(events[-1]["t"] - first_t, 3),
+        },
+        "wall_s": round(wall, 3),
+        "utterances": stats.utterances,
+        "errors": len(stats.errors),
+        "error_samples": stats.errors[:10],
+        "rejected": stats.rejected,
+        "throughput_utt_per_s": round(stats.utterances / wall, 3),
+        "throughput_audio_s_per_s": round(stats.audio_s / wall, 3),
+        "enroll_s": percentiles(stats.enroll_s),
+        "ttfa_s": percentiles(stats.ttfa_s),
+        "latency_s": percentiles(stats.latency_s),
+        "rtf": percentiles(stats.rtf),
+        "file_latency_s": percentiles(stats.file_latency_s),
+        "batch_latency_s": percentiles(stats.batch_latency_s),
+        "schedule_lag_s": percentiles(stats.lag_s),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recorded traffic trace")
+    parser.add_argument("trace", help="JSONL written with TRAFFIC_RECORD_PATH")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--speed", type=float, default=1.0, help="Time compression (2 = twice as fast)")
+    parser.add_argument("--limit", type=int, help="Replay only the first N events")
+    parser.add_argument("--drain-s", type=float, default=60.0, help="Wait for open utterances after the last event")
+    parser.add_argument("--no-enroll", dest="enroll", action="store_false")
+    parser.add_argument("--user-prefix", default="replay-user")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", dest="json_path", help="Write the report here")
+    args = parser.parse_args()
+    if args.speed <= 0:
+        parser.error("--speed must be > 0")
+
+    report = asyncio.run(run(args))
+    print_report(report)
+    print(f"rejected (overloaded): {report['rejected']}")
+    for name in ("file_latency_s", "batch_latency_s", "schedule_lag_s"):
+        p = report[name]
+        if p["count"]:
+            print(f"{name}: p50={p['p50']:.3f} p99={p['p99']:.3f} (n={p['count']})")
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written: {args.json_path}")
+
+    served = report["utterances"] or report["file_latency_s"]["count"] or report["batch_latency_s"]["count"]
+    sys.exit(0 if served else 1)
+
+
+if __name__ == "__main__":
+    main()
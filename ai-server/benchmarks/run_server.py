@@ -0,0 +1,85 @@
+"""
+Run an AI server on stub models (see stubs.py).
+
+    cd ai-server
+    python -m benchmarks.run_server openvoice --port 8000
+    python -m benchmarks.run_server xtts --port 8001 --xtts-ms-per-audio-s 400
+    python -m benchmarks.run_server unified --port 8002
+
+S3 is disabled and enrolled embeddings / latents go to temporary
+directories, so a benchmark run leaves nothing behind. Server env vars
+(INFERENCE_WORKERS, MELO_BATCH_MAX, INFERENCE_ENGINE, ...) apply as usual.
+"""
+
+import os
+import sys
+import argparse
+import importlib
+import tempfile
+from dataclasses import fields
+
+from loguru import logger
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import stubs  # noqa: E402
+
+SERVER_MODULES = {"openvoice": "server_openvoice_v2", "xtts": "server", "unified": "server_unified"}
+
+
+class _NoS3:
+    """Stands in for S3EmbeddingManager: init fails, so the server runs without S3"""
+
+    def __init__(self, *args, **kwargs):
+        raise RuntimeError("S3 disabled in benchmark mode")
+
+
+def load_server(name: str, stub_config: stubs.StubConfig):
+    """Install stubs and import the server module with S3 off and a temp embeddings dir"""
+    stubs.install(stub_config)
+    module = importlib.import_module(SERVER_MODULES[name])
+
+    # The unified server wraps the engine servers it imported: patch those too
+    for patched in [sys.modules[m] for m in SERVER_MODULES.values() if m in sys.modules]:
+        if hasattr(patched, "S3EmbeddingManager"):
+            patched.S3EmbeddingManager = _NoS3
+        if hasattr(patched, "USER_EMBEDDINGS_DIR"):
+            patched.USER_EMBEDDINGS_DIR = tempfile.mkdtemp(prefix="bench-embeddings-")
+        if hasattr(patched, "USER_AGGREGATES_DIR"):
+            patched.USER_AGGREGATES_DIR = os.path.join(patched.USER_EMBEDDINGS_DIR, "aggregates")
+            os.makedirs(patched.USER_AGGREGATES_DIR, exist_ok=True)
+        if hasattr(patched, "LATENTS_DIR"):
+            patched.LATENTS_DIR = tempfile.mkdtemp(prefix="bench-latents-")
+    return module
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run an AI server on stub models")
+    parser.add_argument("server", choices=sorted(SERVER_MODULES))
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+
+    # Stub costs: --melo-ms-per-audio-s 60 etc. (defaults from STUB_* env vars)
+    defaults = stubs.StubConfig.from_env()
+    for field in fields(stubs.StubConfig):
+        flag = "--" + field.name.replace("_", "-")
+        if field.type is bool:
+            parser.add_argument(flag, type=int, choices=[0, 1], default=int(getattr(defaults, field.name)))
+        else:
+            parser.add_argument(flag, type=float, default=getattr(defaults, field.name))
+    args = parser.parse_args()
+
+    stub_config = stubs.StubConfig(**{
+        field.name: (bool(getattr(args, field.name)) if field.type is bool else getattr(args, field.name))
+        for field in fields(stubs.StubConfig)
+    })
+    logger.info(f"Stub config: {stub_config}")
+
+    module = load_server(args.server, stub_config)
+
+    import uvicorn
+    uvicorn.run(module.app, host=args.host, port=args.port, reload=False)
+
+
+if __name__ == "__main__":
+    main()
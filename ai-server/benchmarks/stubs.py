@@ -0,0 +1,412 @@
+"""
+Drop-in stub models for load testing without checkpoints or a GPU.
+
+install() registers fake `melo`, `openvoice`, `df` and `TTS` packages in
+sys.modules, so server.py / server_openvoice_v2.py import them instead of
+the real models. Each stub produces correctly shaped output and spends a
+configurable amount of compute per second of audio, so the servers'
+scheduling, batching, caching and streaming paths run for real.
+
+Cost model (StubConfig, env vars in brackets):
+- frontend_ms_per_char    [STUB_FRONTEND_MS_PER_CHAR]  G2P + BERT
+- melo_ms_per_audio_s     [STUB_MELO_MS_PER_AUDIO_S]   MeloTTS acoustic model
+- convert_ms_per_audio_s  [STUB_CONVERT_MS_PER_AUDIO_S] ToneColorConverter
+- df_ms_per_audio_s       [STUB_DF_MS_PER_AUDIO_S]     DeepFilterNet
+- enroll_ms               [STUB_ENROLL_MS]             se_extractor / XTTS latents
+- xtts_ms_per_audio_s     [STUB_XTTS_MS_PER_AUDIO_S]   XTTS GPT decoding
+- xtts_decoder_ms_per_audio_s [STUB_XTTS_DECODER_MS_PER_AUDIO_S] HiFi-GAN, per
+                          second decoded (each chunk re-decodes the sentence so far)
+- xtts_chunk_overhead_ms  [STUB_XTTS_CHUNK_OVERHEAD_MS] fixed cost per decoder call
+- xtts_batch_step_scale   [STUB_XTTS_BATCH_STEP_SCALE] extra cost of each additional
+                          sequence in a batched GPT step (0.1 = +10% per sequence)
+- chars_per_audio_s       [STUB_CHARS_PER_AUDIO_S]     output length
+- busy                    [STUB_BUSY]  1 = burn CPU in torch ops (releases the
+                                      GIL like real kernels), 0 = sleep
+"""
+
+import os
+import sys
+import time
+import types
+from dataclasses import dataclass
+from typing import Iterator, Optional
+
+import numpy as np
+import torch
+
+
+@dataclass
+class StubConfig:
+    frontend_ms_per_char: float = 0.5
+    melo_ms_per_audio_s: float = 60.0
+    convert_ms_per_audio_s: float = 40.0
+    df_ms_per_audio_s: float = 20.0
+    enroll_ms: float = 300.0
+    xtts_ms_per_audio_s: float = 250.0
+    xtts_decoder_ms_per_audio_s: float = 30.0
+    xtts_chunk_overhead_ms: float = 15.0
+    xtts_batch_step_scale: float = 0.1
+    chars_per_audio_s: float = 12.0
+    busy: bool = True
+
+    @classmethod
+    def from_env(cls) -> "StubConfig":
+        defaults = cls()
+        return cls(
+            frontend_ms_per_char=float(os.getenv("STUB_FRONTEND_MS_PER_CHAR", defaults.frontend_ms_per_char)),
+            melo_ms_per_audio_s=float(os.getenv("STUB_MELO_MS_PER_AUDIO_S", defaults.melo_ms_per_audio_s)),
+            convert_ms_per_audio_s=float(os.getenv("STUB_CONVERT_MS_PER_AUDIO_S", defaults.convert_ms_per_audio_s)),
+            df_ms_per_audio_s=float(os.getenv("STUB_DF_MS_PER_AUDIO_S", defaults.df_ms_per_audio_s)),
+            enroll_ms=float(os.getenv("STUB_ENROLL_MS", defaults.enroll_ms)),
+            xtts_ms_per_audio_s=float(os.getenv("STUB_XTTS_MS_PER_AUDIO_S", defaults.xtts_ms_per_audio_s)),
+            xtts_decoder_ms_per_audio_s=float(
+                os.getenv("STUB_XTTS_DECODER_MS_PER_AUDIO_S", defaults.xtts_decoder_ms_per_audio_s)
+            ),
+            xtts_chunk_overhead_ms=float(os.getenv("STUB_XTTS_CHUNK_OVERHEAD_MS", defaults.xtts_chunk_overhead_ms)),
+            xtts_batch_step_scale=float(os.getenv("STUB_XTTS_BATCH_STEP_SCALE", defaults.xtts_batch_step_scale)),
+            chars_per_audio_s=float(os.getenv("STUB_CHARS_PER_AUDIO_S", defaults.chars_per_audio_s)),
+            busy=os.getenv("STUB_BUSY", "1" if defaults.busy else "0") == "1",
+        )
+
+
+config = StubConfig.from_env()
+
+MELO_SAMPLE_RATE = 44100
+MELO_HOP = 512
+CONVERTER_SAMPLE_RATE = 22050
+CONVERTER_HOP = 256
+XTTS_SAMPLE_RATE = 24000
+XTTS_SAMPLES_PER_TOKEN = 1024
+PHONES_PER_CHAR = 2
+
+
+def spend(ms: float):
+    """Burn ms of compute (torch matmuls release the GIL, like real model kernels)"""
+    if ms <= 0:
+        return
+    if not config.busy:
+        time.sleep(ms / 1000)
+        return
+    deadline = time.perf_counter() + ms / 1000
+    a = torch.randn(128, 128)
+    while time.perf_counter() < deadline:
+        a = torch.tanh(a @ a)
+
+
+def _tone(samples: int, sample_rate: int) -> np.ndarray:
+    """Quiet 220 Hz tone, so the output is audible but clearly synthetic"""
+    t = np.arange(samples, dtype=np.float32) / sample_rate
+    return (0.1 * np.sin(2 * np.pi * 220.0 * t)).astype(np.float32)
+
+
+class _Namespace:
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+# ===========================================
+# MeloTTS
+# ===========================================
+class StubMeloModel:
+    def infer(self, x, x_lengths, sid, tone, language, bert, ja_bert,
+              sdp_ratio=0.2, noise_scale=0.6, noise_scale_w=0.8, length_scale=1.0):
+        batch = x.size(0)
+        # Output length follows the phone count (chars_per_audio_s chars per second)
+        frames_per_phone = MELO_SAMPLE_RATE / MELO_HOP / (config.chars_per_audio_s * PHONES_PER_CHAR)
+        frames = [max(1, int(int(n) * frames_per_phone * length_scale)) for n in x_lengths.tolist()]
+        max_frames = max(frames)
+
+        spend(config.melo_ms_per_audio_s * sum(frames) * MELO_HOP / MELO_SAMPLE_RATE)
+
+        o = torch.zeros(batch, 1, max_frames * MELO_HOP)
+        y_mask = torch.zeros(batch, 1, max_frames)
+        for i, n in enumerate(frames):
+            o[i, 0, :n * MELO_HOP] = torch.from_numpy(_tone(n * MELO_HOP, MELO_SAMPLE_RATE))
+            y_mask[i, 0, :n] = 1.0
+        return o, None, y_mask, None
+
+
+class StubMeloTTS:
+    def __init__(self, language: str = "KR", device: str = "cpu"):
+        self.language = language
+        self.device = device
+        self.hps = _Namespace(data=_Namespace(sampling_rate=MELO_SAMPLE_RATE, hop_length=MELO_HOP))
+        self.symbol_to_id = {}
+        self.model = StubMeloModel()
+
+    def tts_to_file(self, text: str, speaker_id: int, output_path: str, **kwargs):
+        import soundfile as sf
+        samples = int(max(1.0, len(text) / config.chars_per_audio_s) * MELO_SAMPLE_RATE)
+        sf.write(output_path, _tone(samples, MELO_SAMPLE_RATE), MELO_SAMPLE_RATE)
+
+
+def get_text_for_tts_infer(text, language_str, hps, device, symbol_to_id=None):
+    n = max(1, len(text) * PHONES_PER_CHAR + 1)
+    spend(config.frontend_ms_per_char * len(text))
+    bert = torch.zeros(1024, n)
+    ja_bert = torch.zeros(768, n)
+    phones = torch.ones(n, dtype=torch.long)
+    tones = torch.zeros(n, dtype=torch.long)
+    lang_ids = torch.zeros(n, dtype=torch.long)
+    return bert, ja_bert, phones, tones, lang_ids
+
+
+# ===========================================
+# OpenVoice ToneColorConverter
+# ===========================================
+class StubConverterModel:
+    def voice_conversion(self, spec, spec_lengths, sid_src, sid_tgt, tau=0.3):
+        frames = spec.size(-1)
+        samples = frames * CONVERTER_HOP
+        spend(config.convert_ms_per_audio_s * samples / CONVERTER_SAMPLE_RATE)
+        audio = torch.from_numpy(_tone(samples, CONVERTER_SAMPLE_RATE)).view(1, 1, -1)
+        return audio, None, None
+
+
+class StubToneColorConverter:
+    def __init__(self, config_path: str = "", device: str = "cpu"):
+        self.device = device
+        self.hps = _Namespace(data=_Namespace(
+            sampling_rate=CONVERTER_SAMPLE_RATE,
+            filter_length=1024,
+            hop_length=CONVERTER_HOP,
+            win_length=1024,
+        ))
+        self.model = StubConverterModel()
+
+    def load_ckpt(self, path: str):
+        pass
+
+    def add_watermark(self, audio: np.ndarray, message: str) -> np.ndarray:
+        return audio
+
+
+def spectrogram_torch(y, n_fft, sampling_rate, hop_size, win_size, center=False):
+    frames = max(1, (y.size(-1) - n_fft) // hop_size + 1)
+    return torch.zeros(y.size(0), n_fft // 2 + 1, frames)
+
+
+def get_se(audio_path: str, converter, vad: bool = True, **kwargs):
+    spend(config.enroll_ms)
+    return torch.randn(1, 256, 1), os.path.basename(audio_path)
+
+
+# ===========================================
+# DeepFilterNet
+# ===========================================
+def init_df(*args, **kwargs):
+    return object(), _Namespace(sr=lambda: 48000), None
+
+
+def enhance(model, state, audio: torch.Tensor, **kwargs) -> torch.Tensor:
+    spend(config.df_ms_per_audio_s * audio.size(-1) / 48000)
+    return audio
+
+
+# ===========================================
+# XTTS
+# ===========================================
+XTTS_TOKEN_SECONDS = XTTS_SAMPLES_PER_TOKEN / XTTS_SAMPLE_RATE
+XTTS_LATENT_DIM = 1024
+XTTS_COND_LEN = 32
+XTTS_VOCAB = 8
+XTTS_START_AUDIO_TOKEN = 6
+XTTS_STOP_AUDIO_TOKEN = 7
+
+
+def _xtts_tokens(chars: int) -> int:
+    """GPT steps for a text of chars characters"""
+    return max(1, int(chars / config.chars_per_audio_s / XTTS_TOKEN_SECONDS))
+
+
+def _xtts_step_cost(batch: int) -> float:
+    return config.xtts_ms_per_audio_s * XTTS_TOKEN_SECONDS * (1 + config.xtts_batch_step_scale * (batch - 1))
+
+
+class StubXttsTokenizer:
+    char_limits = {"ko": 95, "en": 250, "ja": 71, "zh": 82}
+
+    def encode(self, text: str, lang: str = "en"):
+        return list(range(len(text)))
+
+
+class _StubPositions:
+    def __call__(self, x):
+        return torch.zeros(1, x.shape[1], XTTS_LATENT_DIM)
+
+    def get_fixed_embedding(self, ind, device=None):
+        return torch.zeros(1, 1, XTTS_LATENT_DIM)
+
+
+class StubGPTInference:
+    """
+    GPT2InferenceModel stand-in for the batched decoder. The KV cache (one
+    layer) carries each sequence's target length, so the stop token comes
+    after as many steps as the text needs, whatever the batch composition.
+    """
+
+    def __init__(self):
+        self.pos_embedding = _StubPositions()
+
+    def embeddings(self, ids):
+        return torch.zeros(*ids.shape, XTTS_LATENT_DIM)
+
+    def transformer(self, inputs_embeds, past_key_values=None, attention_mask=None, **kwargs):
+        batch, steps, _ = inputs_embeds.shape
+        if past_key_values is None:
+            chars = steps - 1 - XTTS_COND_LEN - 2  # Prefix = cond + start/stop text tokens + start audio token
+            targets = torch.full((batch,), float(steps + _xtts_tokens(chars)))
+            lengths = torch.full((batch,), float(steps))
+            keys = targets.view(batch, 1, 1, 1).expand(batch, 1, steps, 1).clone()
+        else:
+            previous = past_key_values[0][0]
+            targets = previous[:, 0, -1, 0]
+            lengths = attention_mask.sum(dim=1).float()
+            keys = torch.cat([previous, targets.view(batch, 1, 1, 1)], dim=2)
+
+        spend(_xtts_step_cost(batch))
+        hidden = torch.zeros(batch, steps, XTTS_LATENT_DIM)
+        hidden[:, -1, 0] = (lengths >= targets).float()
+        return _Namespace(last_hidden_state=hidden, past_key_values=((keys, keys),))
+
+    def lm_head(self, hidden):
+        done = hidden[..., 0] > 0
+        logits = torch.zeros(*hidden.shape[:2], XTTS_VOCAB)
+        logits[..., 0] = torch.where(done, -50.0, 50.0)
+        logits[..., XTTS_STOP_AUDIO_TOKEN] = torch.where(done, 50.0, -50.0)
+        return logits
+
+    def final_norm(self, hidden):
+        return hidden
+
+
+class StubGPT:
+    start_text_token = 0
+    stop_text_token = 1
+    start_audio_token = XTTS_START_AUDIO_TOKEN
+    stop_audio_token = XTTS_STOP_AUDIO_TOKEN
+    max_gen_mel_tokens = 605
+
+    def __init__(self):
+        self.gpt_inference = StubGPTInference()
+
+    def text_embedding(self, ids):
+        return torch.zeros(*ids.shape, XTTS_LATENT_DIM)
+
+    def text_pos_embedding(self, ids):
+        return torch.zeros(1, ids.shape[1], XTTS_LATENT_DIM)
+
+    def compute_embeddings(self, cond_latents, text_inputs):
+        return text_inputs
+
+    def get_generator(self, fake_inputs, **kwargs):
+        """Yields (token, latent) per GPT step; output length follows the text length"""
+        for i in range(_xtts_tokens(fake_inputs.shape[-1])):
+            spend(_xtts_step_cost(1))
+            yield i, torch.zeros(1, XTTS_LATENT_DIM)
+
+
+class StubHifiganDecoder:
+    def __call__(self, latents, g=None):
+        samples = latents.size(1) * XTTS_SAMPLES_PER_TOKEN
+        spend(config.xtts_chunk_overhead_ms + config.xtts_decoder_ms_per_audio_s * samples / XTTS_SAMPLE_RATE)
+        return torch.from_numpy(_tone(samples, XTTS_SAMPLE_RATE)).view(1, 1, -1)
+
+
+class StubXtts:
+    """XTTS with the internals the scheduled streaming loop uses (gpt, hifigan_decoder, handle_chunks)"""
+
+    def __init__(self):
+        self.device = "cpu"
+        self.args = _Namespace(gpt_max_text_tokens=402)
+        self.tokenizer = StubXttsTokenizer()
+        self.gpt = StubGPT()
+        self.hifigan_decoder = StubHifiganDecoder()
+
+    def handle_chunks(self, wav_gen, wav_gen_prev, wav_overlap, overlap_len):
+        """Same chunk / crossfade bookkeeping as Xtts.handle_chunks"""
+        wav_chunk = wav_gen[:-overlap_len]
+        if wav_gen_prev is not None:
+            wav_chunk = wav_gen[(wav_gen_prev.shape[0] - overlap_len):-overlap_len]
+        if wav_overlap is not None:
+            if overlap_len > len(wav_chunk):
+                if wav_gen_prev is not None:
+                    wav_chunk = wav_gen[(wav_gen_prev.shape[0] - overlap_len):]
+                else:
+                    wav_chunk = wav_gen[-overlap_len:]
+                return wav_chunk, wav_gen, None
+            crossfade_wav = wav_chunk[:overlap_len] * torch.linspace(0.0, 1.0, overlap_len)
+            wav_chunk[:overlap_len] = wav_overlap * torch.linspace(1.0, 0.0, overlap_len)
+            wav_chunk[:overlap_len] += crossfade_wav
+        wav_overlap = wav_gen[-overlap_len:]
+        wav_gen_prev = wav_gen
+        return wav_chunk, wav_gen_prev, wav_overlap
+
+    def get_conditioning_latents(self, audio_path: Optional[str] = None, **kwargs):
+        spend(config.enroll_ms)
+        return torch.randn(1, XTTS_COND_LEN, XTTS_LATENT_DIM), torch.randn(1, 512, 1)
+
+    def inference_stream(
+        self,
+        text: str,
+        language: str,
+        gpt_cond_latent,
+        speaker_embedding,
+        stream_chunk_size: int = 20,
+        overlap_wav_len: int = 1024,
+        temperature: float = 0.75,
+        length_penalty: float = 1.0,
+        repetition_penalty: float = 10.0,
+        top_k: int = 50,
+        top_p: float = 0.85,
+        do_sample: bool = True,
+        speed: float = 1.0,
+        enable_text_splitting: bool = False,
+        **kwargs
+    ) -> Iterator[torch.Tensor]:
+        total = int(max(0.5, len(text) / config.chars_per_audio_s) * XTTS_SAMPLE_RATE)
+        chunk = stream_chunk_size * XTTS_SAMPLES_PER_TOKEN
+        audio = torch.from_numpy(_tone(total, XTTS_SAMPLE_RATE))
+        for start in range(0, total, chunk):
+            piece = audio[start:start + chunk]
+            spend(config.xtts_ms_per_audio_s * len(piece) / XTTS_SAMPLE_RATE)
+            yield piece
+
+
+class StubTTS:
+    def __init__(self, model_name: str = "", **kwargs):
+        self.synthesizer = _Namespace(tts_model=StubXtts())
+
+    def to(self, device: str) -> "StubTTS":
+        return self
+
+
+# ===========================================
+# Installation
+# ===========================================
+def _module(name: str, **attrs) -> types.ModuleType:
+    module = types.ModuleType(name)
+    module.__dict__.update(attrs)
+    sys.modules[name] = module
+    return module
+
+
+def install(stub_config: Optional[StubConfig] = None):
+    """Register the stub packages in sys.modules (call before importing a server)"""
+    global config
+    if stub_config is not None:
+        config = stub_config
+
+    melo_api = _module("melo.api", TTS=StubMeloTTS)
+    melo_utils = _module("melo.utils", get_text_for_tts_infer=get_text_for_tts_infer)
+    _module("melo", api=melo_api, utils=melo_utils)
+
+    ov_api = _module("openvoice.api", ToneColorConverter=StubToneColorConverter)
+    ov_se = _module("openvoice.se_extractor", get_se=get_se)
+    ov_mel = _module("openvoice.mel_processing", spectrogram_torch=spectrogram_torch)
+    _module("openvoice", api=ov_api, se_extractor=ov_se, mel_processing=ov_mel)
+
+    _module("df", enhance=enhance, init_df=init_df)
+
+    tts_api = _module("TTS.api", TTS=StubTTS)
+    _module("TTS", api=tts_api)
@@ -0,0 +1,200 @@
+"""
+Multi-node helpers for running several AI server replicas.
+
+- HashRing: consistent hashing with virtual nodes, so each speaker (user_id)
+  maps to a preferred replica and stays hot there. Adding or removing a
+  replica only moves ~1/N of the speakers.
+- SharedEmbeddingCache: second-tier embedding cache shared by all replicas
+  (any Redis-protocol server, including a local stand-in), sitting between
+  each process's in-memory cache and S3. It also holds each speaker's
+  current version token (no expiry; DELETED after a delete), which replicas
+  check before trusting their own memory / local copies. Tokens are cached
+  for version_ttl_s, and after a Redis error the cache is skipped for
+  retry_after_s, so lookups made on an event loop stay cheap.
+
+Configuration:
+    CLUSTER_NODES=http://ai-1:8000,http://ai-2:8000
+    CLUSTER_SELF=http://ai-1:8000
+    EMBEDDING_CACHE_REDIS_URL=redis://localhost:6379/0
+"""
+
+import time
+import bisect
+import hashlib
+from typing import Dict, List, Optional, Tuple
+
+from loguru import logger
+
+# ===========================================
+# Redis Import
+# ===========================================
+REDIS_AVAILABLE = False
+redis = None
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError as e:
+    logger.warning(f"redis ImportError: {e}")
+except Exception as e:
+    logger.warning(f"redis import failed: {e}")
+
+
+# Version token of a deleted speaker (other replicas drop their copies)
+DELETED = "deleted"
+
+
+def _hash(key: str) -> int:
+    """Stable 64-bit hash (Python's hash() is salted per process)"""
+    return int.from_bytes(hashlib.md5(key.encode("utf-8")).digest()[:8], "big")
+
+
+class HashRing:
+    """Consistent hash ring with virtual nodes"""
+
+    def __init__(self, nodes: Optional[List[str]] = None, vnodes: int = 128):
+        self.vnodes = vnodes
+        self._ring: List[int] = []
+        self._owners: Dict[int, str] = {}
+        self.nodes: List[str] = []
+        for node in nodes or []:
+            self.add_node(node)
+
+    def add_node(self, node: str):
+        if node in self.nodes:
+            return
+        self.nodes.append(node)
+        for i in range(self.vnodes):
+            point = _hash(f"{node}#{i}")
+            if point in self._owners:
+                continue  # Collision: keep the first owner
+            self._owners[point] = node
+            bisect.insort(self._ring, point)
+
+    def remove_node(self, node: str):
+        if node not in self.nodes:
+            return
+        self.nodes.remove(node)
+        self._ring = [p for p in self._ring if self._owners[p] != node]
+        self._owners = {p: n for p, n in self._owners.items() if n != node}
+
+    def get_nodes(self, key: str, count: int = 1) -> List[str]:
+        """Preference list: up to count distinct nodes, clockwise from key"""
+        if not self._ring:
+            return []
+
+        count = min(count, len(self.nodes))
+        start = bisect.bisect(self._ring, _hash(key))
+        result: List[str] = []
+        for offset in range(len(self._ring)):
+            node = self._owners[self._ring[(start + offset) % len(self._ring)]]
+            if node not in result:
+                result.append(node)
+                if len(result) == count:
+                    break
+        return result
+
+    def get_node(self, key: str) -> Optional[str]:
+        """Preferred node for key"""
+        nodes = self.get_nodes(key, 1)
+        return nodes[0] if nodes else None
+
+
+class SharedEmbeddingCache:
+    """Redis-backed blob cache for serialized speaker embeddings, plus their version tokens"""
+
+    def __init__(
+        self,
+        url: str,
+        ttl_seconds: int = 86400,
+        prefix: str = "voice-embedding:",
+        version_ttl_s: float = 2.0,
+        retry_after_s: float = 30.0
+    ):
+        if not REDIS_AVAILABLE:
+            raise RuntimeError("redis package not installed")
+        self.client = redis.Redis.from_url(url, socket_timeout=1.0, socket_connect_timeout=1.0)
+        self.ttl_seconds = ttl_seconds
+        self.prefix = prefix
+        self.version_ttl_s = version_ttl_s
+        self.retry_after_s = retry_after_s
+        self._versions: Dict[str, Tuple[Optional[str], float]] = {}  # user_id -> (token, fetched)
+        self._down_until = 0.0
+        self.client.ping()
+
+    def _available(self) -> bool:
+        return time.monotonic() >= self._down_until
+
+    def _failed(self, operation: str, error: Exception):
+        """Skip Redis for retry_after_s (each call would otherwise wait out the socket timeout)"""
+        self._down_until = time.monotonic() + self.retry_after_s
+        logger.warning(f"Shared embedding cache {operation} failed, skipping it for {self.retry_after_s:g}s: {error}")
+
+    def _key(self, user_id: str) -> str:
+        return f"{self.prefix}{user_id}"
+
+    def _version_key(self, user_id: str) -> str:
+        return f"{self.prefix}version:{user_id}"
+
+    def get_version(self, user_id: str) -> Optional[str]:
+        """
+        Current version token (None: unknown, or the cache is unreachable).
+        Up to version_ttl_s old: another replica's re-enrollment or delete
+        is seen within that time.
+        """
+        now = time.monotonic()
+        cached = self._versions.get(user_id)
+        if cached is not None and now - cached[1] < self.version_ttl_s:
+            return cached[0]
+        if not self._available():
+            return None
+        try:
+            version = self.client.get(self._version_key(user_id))
+        except Exception as e:
+            self._failed("version get", e)
+            return None
+        version = version.decode("utf-8") if version is not None else None
+        self._versions[user_id] = (version, now)
+        return version
+
+    def get(self, user_id: str) -> Optional[bytes]:
+        if not self._available():
+            return None
+        try:
+            data = self.client.get(self._key(user_id))
+            if data is not None:
+                # Sliding expiry: active speakers stay in the shared tier
+                self.client.expire(self._key(user_id), self.ttl_seconds)
+            return data
+        except Exception as e:
+            self._failed("get", e)
+            return None
+
+    def put(self, user_id: str, data: bytes, version: Optional[str] = None):
+        """Store the blob; with version, also make it the current version (atomically)"""
+        if not self._available():
+            return
+        try:
+            pipe = self.client.pipeline()
+            pipe.set(self._key(user_id), data, ex=self.ttl_seconds)
+            if version is not None:
+                pipe.set(self._version_key(user_id), version)
+            pipe.execute()
+        except Exception as e:
+            self._failed("put", e)
+            return
+        if version is not None:
+            self._versions[user_id] = (version, time.monotonic())
+
+    def delete(self, user_id: str):
+        """Drop the blob and leave a DELETED version, so every replica stops serving the voice"""
+        self._versions[user_id] = (DELETED, time.monotonic())
+        if not self._available():
+            return
+        try:
+            pipe = self.client.pipeline()
+            pipe.delete(self._key(user_id))
+            pipe.set(self._version_key(user_id), DELETED)
+            pipe.execute()
+        except Exception as e:
+            self._failed("delete", e)
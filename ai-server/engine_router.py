@@ -0,0 +1,133 @@
+"""
+Latency-budget routing between TTS engines (server_unified.py).
+
+Each request is routed from measured data, not static config:
+
+- time to first audio (TTFA) per (engine, language): EWMA of what requests
+  actually saw, seeded with a per-engine prior until there are samples.
+  Without new samples the estimate decays back toward the prior (half-life
+  half_life_s), so an engine that stopped being picked after a slow
+  outlier (e.g. a cold start) gets tried again
+- current queue wait per engine (reported by the engine at routing time)
+
+predicted TTFA = TTFA EWMA + current queue wait
+
+Quality tiers:
+- "fast":      lowest predicted TTFA first
+- "high":      highest-quality engine first, whatever its latency
+- "balanced":  engines predicted within the latency budget, best quality
+               first; then the rest, fastest first (default)
+
+Saturated engines are left out, so their traffic fails over to the others.
+The returned order doubles as the failover order when an engine errors
+before sending audio.
+"""
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+TIERS = ("fast", "balanced", "high")
+
+
+@dataclass
+class Candidate:
+    """An engine that can serve the request (language supported, user enrolled)"""
+    name: str
+    quality: int         # Higher = better voice quality
+    wait_s: float        # Current queue wait ahead of a live request
+    saturated: bool = False
+
+
+class EngineRouter:
+    """Per (engine, language) TTFA statistics and the routing decision"""
+
+    def __init__(self, prior_ttfa_s: Dict[str, float], alpha: float = 0.2, half_life_s: float = 60.0):
+        self.prior_ttfa_s = prior_ttfa_s
+        self.alpha = alpha
+        self.half_life_s = half_life_s
+        self._lock = threading.Lock()
+        self._ttfa: Dict[Tuple[str, str], Tuple[float, float]] = {}  # (EWMA, time of last sample)
+        self._samples: Dict[Tuple[str, str], int] = {}
+        self._routed: Dict[str, int] = {}
+        self._failovers: Dict[str, int] = {}
+
+    def record(self, engine: str, language: str, ttfa_s: Optional[float]):
+        """Feed back what a routed request saw (None: no audio was sent)"""
+        if ttfa_s is None:
+            return
+        key = (engine, language)
+        now = time.monotonic()
+        with self._lock:
+            if key in self._ttfa:
+                previous = self._decayed(key, now)
+                self._ttfa[key] = (previous + self.alpha * (ttfa_s - previous), now)
+            else:
+                self._ttfa[key] = (ttfa_s, now)
+            self._samples[key] = self._samples.get(key, 0) + 1
+
+    def _decayed(self, key: Tuple[str, str], now: float) -> float:
+        """EWMA pulled back toward the prior by the time since its last sample (caller holds the lock)"""
+        prior = self.prior_ttfa_s.get(key[0], 1.0)
+        entry = self._ttfa.get(key)
+        if entry is None:
+            return prior
+        value, updated = entry
+        if self.half_life_s <= 0:
+            return value
+        weight = 0.5 ** ((now - updated) / self.half_life_s)
+        return prior + (value - prior) * weight
+
+    def ttfa(self, engine: str, language: str) -> float:
+        with self._lock:
+            return self._decayed((engine, language), time.monotonic())
+
+    def predicted_ttfa(self, candidate: Candidate, language: str) -> float:
+        return self.ttfa(candidate.name, language) + candidate.wait_s
+
+    def choose(
+        self,
+        candidates: List[Candidate],
+        language: str,
+        budget_s: float,
+        tier: str = "balanced"
+    ) -> List[str]:
+        """Engine names in the order to try them (empty: all saturated)"""
+        available = [c for c in candidates if not c.saturated]
+        predicted = {c.name: self.predicted_ttfa(c, language) for c in available}
+
+        if tier == "fast":
+            ordered = sorted(available, key=lambda c: predicted[c.name])
+        elif tier == "high":
+            ordered = sorted(available, key=lambda c: (-c.quality, predicted[c.name]))
+        else:
+            within = [c for c in available if predicted[c.name] <= budget_s]
+            over = [c for c in available if predicted[c.name] > budget_s]
+            ordered = (
+                sorted(within, key=lambda c: (-c.quality, predicted[c.name]))
+                + sorted(over, key=lambda c: predicted[c.name])
+            )
+        return [c.name for c in ordered]
+
+    def count(self, engine: str, failover: bool):
+        with self._lock:
+            counts = self._failovers if failover else self._routed
+            counts[engine] = counts.get(engine, 0) + 1
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            return {
+                "ttfa_ms": {
+                    f"{key[0]}/{key[1]}": {
+                        "ewma": round(self._decayed(key, now) * 1000, 1),
+                        "samples": self._samples[key],
+                    }
+                    for key in sorted(self._ttfa)
+                },
+                "half_life_s": self.half_life_s,
+                "prior_ttfa_ms": {k: round(v * 1000, 1) for k, v in self.prior_ttfa_s.items()},
+                "routed": dict(self._routed),
+                "failovers": dict(self._failovers),
+            }
@@ -0,0 +1,299 @@
+"""
+Priority-aware inference scheduler.
+
+All blocking model calls (MeloTTS, ToneColorConverter, DeepFilterNet,
+se_extractor) go through one scheduler in front of the inference thread pool:
+
+- Priority classes: live > batch > enrollment. A queued live job is always
+  dispatched before any batch or enrollment job.
+- Weighted fair queuing within a class: each tenant (meeting or user) gets a
+  virtual-time share and jobs are served in order of virtual finish tag, so
+  one large summary render cannot starve other meetings.
+- Deadlines: a job whose deadline passes while queued is dropped with
+  DeadlineExceeded instead of running late. PlaybackClock dates each
+  sentence of an utterance from when the client will need it.
+
+The job class is carried in a ContextVar, so request handlers set it once
+and every run() call made from that request (and the tasks it spawns)
+inherits it. Jobs run in a copy of the caller's context, so ContextVars
+(request traces) are visible inside the executor thread too; after run()
+returns, last_queue_wait holds how long the job waited.
+"""
+
+import time
+import asyncio
+import heapq
+import itertools
+import contextvars
+from concurrent.futures import Executor
+from contextvars import ContextVar
+from dataclasses import dataclass, replace
+from enum import IntEnum
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# EWMA smoothing for wait / service time estimates
+EWMA_ALPHA = 0.2
+
+
+class Priority(IntEnum):
+    """Lower value = dispatched first"""
+    LIVE = 0
+    BATCH = 1
+    ENROLLMENT = 2
+
+
+class DeadlineExceeded(Exception):
+    """Job was still queued when its deadline passed"""
+
+
+@dataclass(frozen=True)
+class JobInfo:
+    """Scheduling class of a job"""
+    priority: Priority = Priority.LIVE
+    tenant: str = "default"
+    deadline: Optional[float] = None  # time.monotonic() seconds
+    weight: float = 1.0
+
+
+current_job: ContextVar[JobInfo] = ContextVar("current_job", default=JobInfo())
+
+# Queue wait (seconds) of the caller's most recent run()
+last_queue_wait: ContextVar[float] = ContextVar("last_queue_wait", default=0.0)
+
+
+def job_with_deadline(priority: Priority, tenant: str, budget_ms: Optional[float] = None) -> JobInfo:
+    """JobInfo whose deadline is budget_ms from now (None = no deadline)"""
+    deadline = time.monotonic() + budget_ms / 1000 if budget_ms else None
+    return JobInfo(priority=priority, tenant=tenant, deadline=deadline)
+
+
+class PlaybackClock:
+    """
+    Per-sentence deadlines for one utterance.
+
+    The client plays audio in order, so a sentence is due when everything
+    sent before it has played (or when its text arrived, if later). Each
+    sentence gets the job's budget from its own due time, instead of every
+    sentence sharing the deadline of the message, which dropped the tail
+    of long paragraphs.
+    """
+
+    def __init__(self, job: JobInfo):
+        self.base = job
+        self.started = time.monotonic()
+        self.budget = job.deadline - self.started if job.deadline is not None else None
+        self.played_until = self.started  # When the client will have played all audio sent so far
+
+    def sent(self, seconds: float):
+        """Record audio sent to the client (it starts playing now if the client has run dry)"""
+        self.played_until = max(self.played_until, time.monotonic()) + seconds
+
+    def job(self, ready: Optional[float] = None, ahead_s: float = 0.0) -> JobInfo:
+        """
+        Job for the next sentence. ready: when its text arrived (default: when
+        the clock started); ahead_s: audio known to come before it, not sent yet.
+        """
+        if self.budget is None:
+            return self.base
+        due = max(self.played_until, ready if ready is not None else self.started) + ahead_s
+        return replace(self.base, deadline=due + self.budget)
+
+
+class _ClassStats:
+    """Per-priority-class counters"""
+
+    def __init__(self):
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.dropped = 0
+        self.running = 0
+        self.queued = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.wait_ewma = 0.0
+        self.service_ewma = 0.0
+
+    def record_wait(self, wait: float):
+        self.wait_total += wait
+        self.wait_max = max(self.wait_max, wait)
+        self.wait_ewma += EWMA_ALPHA * (wait - self.wait_ewma)
+
+    def record_service(self, service: float):
+        if self.service_ewma == 0.0:
+            self.service_ewma = service
+        else:
+            self.service_ewma += EWMA_ALPHA * (service - self.service_ewma)
+
+
+class InferenceScheduler:
+    """Priority + weighted-fair-queuing dispatcher over a bounded executor"""
+
+    def __init__(self, executor: Executor, slots: int):
+        self.executor = executor
+        self.slots = slots
+        self.running = 0
+
+        # Per class: heap of (finish_tag, seq, entry)
+        self._queues: Dict[Priority, List[Tuple[float, int, dict]]] = {p: [] for p in Priority}
+        self._virtual_time: Dict[Priority, float] = {p: 0.0 for p in Priority}
+        self._last_finish: Dict[Priority, Dict[str, float]] = {p: {} for p in Priority}
+        self._stats: Dict[Priority, _ClassStats] = {p: _ClassStats() for p in Priority}
+        self._seq = itertools.count()
+
+    async def run(self, fn: Callable, *args, job: Optional[JobInfo] = None, cost: float = 1.0) -> Any:
+        """Queue fn(*args) under job (default: current_job) and await its result"""
+        job = job or current_job.get()
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        # Fair queuing tags within the class (the heap is ordered by finish tag)
+        vtime = self._virtual_time[job.priority]
+        start_tag = max(vtime, self._last_finish[job.priority].get(job.tenant, 0.0))
+        finish_tag = start_tag + cost / max(job.weight, 1e-6)
+        self._last_finish[job.priority][job.tenant] = finish_tag
+
+        entry = {
+            "fn": fn,
+            "args": args,
+            "job": job,
+            "future": future,
+            "start_tag": start_tag,
+            "enqueued": time.monotonic(),
+            "wait": None,
+            "queued": True,
+            "context": contextvars.copy_context(),
+        }
+        heapq.heappush(self._queues[job.priority], (finish_tag, next(self._seq), entry))
+        stats = self._stats[job.priority]
+        stats.submitted += 1
+        stats.queued += 1
+        # Cancelled callers stay in the heap until popped; stop counting them now
+        future.add_done_callback(lambda _: self._unqueue(entry))
+
+        self._dispatch()
+        try:
+            return await future
+        finally:
+            wait = entry["wait"]
+            last_queue_wait.set(wait if wait is not None else time.monotonic() - entry["enqueued"])
+
+    def _dispatch(self):
+        """Start queued jobs while slots are free"""
+        while self.running < self.slots:
+            entry = self._pop_next()
+            if entry is None:
+                return
+            self._start(entry)
+
+    def _pop_next(self) -> Optional[dict]:
+        now = time.monotonic()
+        for priority in Priority:
+            queue = self._queues[priority]
+            while queue:
+                _, _, entry = heapq.heappop(queue)
+                self._unqueue(entry)
+                self._virtual_time[priority] = entry["start_tag"]
+                stats = self._stats[priority]
+
+                if entry["future"].done():
+                    # Caller went away (e.g. socket closed) while queued
+                    continue
+
+                deadline = entry["job"].deadline
+                if deadline is not None and now > deadline:
+                    stats.dropped += 1
+                    entry["future"].set_exception(
+                        DeadlineExceeded(f"{priority.name.lower()} job exceeded deadline in queue")
+                    )
+                    continue
+
+                entry["wait"] = now - entry["enqueued"]
+                stats.record_wait(entry["wait"])
+                return entry
+
+            # Class drained: reset its clock so idle tenants don't carry debt
+            self._virtual_time[priority] = 0.0
+            self._last_finish[priority].clear()
+        return None
+
+    def _unqueue(self, entry: dict):
+        """Entry left the queue (popped, or its caller went away while queued)"""
+        if entry["queued"]:
+            entry["queued"] = False
+            self._stats[entry["job"].priority].queued -= 1
+
+    def _start(self, entry: dict):
+        loop = asyncio.get_running_loop()
+        priority = entry["job"].priority
+        stats = self._stats[priority]
+
+        self.running += 1
+        stats.running += 1
+        started = time.monotonic()
+        task = loop.run_in_executor(self.executor, entry["context"].run, entry["fn"], *entry["args"])
+
+        def on_done(done: asyncio.Future):
+            self.running -= 1
+            stats.running -= 1
+            stats.record_service(time.monotonic() - started)
+
+            future = entry["future"]
+            if done.cancelled():
+                stats.failed += 1
+                if not future.done():
+                    future.cancel()
+            elif done.exception() is not None:
+                stats.failed += 1
+                if not future.done():
+                    future.set_exception(done.exception())
+            else:
+                stats.completed += 1
+                if not future.done():
+                    future.set_result(done.result())
+
+            self._dispatch()
+
+        task.add_done_callback(on_done)
+
+    def queue_depth(self, priority: Optional[Priority] = None) -> int:
+        """Queued (not yet running) jobs, for one class or all; cancelled ones don't count"""
+        if priority is not None:
+            return self._stats[priority].queued
+        return sum(s.queued for s in self._stats.values())
+
+    def estimated_wait(self, priority: Priority = Priority.LIVE) -> float:
+        """
+        Rough wait in seconds for a new job of this class: everything queued
+        ahead of it (its class and higher) spread across the slots.
+        """
+        ahead = 0.0
+        for p in Priority:
+            if p > priority:
+                break
+            service = self._stats[p].service_ewma
+            ahead += self._stats[p].queued * service
+        busy = self.running - self.slots + 1
+        if busy > 0:
+            ahead += busy * max(s.service_ewma for s in self._stats.values())
+        return ahead / max(self.slots, 1)
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth and wait/service times per class"""
+        classes = {}
+        for priority in Priority:
+            s = self._stats[priority]
+            started = s.completed + s.failed + s.running
+            classes[priority.name.lower()] = {
+                "queued": s.queued,
+                "running": s.running,
+                "submitted": s.submitted,
+                "completed": s.completed,
+                "failed": s.failed,
+                "dropped_deadline": s.dropped,
+                "wait_avg_ms": round(s.wait_total / started * 1000, 1) if started else 0.0,
+                "wait_ewma_ms": round(s.wait_ewma * 1000, 1),
+                "wait_max_ms": round(s.wait_max * 1000, 1),
+                "service_ewma_ms": round(s.service_ewma * 1000, 1),
+            }
+        return {"slots": self.slots, "running": self.running, "classes": classes}
@@ -0,0 +1,342 @@
+"""
+Prometheus metrics shared by both AI servers (GET /metrics).
+
+- tts_stage_seconds{stage}: per-stage latency (frontend, melotts, conversion,
+  watermark, resample, encode, send, xtts_chunk_gap, deepfilternet,
+  se_extractor, xtts_latents, xtts_queue_wait, xtts_gpt_step)
+- tts_batch_size{model}: sequences per batched forward pass
+- tts_engine_routes_total{engine, outcome}: unified server routing decisions
+  (outcome: routed | failover)
+- tts_time_to_first_audio_seconds: request start -> first audio bytes sent
+- tts_real_time_factor: synthesis wall time / audio duration per request
+- tts_queue_depth{priority}: queued inference jobs (updated on scrape; XTTS:
+  streams waiting for an inference thread or a batch decoder slot)
+- tts_active_streams: utterances being synthesized and sent (both servers)
+- tts_cache_requests_total{cache, result}: cache hits / misses
+- tts_silence_trimmed_seconds_total: base audio cut before conversion
+  (conversion / watermark / resample compute not spent)
+- tts_silence_bytes_saved_total: wire bytes saved by trimming, net of the
+  re-inserted sentence pauses (estimated at each request's bytes per second)
+- tts_model_load_seconds{model}: model load times
+- tts_device_memory_bytes{kind}: CUDA allocated / reserved (updated on scrape)
+- process_*: RSS, CPU etc. from prometheus_client's process collector. In
+  multi-process mode these describe the worker that answered the scrape
+  only (the multiprocess files can't aggregate them); use node or cgroup
+  metrics for the whole server
+
+All helpers are no-ops when prometheus_client is not installed.
+
+Per-request traces ({"trace": true} on a TTS request) reuse the same stage
+timers: RequestTimer collects them per sentence for the complete message.
+
+Multi-process serving (SERVER_WORKERS > 1, INFERENCE_ENGINE=process): set
+PROMETHEUS_MULTIPROC_DIR so every process writes to it and /metrics
+aggregates them.
+"""
+
+import os
+import time
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Optional, Tuple
+
+from loguru import logger
+
+from profiler import on_demand_profiler
+
+# ===========================================
+# Prometheus Import
+# ===========================================
+PROMETHEUS_AVAILABLE = False
+
+try:
+    from prometheus_client import (
+        CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, ProcessCollector, generate_latest,
+        multiprocess
+    )
+    PROMETHEUS_AVAILABLE = True
+except ImportError as e:
+    logger.warning(f"prometheus_client ImportError: {e}")
+except Exception as e:
+    logger.warning(f"prometheus_client import failed: {e}")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+RTF_BUCKETS = (0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 1.5, 2.0, 5.0)
+BATCH_BUCKETS = (1, 2, 3, 4, 6, 8, 12, 16, 24, 32)
+
+if PROMETHEUS_AVAILABLE:
+    STAGE_SECONDS = Histogram(
+        "tts_stage_seconds", "Latency per pipeline stage", ["stage"], buckets=LATENCY_BUCKETS
+    )
+    TTFA_SECONDS = Histogram(
+        "tts_time_to_first_audio_seconds", "Request start to first audio bytes sent", buckets=LATENCY_BUCKETS
+    )
+    REAL_TIME_FACTOR = Histogram(
+        "tts_real_time_factor", "Synthesis wall time / audio duration", buckets=RTF_BUCKETS
+    )
+    QUEUE_DEPTH = Gauge(
+        "tts_queue_depth", "Queued inference jobs", ["priority"], multiprocess_mode="livesum"
+    )
+    ACTIVE_STREAMS = Gauge(
+        "tts_active_streams", "Utterances being synthesized and sent", multiprocess_mode="livesum"
+    )
+    CACHE_REQUESTS = Counter(
+        "tts_cache_requests_total", "Cache lookups", ["cache", "result"]
+    )
+    MODEL_LOAD_SECONDS = Gauge(
+        "tts_model_load_seconds", "Model load time", ["model"], multiprocess_mode="max"
+    )
+    BATCH_SIZE = Histogram(
+        "tts_batch_size", "Sequences per batched forward pass", ["model"], buckets=BATCH_BUCKETS
+    )
+    SILENCE_TRIMMED_SECONDS = Counter(
+        "tts_silence_trimmed_seconds", "Silence trimmed from base audio before conversion"
+    )
+    SILENCE_BYTES_SAVED = Counter(
+        "tts_silence_bytes_saved", "Estimated wire bytes saved by silence trimming"
+    )
+    ENGINE_ROUTES = Counter(
+        "tts_engine_routes", "Utterances routed per engine (unified server)", ["engine", "outcome"]
+    )
+    DEVICE_MEMORY_BYTES = Gauge(
+        "tts_device_memory_bytes", "CUDA memory", ["kind"], multiprocess_mode="livesum"
+    )
+
+
+def observe_stage(stage: str, seconds: float):
+    if PROMETHEUS_AVAILABLE:
+        STAGE_SECONDS.labels(stage).observe(seconds)
+
+    # Per-request trace (context is propagated into inference threads)
+    timer = current_request.get()
+    if timer is not None:
+        timer.add_stage(stage, seconds, current_sentence.get())
+
+
+@contextmanager
+def stage_timer(stage: str):
+    """with stage_timer("melotts"): ..."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(stage, time.perf_counter() - started)
+
+
+def record_cache(cache: str, hit: bool):
+    if PROMETHEUS_AVAILABLE:
+        CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc()
+
+
+@contextmanager
+def model_load_timer(model: str):
+    """Record how long loading model took (also logged)"""
+    started = time.perf_counter()
+    yield
+    seconds = time.perf_counter() - started
+    logger.info(f"Model load: {model} in {seconds:.1f}s")
+    if PROMETHEUS_AVAILABLE:
+        MODEL_LOAD_SECONDS.labels(model).set(seconds)
+
+
+def observe_batch(model: str, size: int):
+    if PROMETHEUS_AVAILABLE:
+        BATCH_SIZE.labels(model).observe(size)
+
+
+def record_engine_route(engine: str, failover: bool = False):
+    if PROMETHEUS_AVAILABLE:
+        ENGINE_ROUTES.labels(engine, "failover" if failover else "routed").inc()
+
+
+def set_queue_depth(priority: str, depth: int):
+    if PROMETHEUS_AVAILABLE:
+        QUEUE_DEPTH.labels(priority).set(depth)
+
+
+# ===========================================
+# Per-request TTFA / RTF / trace
+# ===========================================
+class RequestTimer:
+    """
+    TTFA / RTF bookkeeping for one utterance (carried in current_request).
+
+    With trace=True it also collects per-sentence stage timings, queue
+    waits and bytes sent for the {"status": "complete"} message. Stages are
+    attributed to the sentence in current_sentence.
+    """
+
+    def __init__(self, trace: bool = False):
+        self.started = time.perf_counter()
+        self.first_audio: Optional[float] = None
+        self.audio_seconds = 0.0
+        self.bytes_sent = 0
+        self.trimmed_seconds = 0.0
+        self.gap_seconds = 0.0
+        self.finished = False
+        self.trace = trace
+        self._lock = threading.Lock()
+        self._sentences: Dict[Optional[int], Dict[str, Any]] = {}
+        on_demand_profiler.request_started()
+        if PROMETHEUS_AVAILABLE:
+            ACTIVE_STREAMS.inc()
+
+    def _sentence(self, index: Optional[int]) -> Dict[str, Any]:
+        entry = self._sentences.get(index)
+        if entry is None:
+            entry = self._sentences[index] = {
+                "stages": {}, "queue_wait_ms": 0.0, "bytes_sent": 0, "audio_ms": 0.0, "trimmed_ms": 0.0
+            }
+        return entry
+
+    def add_stage(self, stage: str, seconds: float, sentence: Optional[int] = None):
+        if not self.trace:
+            return
+        with self._lock:
+            stages = self._sentence(sentence)["stages"]
+            stages[stage] = stages.get(stage, 0.0) + seconds * 1000
+
+    def add_queue_wait(self, seconds: float, sentence: Optional[int] = None):
+        if not self.trace:
+            return
+        with self._lock:
+            self._sentence(sentence)["queue_wait_ms"] += seconds * 1000
+
+    def add_trim(self, seconds: float, sentence: Optional[int] = None):
+        with self._lock:
+            self.trimmed_seconds += seconds
+            if self.trace:
+                self._sentence(sentence)["trimmed_ms"] += seconds * 1000
+
+    def add_gap(self, seconds: float):
+        """Silence re-inserted between sentences (sent, but not converted)"""
+        with self._lock:
+            self.gap_seconds += seconds
+
+    def bytes_saved(self) -> int:
+        """Wire bytes trimming saved, at this request's average bytes per audio second"""
+        if self.audio_seconds <= 0:
+            return 0
+        net = max(0.0, self.trimmed_seconds - self.gap_seconds)
+        return int(net * self.bytes_sent / self.audio_seconds)
+
+    def on_audio(self, seconds: float, nbytes: int = 0, sentence: Optional[int] = None):
+        """Called after each audio chunk is sent"""
+        if self.first_audio is None:
+            self.first_audio = time.perf_counter() - self.started
+            if PROMETHEUS_AVAILABLE:
+                TTFA_SECONDS.observe(self.first_audio)
+        self.audio_seconds += seconds
+        self.bytes_sent += nbytes
+
+        if self.trace:
+            with self._lock:
+                entry = self._sentence(sentence)
+                entry["bytes_sent"] += nbytes
+                entry["audio_ms"] += seconds * 1000
+
+    def finish(self):
+        """End of utterance (idempotent; also called on error / cancel)"""
+        if self.finished:
+            return
+        self.finished = True
+        wall = time.perf_counter() - self.started
+        if PROMETHEUS_AVAILABLE:
+            ACTIVE_STREAMS.dec()
+            if self.audio_seconds > 0:
+                REAL_TIME_FACTOR.observe(wall / self.audio_seconds)
+                SILENCE_BYTES_SAVED.inc(self.bytes_saved())
+        on_demand_profiler.request_finished()
+
+    def to_trace(self) -> Dict[str, Any]:
+        """Trace for the complete message"""
+        with self._lock:
+            sentences = []
+            for index in sorted(i for i in self._sentences if i is not None):
+                entry = self._sentences[index]
+                sentences.append({
+                    "index": index,
+                    "stages_ms": {k: round(v, 1) for k, v in entry["stages"].items()},
+                    "queue_wait_ms": round(entry["queue_wait_ms"], 1),
+                    "bytes_sent": entry["bytes_sent"],
+                    "audio_ms": round(entry["audio_ms"], 1),
+                    "trimmed_ms": round(entry["trimmed_ms"], 1),
+                })
+            other = self._sentences.get(None, {"stages": {}, "bytes_sent": 0})
+
+            return {
+                "total_ms": round((time.perf_counter() - self.started) * 1000, 1),
+                "ttfa_ms": round(self.first_audio * 1000, 1) if self.first_audio is not None else None,
+                "audio_ms": round(self.audio_seconds * 1000, 1),
+                "bytes_sent": sum(e["bytes_sent"] for e in self._sentences.values()),
+                "trimmed_ms": round(self.trimmed_seconds * 1000, 1),
+                "bytes_saved": self.bytes_saved(),
+                "sentences": sentences,
+                "other_stages_ms": {k: round(v, 1) for k, v in other["stages"].items()},
+            }
+
+
+current_request: ContextVar[Optional[RequestTimer]] = ContextVar("current_request", default=None)
+current_sentence: ContextVar[Optional[int]] = ContextVar("current_sentence", default=None)
+
+
+def start_request(trace: bool = False) -> RequestTimer:
+    """Start timing an utterance; tasks created afterwards inherit it"""
+    timer = RequestTimer(trace)
+    current_request.set(timer)
+    return timer
+
+
+def record_audio_sent(seconds: float, nbytes: int = 0):
+    timer = current_request.get()
+    if timer is not None:
+        timer.on_audio(seconds, nbytes, current_sentence.get())
+
+
+def record_silence_trimmed(seconds: float):
+    if PROMETHEUS_AVAILABLE:
+        SILENCE_TRIMMED_SECONDS.inc(seconds)
+    timer = current_request.get()
+    if timer is not None:
+        timer.add_trim(seconds, current_sentence.get())
+
+
+def record_gap_inserted(seconds: float):
+    timer = current_request.get()
+    if timer is not None:
+        timer.add_gap(seconds)
+
+
+def record_queue_wait(seconds: float):
+    timer = current_request.get()
+    if timer is not None:
+        timer.add_queue_wait(seconds, current_sentence.get())
+
+
+# ===========================================
+# Exposition
+# ===========================================
+def _update_device_memory():
+    try:
+        import torch
+        if torch.cuda.is_available():
+            DEVICE_MEMORY_BYTES.labels("allocated").set(torch.cuda.memory_allocated())
+            DEVICE_MEMORY_BYTES.labels("reserved").set(torch.cuda.memory_reserved())
+    except Exception as e:
+        logger.debug(f"Device memory metrics unavailable: {e}")
+
+
+def render() -> Tuple[bytes, str]:
+    """Metrics in Prometheus text format: (body, content type)"""
+    if not PROMETHEUS_AVAILABLE:
+        return b"# prometheus_client not installed\n", "text/plain; charset=utf-8"
+
+    _update_device_memory()
+
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        ProcessCollector(registry=registry)  # This worker only (see process_* above)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
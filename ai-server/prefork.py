@@ -0,0 +1,138 @@
+"""
+Pre-forked multi-worker serving.
+
+The parent process loads the models once, binds the listening socket and
+forks N uvicorn workers. Model weights live in tensor storages that are
+never written after loading, so the workers share them copy-on-write and a
+CPU-only node can use all of its cores without N copies of every model.
+The kernel distributes incoming connections across the workers accepting
+on the shared socket.
+
+Usage (from a server's __main__):
+    serve_prefork(app, preload=ModelManager.load_all, port=8000, workers=4)
+
+CPU only: CUDA cannot be initialized before fork, so on a GPU node this
+falls back to a single in-process worker.
+"""
+
+import gc
+import os
+import time
+import signal
+import socket
+from typing import Callable, Dict, Optional
+
+import torch
+import uvicorn
+from loguru import logger
+
+# Minimum seconds between respawns of a crashed worker
+RESPAWN_BACKOFF_S = 1.0
+
+
+def _bind_socket(host: str, port: int, backlog: int = 2048) -> socket.socket:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _run_worker(app, sock: socket.socket, host: str, port: int, threads: int, index: int):
+    """Child process body: one uvicorn server on the inherited socket"""
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+
+    torch.set_num_threads(threads)
+    logger.info(f"Worker {index} started (pid={os.getpid()}, torch threads={threads})")
+
+    config = uvicorn.Config(app, host=host, port=port, reload=False, workers=1)
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def serve_prefork(
+    app,
+    preload: Callable[[], None],
+    host: str = "0.0.0.0",
+    port: int = 8000,
+    workers: int = 2,
+    threads_per_worker: Optional[int] = None
+):
+    """Load models via preload() in this process, then fork and supervise workers"""
+    if torch.cuda.is_available():
+        logger.warning("Pre-fork serving is CPU only (CUDA cannot be shared across fork); using 1 worker")
+        uvicorn.run(app, host=host, port=port, reload=False)
+        return
+
+    threads = threads_per_worker or max(1, (os.cpu_count() or 1) // workers)
+
+    # Keep the parent single-threaded: an OpenMP pool created before fork
+    # can deadlock the children
+    torch.set_num_threads(1)
+
+    started = time.time()
+    preload()
+    logger.info(f"Models loaded in parent in {time.time() - started:.1f}s")
+
+    sock = _bind_socket(host, port)
+
+    # Move everything allocated so far out of the GC's reach, so collections
+    # in the children don't touch (and un-share) the parent's object pages
+    gc.collect()
+    gc.freeze()
+
+    children: Dict[int, int] = {}  # pid -> worker index
+    stopping = False
+
+    def spawn(index: int):
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                _run_worker(app, sock, host, port, threads, index)
+            except Exception as e:
+                logger.error(f"Worker {index} crashed: {e}")
+                code = 1
+            finally:
+                os._exit(code)
+        children[pid] = index
+
+    def on_signal(signum, frame):
+        nonlocal stopping
+        stopping = True
+        # SIGINT (Ctrl+C) already reaches the whole process group
+        if signum == signal.SIGTERM:
+            for pid in list(children):
+                try:
+                    os.kill(pid, signal.SIGTERM)
+                except ProcessLookupError:
+                    pass
+
+    signal.signal(signal.SIGTERM, on_signal)
+    signal.signal(signal.SIGINT, on_signal)
+
+    logger.info(f"Forking {workers} workers on {host}:{port} ({threads} torch threads each)")
+    for index in range(workers):
+        spawn(index)
+
+    last_respawn = 0.0
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+
+        index = children.pop(pid, None)
+        if index is None or stopping:
+            continue
+
+        logger.warning(f"Worker {index} (pid={pid}) exited with status {status}, respawning")
+        wait = RESPAWN_BACKOFF_S - (time.time() - last_respawn)
+        if wait > 0:
+            time.sleep(wait)
+        last_respawn = time.time()
+        spawn(index)
+
+    sock.close()
+    logger.info("All workers stopped")
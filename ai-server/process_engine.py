@@ -0,0 +1,253 @@
+"""
+Process-pool inference engine (INFERENCE_ENGINE=process).
+
+On CPU nodes one process runs many small syntheses poorly: Python glue
+holds the GIL and concurrent PyTorch calls fight over one intra-op thread
+pool. This engine runs synthesis ops in a pool of worker processes, each
+with its own torch.set_num_threads budget.
+
+- Workers are spawned (not forked) and load their models in an initializer.
+- Ops are picklable callables (module-level functions / staticmethods);
+  inputs are pickled, but result waveforms come back through a shared-memory
+  ring of fixed-size slots instead of being pickled.
+- ProcessInferenceEngine.autotune() benchmarks workers x threads splits on
+  startup and keeps the fastest.
+
+The engine is blocking (call() waits for the result); callers run it on a
+thread behind the inference scheduler, which decides what runs when.
+"""
+
+import os
+import time
+import queue
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait
+from multiprocessing import shared_memory
+from typing import Any, Callable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import torch
+from loguru import logger
+
+DEFAULT_SLOT_BYTES = 16 * 1024 * 1024
+
+
+class _ShmRef(NamedTuple):
+    """Placeholder for an array written to the shared-memory ring"""
+    offset: int
+    shape: Tuple[int, ...]
+    dtype: str
+
+
+# ===========================================
+# Worker Side
+# ===========================================
+_worker_shm: Optional[shared_memory.SharedMemory] = None
+_worker_slot_bytes = 0
+_worker_threads = 0
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """Attach to the parent's block (the parent owns and unlinks it)"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13: no track flag. Spawned workers share the parent's
+        # resource tracker, so the duplicate registration is harmless
+        return shared_memory.SharedMemory(name=name)
+
+
+def _worker_init(shm_name: str, slot_bytes: int, threads: int, initializer: Optional[Callable], init_args: tuple):
+    global _worker_shm, _worker_slot_bytes, _worker_threads
+
+    torch.set_num_threads(threads)
+    _worker_threads = threads
+    _worker_shm = _attach(shm_name)
+    _worker_slot_bytes = slot_bytes
+
+    started = time.time()
+    if initializer is not None:
+        initializer(*init_args)
+    logger.info(f"Engine worker ready (pid={os.getpid()}, threads={threads}, {time.time() - started:.1f}s)")
+
+
+def _pack(value: Any, cursor: List[int], end: int) -> Any:
+    """Write arrays into the slot (while they fit), leave everything else as is"""
+    if isinstance(value, np.ndarray):
+        array = np.ascontiguousarray(value)
+        if cursor[0] + array.nbytes > end:
+            return value  # Doesn't fit: falls back to pickling
+        offset = cursor[0]
+        _worker_shm.buf[offset:offset + array.nbytes] = array.reshape(-1).view(np.uint8)
+        cursor[0] += array.nbytes
+        return _ShmRef(offset, array.shape, array.dtype.str)
+    if isinstance(value, tuple) and not isinstance(value, _ShmRef):
+        return tuple(_pack(v, cursor, end) for v in value)
+    if isinstance(value, list):
+        return [_pack(v, cursor, end) for v in value]
+    return value
+
+
+def _worker_call(fn: Callable, args: tuple, slot: int, threads: int) -> Any:
+    global _worker_threads
+
+    if threads != _worker_threads:
+        torch.set_num_threads(threads)
+        _worker_threads = threads
+
+    result = fn(*args)
+    start = slot * _worker_slot_bytes
+    return _pack(result, [start], start + _worker_slot_bytes)
+
+
+def _worker_ping(hold: float) -> int:
+    time.sleep(hold)  # Keep this worker busy so the next ping lands elsewhere
+    return os.getpid()
+
+
+# ===========================================
+# Parent Side
+# ===========================================
+class ShmRing:
+    """Fixed-size shared-memory slots handed out in ring (FIFO) order"""
+
+    def __init__(self, slots: int, slot_bytes: int):
+        self.slots = slots
+        self.slot_bytes = slot_bytes
+        self.shm = shared_memory.SharedMemory(create=True, size=slots * slot_bytes)
+        self._free: "queue.Queue[int]" = queue.Queue()
+        for slot in range(slots):
+            self._free.put(slot)
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def acquire(self) -> int:
+        return self._free.get()
+
+    def release(self, slot: int):
+        self._free.put(slot)
+
+    def unpack(self, value: Any) -> Any:
+        """Copy arrays out of the ring (the slot is reused after release)"""
+        if isinstance(value, _ShmRef):
+            count = int(np.prod(value.shape)) if value.shape else 1
+            dtype = np.dtype(value.dtype)
+            array = np.frombuffer(self.shm.buf, dtype=dtype, count=count, offset=value.offset)
+            return array.reshape(value.shape).copy()
+        if isinstance(value, tuple):
+            return tuple(self.unpack(v) for v in value)
+        if isinstance(value, list):
+            return [self.unpack(v) for v in value]
+        return value
+
+    def close(self):
+        self.shm.close()
+        self.shm.unlink()
+
+
+class ProcessInferenceEngine:
+    """Pool of spawned inference worker processes"""
+
+    def __init__(
+        self,
+        workers: int,
+        threads: int,
+        initializer: Optional[Callable] = None,
+        init_args: tuple = (),
+        slot_bytes: int = DEFAULT_SLOT_BYTES
+    ):
+        self.workers = workers
+        self.threads = threads
+        # Each in-flight call holds one slot; callers keep <= workers in flight
+        self.ring = ShmRing(workers * 2, slot_bytes)
+        self.pool = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_worker_init,
+            initargs=(self.ring.name, slot_bytes, threads, initializer, init_args)
+        )
+
+        # Spawn + load every worker now rather than on the first requests
+        started = time.time()
+        pids = {f.result() for f in [self.pool.submit(_worker_ping, 0.1) for _ in range(workers)]}
+        logger.info(
+            f"Process engine: {workers} workers x {threads} threads "
+            f"({len(pids)} up, {time.time() - started:.1f}s)"
+        )
+
+    def call(self, fn: Callable, *args, threads: Optional[int] = None) -> Any:
+        """Run fn(*args) in a worker and wait; arrays come back via shared memory"""
+        slot = self.ring.acquire()
+        try:
+            packed = self.pool.submit(_worker_call, fn, args, slot, threads or self.threads).result()
+            return self.ring.unpack(packed)
+        finally:
+            self.ring.release(slot)
+
+    def shutdown(self):
+        self.pool.shutdown(wait=True, cancel_futures=True)
+        self.ring.close()
+
+    def _benchmark(self, fn: Callable, args: tuple, workers: int, threads: int, rounds: int) -> float:
+        """Calls per second with `workers` calls in flight, each using `threads`"""
+        def run():
+            return self.call(fn, *args, threads=threads)
+
+        with ThreadPoolExecutor(max_workers=workers) as drivers:
+            # Warm-up (OpenMP pool resize, allocator)
+            wait([drivers.submit(run) for _ in range(workers)])
+
+            started = time.time()
+            for future in [drivers.submit(run) for _ in range(workers * rounds)]:
+                future.result()
+            return workers * rounds / (time.time() - started)
+
+    @classmethod
+    def autotune(
+        cls,
+        initializer: Optional[Callable],
+        init_args: tuple,
+        bench_fn: Callable,
+        bench_args: tuple,
+        max_workers: int = 4,
+        cores: Optional[int] = None,
+        rounds: int = 2,
+        slot_bytes: int = DEFAULT_SLOT_BYTES
+    ) -> "ProcessInferenceEngine":
+        """
+        Benchmark workers x threads splits of the cores on startup and return
+        an engine with the fastest one.
+
+        All candidates run in one probe pool of the largest size: a candidate
+        with w workers keeps w calls in flight, each with cores // w threads.
+        """
+        cores = cores or os.cpu_count() or 1
+        candidates = []
+        workers = 1
+        while workers <= min(max_workers, cores):
+            candidates.append((workers, max(1, cores // workers)))
+            workers *= 2
+
+        probe = cls(candidates[-1][0], candidates[-1][1], initializer, init_args, slot_bytes)
+        results = []
+        try:
+            for workers, threads in candidates:
+                rate = probe._benchmark(bench_fn, bench_args, workers, threads, rounds)
+                results.append((rate, workers, threads))
+                logger.info(f"Engine tune: {workers} workers x {threads} threads -> {rate:.2f} calls/s")
+        except Exception:
+            probe.shutdown()
+            raise
+
+        _, workers, threads = max(results)
+        logger.info(f"Engine tune: picked {workers} workers x {threads} threads")
+
+        # Largest split won: keep the probe pool instead of reloading the models
+        if workers == probe.workers:
+            probe.threads = threads
+            return probe
+
+        probe.shutdown()
+        return cls(workers, threads, initializer, init_args, slot_bytes)
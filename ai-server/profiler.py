@@ -0,0 +1,154 @@
+"""
+On-demand profiler for the next N synthesis requests.
+
+Armed through the admin endpoints (POST /admin/profile), it starts with the
+next request and stops once N requests have finished, then writes a trace
+file (GET /admin/profile/trace):
+
+- torch:  torch.profiler, exported as a Chrome trace (chrome://tracing, Perfetto)
+- sample: stdlib sampling profiler over all threads (event loop, inference
+          and frontend pools), exported as folded stacks for flamegraph.pl /
+          speedscope
+"""
+
+import os
+import sys
+import time
+import tempfile
+import threading
+from collections import Counter
+from typing import Any, Dict, Optional
+
+from loguru import logger
+
+PROFILE_MODES = ("torch", "sample")
+SAMPLE_INTERVAL_S = 0.005
+
+
+class _StackSampler(threading.Thread):
+    """Samples every thread's Python stack at a fixed interval"""
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL_S):
+        super().__init__(name="profiler-sampler", daemon=True)
+        self.interval = interval
+        self.counts: Counter = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == self.ident:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                self.counts[";".join(reversed(stack))] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+    def export(self, path: str):
+        with open(path, "w") as f:
+            for stack, count in self.counts.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class OnDemandProfiler:
+    """Profiles the next N requests (one session at a time)"""
+
+    def __init__(self, output_dir: Optional[str] = None):
+        self.output_dir = output_dir or tempfile.gettempdir()
+        self._lock = threading.Lock()
+        self.state = "idle"  # idle -> armed -> running -> done
+        self.mode: Optional[str] = None
+        self.remaining = 0
+        self.active = 0
+        self.trace_path: Optional[str] = None
+        self.started_at: Optional[float] = None
+        self._profiler: Any = None
+
+    def arm(self, requests: int, mode: str = "torch") -> Dict[str, Any]:
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unsupported profile mode: {mode}")
+        if requests < 1:
+            raise ValueError("requests must be >= 1")
+
+        with self._lock:
+            if self.state in ("armed", "running"):
+                raise RuntimeError("Profiler already armed")
+            self.state = "armed"
+            self.mode = mode
+            self.remaining = requests
+            self.active = 0
+            self.trace_path = None
+
+        logger.info(f"Profiler armed: mode={mode}, next {requests} requests")
+        return self.status()
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "mode": self.mode,
+            "remaining": self.remaining,
+            "trace_ready": self.state == "done" and self.trace_path is not None,
+        }
+
+    def request_started(self):
+        with self._lock:
+            if self.state == "armed":
+                self._start()
+                self.state = "running"
+            elif self.state != "running":
+                return
+            self.active += 1
+
+    def request_finished(self):
+        with self._lock:
+            if self.state != "running" or self.active == 0:
+                return
+            self.active -= 1
+            self.remaining -= 1
+            # Stop after the Nth request, once overlapping ones have finished too
+            if self.remaining <= 0 and self.active == 0:
+                self._stop()
+                self.state = "done"
+
+    def _start(self):
+        self.started_at = time.time()
+        if self.mode == "torch":
+            import torch
+            activities = [torch.profiler.ProfilerActivity.CPU]
+            if torch.cuda.is_available():
+                activities.append(torch.profiler.ProfilerActivity.CUDA)
+            self._profiler = torch.profiler.profile(activities=activities, record_shapes=True)
+            self._profiler.__enter__()
+        else:
+            self._profiler = _StackSampler()
+            self._profiler.start()
+
+    def _stop(self):
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        try:
+            if self.mode == "torch":
+                self._profiler.__exit__(None, None, None)
+                path = os.path.join(self.output_dir, f"tts-profile-{stamp}.json")
+                self._profiler.export_chrome_trace(path)
+            else:
+                self._profiler.stop()
+                path = os.path.join(self.output_dir, f"tts-profile-{stamp}.folded")
+                self._profiler.export(path)
+            self.trace_path = path
+            logger.info(f"Profiler trace written: {path} ({time.time() - self.started_at:.1f}s)")
+        except Exception as e:
+            logger.error(f"Profiler export failed: {e}")
+            self.trace_path = None
+        finally:
+            self._profiler = None
+
+
+on_demand_profiler = OnDemandProfiler(os.getenv("PROFILE_OUTPUT_DIR"))
@@ -1,7 +1,10 @@
 """
 AI Server for Real-time Voice Cloning using Coqui XTTS v2
 - POST /enroll/{user_id}: Voice enrollment with DeepFilterNet noise reduction
-- WebSocket /ws/tts/{user_id}: Real-time TTS streaming
+- WebSocket /ws/tts/{user_id}: Real-time TTS streaming (float32 / pcm16 / opus output)
+- GET /admin/enrolled-users: Paginated list of enrolled users
+- POST /admin/profile, GET /admin/profile[/trace]: Profile the next N requests
+- GET /metrics: Prometheus metrics (per-stage latency, TTFA, RTF, model load times)
 
 Version 1.3.0 - Simplified & Bug Fixed:
 - Fixed DeepFilterNet tensor conversion bug
@@ -10,37 +13,46 @@ Version 1.3.0 - Simplified & Bug Fixed:
 """
 
 import os
+import time
+import asyncio
+import inspect
 import tempfile
-from typing import Dict, Optional, Tuple, Any
-from contextlib import asynccontextmanager
+import threading
+import contextvars
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Tuple, Any, List, Callable, Iterator
+from contextlib import asynccontextmanager, nullcontext
 
 import torch
+import torch.nn.functional as F
 import numpy as np
-import librosa
 import soundfile as sf
-from fastapi import FastAPI, UploadFile, File, WebSocket, WebSocketDisconnect, HTTPException
+from fastapi import FastAPI, UploadFile, File, WebSocket, WebSocketDisconnect, HTTPException, Body
+from fastapi.responses import FileResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from loguru import logger
 
+from audio_codec import AudioEncoder
+from metrics import (
+    model_load_timer, observe_stage, record_cache, render as render_metrics, set_queue_depth, stage_timer,
+    start_request
+)
+from profiler import PROFILE_MODES, on_demand_profiler
+from traffic_recorder import traffic_recorder
+from tts_common import AudioProcessor as SharedAudioProcessor, DeepFilter, configure_encoder, open_encoder
+from xtts_batching import ContinuousBatchDecoder
+
 # TTS import
 from TTS.api import TTS
 
-# DeepFilterNet import
-DEEPFILTERNET_AVAILABLE = False
-df_enhance = None
-df_init_df = None
-
+# XTTS sentence splitter (used by the scheduled streaming loop; optional across TTS versions)
 try:
-    from df import enhance as df_enhance, init_df as df_init_df
-    DEEPFILTERNET_AVAILABLE = True
-    logger.info("DeepFilterNet imported successfully!")
+    from TTS.tts.layers.xtts.tokenizer import split_sentence as xtts_split_sentence
 except ImportError as e:
-    logger.warning(f"DeepFilterNet ImportError: {e}")
-except OSError as e:
-    logger.warning(f"DeepFilterNet OSError (missing system library?): {e}")
-except Exception as e:
-    logger.warning(f"DeepFilterNet import failed with {type(e).__name__}: {e}")
+    xtts_split_sentence = None
+    logger.warning(f"XTTS split_sentence unavailable, text splitting disabled for chunk schedules: {e}")
 
 # ===========================================
 # Configuration
@@ -48,153 +60,651 @@ except Exception as e:
 MODEL_NAME = "tts_models/multilingual/multi-dataset/xtts_v2"
 DEVICE = "cuda" if torch.cuda.is_available() else "cpu"
 SAMPLE_RATE_XTTS = 24000  # XTTS v2 native sample rate
-SAMPLE_RATE_DF = 48000    # DeepFilterNet requires 48kHz
+
+# Pre-forked serving: model loads once in the parent, workers share it copy-on-write (CPU only)
+SERVER_WORKERS = int(os.getenv("SERVER_WORKERS", "1"))
+SERVER_THREADS_PER_WORKER = int(os.getenv("SERVER_THREADS_PER_WORKER", "0"))  # 0 = cores / workers
+
+# XTTS inference_stream generators run on these threads (one stream per thread at a time).
+# Without batching, streams still decode one sentence at a time (xtts_gpt_lock):
+# compute_embeddings keeps the conditioning prefix on the shared GPT model.
+XTTS_STREAM_WORKERS = int(os.getenv("XTTS_STREAM_WORKERS", "1"))
+
+# Continuous batching (default): one decoder thread runs the GPT steps of all active streams
+# together, each with its own prefix, so concurrent streams don't wait for each other
+XTTS_BATCH_DECODE = os.getenv("XTTS_BATCH_DECODE", "1") == "1"
+XTTS_BATCH_MAX = int(os.getenv("XTTS_BATCH_MAX", "8"))
+
+# Stream chunk schedule (GPT tokens per chunk): small first chunk for TTFA, then larger ones
+# Per request: {"chunk_schedule": [8, 16, 32]} or {"stream_chunk_size": 20} (fixed)
+XTTS_CHUNK_SCHEDULE = os.getenv("XTTS_CHUNK_SCHEDULE", "8,16,32")
+XTTS_MAX_CHUNK_TOKENS = 200
+XTTS_MAX_SCHEDULE_STEPS = 8
+XTTS_OVERLAP_WAV_LEN = 1024  # Crossfade between decoded chunks (XTTS default)
+
+# Persistent speaker latents: one file per user, loaded on first use into a bounded LRU
+LATENTS_DIR = os.getenv("LATENTS_DIR", os.path.join(os.path.dirname(__file__), "user_latents"))
+LATENTS_FP16 = os.getenv("LATENTS_FP16", "1") == "1"            # Store half precision (half the size)
+LATENTS_CACHE_SIZE = int(os.getenv("LATENTS_CACHE_SIZE", "512"))
+LATENTS_WARMUP_USERS = int(os.getenv("LATENTS_WARMUP_USERS", "128"))  # Most recently active, on boot
+LATENTS_WARMUP_DAYS = float(os.getenv("LATENTS_WARMUP_DAYS", "7"))
+LATENTS_TOUCH_INTERVAL_S = 3600  # How often use refreshes a file's atime (activity marker)
+
+os.makedirs(LATENTS_DIR, exist_ok=True)
 
 # ===========================================
 # Global Storage
 # ===========================================
 tts_model: Optional[TTS] = None
-user_latents: Dict[str, dict] = {}
 
-# DeepFilterNet global state
-df_model: Optional[Any] = None
-df_state: Optional[Any] = None
+# LRU of loaded speaker latents (LatentStore): user_id -> {"gpt_cond_latent", "speaker_embedding"}
+user_latents: "OrderedDict[str, dict]" = OrderedDict()
+user_latents_lock = threading.Lock()
+latents_mtime: Dict[str, int] = {}  # user_id -> st_mtime_ns of the file the cached latents came from
+latents_touched: Dict[str, float] = {}
+
+# Inference threads for streaming synthesis (keeps GPT / decoder steps off the event loop)
+# With batching each stream's thread only waits for tokens and runs HiFi-GAN, so allow a full batch
+xtts_executor = ThreadPoolExecutor(
+    max_workers=max(XTTS_STREAM_WORKERS, XTTS_BATCH_MAX) if XTTS_BATCH_DECODE else XTTS_STREAM_WORKERS,
+    thread_name_prefix="xtts"
+)
+
+# Batched GPT decoder (XTTS_BATCH_DECODE=1), started per serving process
+batch_decoder: Optional[ContinuousBatchDecoder] = None
+
+# Per-stream GPT decoding (no batch_decoder): one sentence at a time, as the prefix lives on the model
+xtts_gpt_lock = threading.Lock()
 
 
 # ===========================================
 # Audio Processing Utilities
 # ===========================================
-class AudioProcessor:
-    """Audio processing for enrollment"""
+class AudioProcessor(SharedAudioProcessor):
+    """Audio processing for enrollment (output at the XTTS rate)"""
 
     @staticmethod
-    def resample_audio(
-        audio: np.ndarray,
-        orig_sr: int,
-        target_sr: int
-    ) -> np.ndarray:
-        """Resample audio using librosa with high quality"""
-        if orig_sr == target_sr:
-            return audio
-
-        logger.debug(f"Resampling {orig_sr}Hz -> {target_sr}Hz")
-        return librosa.resample(
-            audio,
-            orig_sr=orig_sr,
-            target_sr=target_sr,
-            res_type="kaiser_best"
-        )
+    def enhance_with_deepfilter(audio: np.ndarray, sample_rate: int) -> Tuple[np.ndarray, int]:
+        """DeepFilterNet noise reduction (tts_common), resampled to 24kHz for XTTS"""
+        enhanced, enhanced_sr = SharedAudioProcessor.enhance_with_deepfilter(audio, sample_rate)
+        enhanced = AudioProcessor.resample_audio(enhanced, enhanced_sr, SAMPLE_RATE_XTTS)
+        return enhanced.astype(np.float32), SAMPLE_RATE_XTTS
+
+
+# ===========================================
+# Speaker Latent Store
+# ===========================================
+class LatentStore:
+    """
+    XTTS speaker latents persisted under LATENTS_DIR ({user_id}.pth).
+
+    Latents are written at enrollment (fp16 with LATENTS_FP16) and loaded
+    lazily into the user_latents LRU, so a restart or deploy does not need
+    re-enrollment. Pre-forked workers share the directory: each get() stats
+    the file, and cached latents are only served while its mtime is the one
+    they were loaded from (a re-enrollment or delete by another worker is a
+    miss). File atime marks recent activity for the boot warm-up.
+    """
 
     @staticmethod
-    def enhance_with_deepfilter(
-        audio: np.ndarray,
-        sample_rate: int
-    ) -> Tuple[np.ndarray, int]:
-        """
-        Apply DeepFilterNet noise reduction.
-
-        Pipeline:
-        1. Convert to torch.Tensor (FIXED: DeepFilterNet expects Tensor)
-        2. Resample to 48kHz
-        3. Apply DeepFilterNet
-        4. Resample back to 24kHz
-        5. Convert back to numpy
-        """
-        global df_model, df_state
-
-        if not DEEPFILTERNET_AVAILABLE or df_model is None:
-            logger.warning("DeepFilterNet not available, returning raw audio")
-            if sample_rate != SAMPLE_RATE_XTTS:
-                audio = AudioProcessor.resample_audio(audio, sample_rate, SAMPLE_RATE_XTTS)
-            return audio.astype(np.float32), SAMPLE_RATE_XTTS
+    def _path(user_id: str) -> str:
+        return os.path.join(LATENTS_DIR, f"{user_id}.pth")
 
+    @staticmethod
+    def _remember(user_id: str, latents: dict, mtime_ns: int):
+        with user_latents_lock:
+            user_latents[user_id] = latents
+            user_latents.move_to_end(user_id)
+            latents_mtime[user_id] = mtime_ns
+            while len(user_latents) > LATENTS_CACHE_SIZE:
+                evicted, _ = user_latents.popitem(last=False)
+                latents_mtime.pop(evicted, None)
+
+    @staticmethod
+    def _forget(user_id: str) -> bool:
+        with user_latents_lock:
+            latents_mtime.pop(user_id, None)
+            return user_latents.pop(user_id, None) is not None
+
+    @staticmethod
+    def _touch(user_id: str, path: str, mtime_ns: int):
+        """Refresh the activity marker (atime, at most once per LATENTS_TOUCH_INTERVAL_S); mtime is kept"""
+        now = time.time()
+        if now - latents_touched.get(user_id, 0.0) < LATENTS_TOUCH_INTERVAL_S:
+            return
+        latents_touched[user_id] = now
         try:
-            # Ensure float32 numpy array
-            audio = audio.astype(np.float32)
+            os.utime(path, ns=(time.time_ns(), mtime_ns))
+        except OSError:
+            pass
 
-            # Resample to 48kHz for DeepFilterNet
-            if sample_rate != SAMPLE_RATE_DF:
-                audio_48k = AudioProcessor.resample_audio(audio, sample_rate, SAMPLE_RATE_DF)
-            else:
-                audio_48k = audio
+    @staticmethod
+    def _load(path: str) -> dict:
+        data = torch.load(path, map_location=DEVICE)
+        return {
+            "gpt_cond_latent": data["gpt_cond_latent"].float(),
+            "speaker_embedding": data["speaker_embedding"].float(),
+        }
+
+    @staticmethod
+    def put(user_id: str, gpt_cond_latent: torch.Tensor, speaker_embedding: torch.Tensor):
+        """Persist latents (atomic replace) and cache them"""
+        dtype = torch.float16 if LATENTS_FP16 else torch.float32
+        path = LatentStore._path(user_id)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        torch.save({
+            "gpt_cond_latent": gpt_cond_latent.detach().cpu().to(dtype),
+            "speaker_embedding": speaker_embedding.detach().cpu().to(dtype),
+        }, tmp_path)
+        os.replace(tmp_path, path)
+        latents_touched[user_id] = time.time()
+
+        LatentStore._remember(user_id, {
+            "gpt_cond_latent": gpt_cond_latent,
+            "speaker_embedding": speaker_embedding,
+        }, os.stat(path).st_mtime_ns)
+
+    @staticmethod
+    def get(user_id: str) -> Optional[dict]:
+        """Latents from the LRU (if the file is unchanged), else from disk; None if not enrolled"""
+        path = LatentStore._path(user_id)
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except OSError:
+            mtime_ns = None
+
+        with user_latents_lock:
+            latents = user_latents.get(user_id)
+            if latents is not None and latents_mtime.get(user_id) != mtime_ns:
+                # Deleted, or re-enrolled by another worker
+                user_latents.pop(user_id)
+                latents_mtime.pop(user_id, None)
+                latents = None
+            elif latents is not None:
+                user_latents.move_to_end(user_id)
+        record_cache("latents_memory", latents is not None)
+        if latents is not None:
+            LatentStore._touch(user_id, path, mtime_ns)
+            return latents
+
+        hit = mtime_ns is not None
+        record_cache("latents_disk", hit)
+        if not hit:
+            return None
+        try:
+            latents = LatentStore._load(path)
+        except Exception as e:
+            logger.error(f"Failed to load latents for {user_id}: {e}")
+            return None
 
-            # FIXED: Convert to torch.Tensor for DeepFilterNet
-            audio_tensor = torch.from_numpy(audio_48k).unsqueeze(0)  # [1, samples]
+        # A replace between stat and load only costs a reload on the next get()
+        LatentStore._remember(user_id, latents, mtime_ns)
+        LatentStore._touch(user_id, path, mtime_ns)
+        logger.info(f"Loaded latents from disk: {user_id}")
+        return latents
 
-            # Apply DeepFilterNet
-            logger.debug("Applying DeepFilterNet...")
-            enhanced_tensor = df_enhance(df_model, df_state, audio_tensor)
+    @staticmethod
+    def delete(user_id: str) -> bool:
+        cached = LatentStore._forget(user_id)
+        latents_touched.pop(user_id, None)
+        path = LatentStore._path(user_id)
+        if os.path.exists(path):
+            os.unlink(path)
+            return True
+        return cached
 
-            # Convert back to numpy
-            if isinstance(enhanced_tensor, torch.Tensor):
-                enhanced_48k = enhanced_tensor.squeeze().numpy()
-            else:
-                enhanced_48k = np.array(enhanced_tensor)
+    @staticmethod
+    def list_users() -> List[str]:
+        return sorted(name[:-4] for name in os.listdir(LATENTS_DIR) if name.endswith(".pth"))
 
-            # Resample to XTTS rate (24kHz)
-            if SAMPLE_RATE_DF != SAMPLE_RATE_XTTS:
-                enhanced = AudioProcessor.resample_audio(enhanced_48k, SAMPLE_RATE_DF, SAMPLE_RATE_XTTS)
-            else:
-                enhanced = enhanced_48k
+    @staticmethod
+    def warm_up(max_users: int = LATENTS_WARMUP_USERS, max_age_days: float = LATENTS_WARMUP_DAYS) -> int:
+        """Load the most recently active users' latents (boot, before serving)"""
+        cutoff = time.time() - max_age_days * 86400
+        candidates = []
+        for name in os.listdir(LATENTS_DIR):
+            if not name.endswith(".pth"):
+                continue
+            try:
+                st = os.stat(os.path.join(LATENTS_DIR, name))
+            except OSError:
+                continue
+            if st.st_atime >= cutoff:
+                candidates.append((st.st_atime, name[:-4], st.st_mtime_ns))
+
+        candidates.sort(reverse=True)
+        loaded = 0
+        # Load least recent first so the most recent end up at the LRU's hot end
+        for _, user_id, mtime_ns in reversed(candidates[:min(max_users, LATENTS_CACHE_SIZE)]):
+            try:
+                LatentStore._remember(user_id, LatentStore._load(LatentStore._path(user_id)), mtime_ns)
+                loaded += 1
+            except Exception as e:
+                logger.warning(f"Latent warm-up skipped {user_id}: {e}")
+
+        logger.info(f"Latent warm-up: {loaded} users (of {len(candidates)} active in {max_age_days:g} days)")
+        return loaded
+
+
+# ===========================================
+# Streaming Bridge
+# ===========================================
+class StreamBridge:
+    """
+    Runs a blocking chunk generator (XTTS inference_stream) on xtts_executor
+    and hands the chunks to the event loop through an asyncio queue.
+
+        bridge = StreamBridge(lambda: model.inference_stream(...))
+        try:
+            async for audio in bridge:
+                await websocket.send_bytes(...)
+        finally:
+            bridge.cancel()
+
+    cancel() (client gone, task cancelled) stops the generator before its
+    next step and closes it in the inference thread.
+
+    waiting counts bridges whose generator has not started yet (no free
+    inference thread), for the queue-depth gauge.
+    """
+
+    _DONE = object()
+    waiting = 0
+    _waiting_lock = threading.Lock()
+
+    def __init__(self, make_chunks: Callable[[], Iterator[torch.Tensor]]):
+        self.make_chunks = make_chunks
+        self.cancelled = threading.Event()
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.loop = asyncio.get_running_loop()
+        self.submitted = time.perf_counter()
+        with StreamBridge._waiting_lock:
+            StreamBridge.waiting += 1
 
-            logger.info("DeepFilterNet enhancement successful!")
-            return enhanced.astype(np.float32), SAMPLE_RATE_XTTS
+        # Stage timers inside the thread still count toward the current request
+        context = contextvars.copy_context()
+        self.future = self.loop.run_in_executor(xtts_executor, context.run, self._produce)
 
+    def _put(self, item: Any):
+        try:
+            self.loop.call_soon_threadsafe(self.queue.put_nowait, item)
+        except RuntimeError:
+            # Event loop closed (shutdown)
+            self.cancelled.set()
+
+    def _produce(self):
+        """Inference thread: drive the generator until done or cancelled"""
+        observe_stage("xtts_queue_wait", time.perf_counter() - self.submitted)
+        with StreamBridge._waiting_lock:
+            StreamBridge.waiting -= 1
+        chunks = None
+        try:
+            if self.cancelled.is_set():
+                return
+            chunks = self.make_chunks()
+
+            # Chunk gap = time the generator took to produce the next chunk
+            last_chunk = time.perf_counter()
+            for chunk in chunks:
+                observe_stage("xtts_chunk_gap", time.perf_counter() - last_chunk)
+                if self.cancelled.is_set():
+                    break
+                if chunk is not None:
+                    self._put(chunk.cpu().numpy())
+                last_chunk = time.perf_counter()
         except Exception as e:
-            logger.error(f"DeepFilterNet enhancement failed: {e}. Using raw audio.")
-            # Fallback: just resample
-            if sample_rate != SAMPLE_RATE_XTTS:
-                audio = AudioProcessor.resample_audio(audio, sample_rate, SAMPLE_RATE_XTTS)
-            return audio.astype(np.float32), SAMPLE_RATE_XTTS
+            self._put(e)
+        finally:
+            if chunks is not None and hasattr(chunks, "close"):
+                chunks.close()
+            self._put(self._DONE)
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def __aiter__(self) -> "StreamBridge":
+        return self
+
+    async def __anext__(self) -> np.ndarray:
+        item = await self.queue.get()
+        if item is self._DONE:
+            raise StopAsyncIteration
+        if isinstance(item, Exception):
+            raise item
+        return item
+
+
+# ===========================================
+# Chunk Schedule
+# ===========================================
+class ChunkSchedule:
+    """
+    XTTS streaming with a variable chunk size.
+
+    Reimplements Xtts.inference_stream, emitting chunk i after schedule[i]
+    GPT tokens (the last size repeats). A small first chunk gets audio out
+    early; larger later chunks amortize the HiFi-GAN pass, which re-decodes
+    all latents of the sentence on every chunk. The schedule continues across
+    split sentences, so only the utterance's first chunk is small. With
+    XTTS_BATCH_DECODE the GPT steps come from the shared ContinuousBatchDecoder;
+    otherwise each sentence holds xtts_gpt_lock while it decodes.
+    """
 
     @staticmethod
-    def load_audio(file_path: str) -> Tuple[np.ndarray, int]:
-        """Load audio file"""
+    def parse(value: Any) -> Tuple[int, ...]:
+        """[8, 16, 32], "8,16,32" or 20 -> (8, 16, 32); ValueError if invalid"""
+        if isinstance(value, str):
+            items = [v for v in value.split(",") if v.strip()]
+        elif isinstance(value, (list, tuple)):
+            items = list(value)
+        else:
+            items = [value]
+
         try:
-            audio, sr = librosa.load(file_path, sr=None, mono=True)
-            return audio.astype(np.float32), sr
-        except Exception as e:
-            logger.error(f"Failed to load audio: {e}")
-            raise
+            schedule = tuple(int(v) for v in items)
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid chunk schedule: {value!r}")
+
+        if not schedule or len(schedule) > XTTS_MAX_SCHEDULE_STEPS:
+            raise ValueError(f"Chunk schedule must have 1-{XTTS_MAX_SCHEDULE_STEPS} entries")
+        if any(size < 1 or size > XTTS_MAX_CHUNK_TOKENS for size in schedule):
+            raise ValueError(f"Chunk sizes must be 1-{XTTS_MAX_CHUNK_TOKENS} tokens")
+        return schedule
+
+    @staticmethod
+    def from_request(data: dict) -> Tuple[int, ...]:
+        if data.get("chunk_schedule") is not None:
+            return ChunkSchedule.parse(data["chunk_schedule"])
+        if data.get("stream_chunk_size") is not None:
+            return ChunkSchedule.parse(data["stream_chunk_size"])
+        return ChunkSchedule.parse(XTTS_CHUNK_SCHEDULE)
+
+    @staticmethod
+    def _sizes(schedule: Tuple[int, ...]) -> Iterator[int]:
+        yield from schedule
+        while True:
+            yield schedule[-1]
+
+    @staticmethod
+    def _generation_params(model) -> Dict[str, Any]:
+        """XTTS's own inference_stream defaults (temperature, top_k, top_p, ...)"""
+        signature = inspect.signature(model.inference_stream)
+        return {
+            name: param.default for name, param in signature.parameters.items()
+            if param.default is not inspect.Parameter.empty
+        }
+
+    @staticmethod
+    def inference_stream(
+        model,
+        text: str,
+        language: str,
+        gpt_cond_latent: torch.Tensor,
+        speaker_embedding: torch.Tensor,
+        schedule: Tuple[int, ...],
+        enable_text_splitting: bool = True
+    ) -> Iterator[torch.Tensor]:
+        """Drop-in for model.inference_stream with a chunk schedule"""
+        if not hasattr(model, "gpt") or not hasattr(model, "hifigan_decoder"):
+            # Model without the expected internals: fixed chunks of the first size
+            with xtts_gpt_lock:
+                yield from model.inference_stream(
+                    text=text,
+                    language=language,
+                    gpt_cond_latent=gpt_cond_latent,
+                    speaker_embedding=speaker_embedding,
+                    stream_chunk_size=schedule[0],
+                    enable_text_splitting=enable_text_splitting
+                )
+            return
+
+        params = ChunkSchedule._generation_params(model)
+        length_scale = 1.0 / max(params.get("speed", 1.0), 0.05)
+        language = language.split("-")[0]  # Remove the country code
+        gpt_cond_latent = gpt_cond_latent.to(model.device)
+        speaker_embedding = speaker_embedding.to(model.device)
+
+        if enable_text_splitting and xtts_split_sentence is not None:
+            sentences = xtts_split_sentence(text, language, model.tokenizer.char_limits[language])
+        else:
+            sentences = [text]
+
+        sizes = ChunkSchedule._sizes(schedule)
+        target = next(sizes)
+
+        with torch.inference_mode():
+            for sentence in sentences:
+                sentence = sentence.strip().lower()
+                text_tokens = torch.IntTensor(model.tokenizer.encode(sentence, lang=language)).unsqueeze(0)
+                text_tokens = text_tokens.to(model.device)
+                if text_tokens.shape[-1] >= model.args.gpt_max_text_tokens:
+                    raise ValueError(f"XTTS text limit is {model.args.gpt_max_text_tokens} tokens per sentence")
+
+                sampling = dict(
+                    top_k=params.get("top_k", 50),
+                    top_p=params.get("top_p", 0.85),
+                    temperature=params.get("temperature", 0.75),
+                    do_sample=params.get("do_sample", True),
+                    repetition_penalty=float(params.get("repetition_penalty", 10.0)),
+                )
+                # Per-stream decoding writes the prefix into the shared GPT: one sentence at a time
+                with nullcontext() if batch_decoder is not None else xtts_gpt_lock:
+                    if batch_decoder is not None:
+                        # GPT steps are shared with the other active streams
+                        gpt_generator = batch_decoder.generate(gpt_cond_latent, text_tokens, **sampling)
+                    else:
+                        fake_inputs = model.gpt.compute_embeddings(gpt_cond_latent, text_tokens)
+                        gpt_generator = model.gpt.get_generator(
+                            fake_inputs=fake_inputs,
+                            num_beams=1,
+                            num_return_sequences=1,
+                            length_penalty=float(params.get("length_penalty", 1.0)),
+                            output_attentions=False,
+                            output_hidden_states=True,
+                            **sampling
+                        )
+
+                    pending = 0
+                    all_latents = []
+                    wav_gen_prev = None
+                    wav_overlap = None
+                    is_end = False
+
+                    try:
+                        while not is_end:
+                            try:
+                                _, latent = next(gpt_generator)
+                                all_latents.append(latent)
+                                pending += 1
+                            except StopIteration:
+                                is_end = True
+
+                            if not all_latents or not (is_end or pending >= target):
+                                continue
+
+                            gpt_latents = torch.cat(all_latents, dim=0)[None, :]
+                            if length_scale != 1.0:
+                                gpt_latents = F.interpolate(
+                                    gpt_latents.transpose(1, 2), scale_factor=length_scale, mode="linear"
+                                ).transpose(1, 2)
+                            wav_gen = model.hifigan_decoder(gpt_latents, g=speaker_embedding)
+                            wav_chunk, wav_gen_prev, wav_overlap = model.handle_chunks(
+                                wav_gen.squeeze(), wav_gen_prev, wav_overlap, XTTS_OVERLAP_WAV_LEN
+                            )
+                            pending = 0
+                            target = next(sizes)
+                            yield wav_chunk
+                    finally:
+                        # Stream cancelled mid-sentence: release the sequence's batch slot
+                        gpt_generator.close()
+
+
+# ===========================================
+# Enrollment / Streaming
+# ===========================================
+def enroll_audio(user_id: str, raw_audio: np.ndarray, orig_sr: int) -> bool:
+    """
+    DeepFilterNet (if available) + speaker latent extraction for decoded audio (blocking).
+    Returns whether DeepFilterNet was applied.
+    """
+    enhanced_audio_path = None
+    try:
+        # Apply DeepFilterNet if available
+        if DeepFilter.loaded():
+            logger.info("Applying DeepFilterNet noise reduction...")
+            processed_audio, processed_sr = AudioProcessor.enhance_with_deepfilter(raw_audio, orig_sr)
+            enhanced_applied = True
+        else:
+            # Just resample
+            if orig_sr != SAMPLE_RATE_XTTS:
+                processed_audio = AudioProcessor.resample_audio(raw_audio, orig_sr, SAMPLE_RATE_XTTS)
+            else:
+                processed_audio = raw_audio
+            processed_sr = SAMPLE_RATE_XTTS
+            enhanced_applied = False
+
+        logger.info(f"Processed audio: {len(processed_audio)} samples @ {processed_sr}Hz")
+
+        # Save for XTTS
+        with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as f:
+            sf.write(f.name, processed_audio, processed_sr)
+            enhanced_audio_path = f.name
+
+        # Extract speaker latents
+        logger.info("Extracting speaker latents...")
+        synthesizer = tts_model.synthesizer
+        with stage_timer("xtts_latents"):
+            gpt_cond_latent, speaker_embedding = synthesizer.tts_model.get_conditioning_latents(
+                audio_path=enhanced_audio_path
+            )
+
+        LatentStore.put(user_id, gpt_cond_latent, speaker_embedding)
+        return enhanced_applied
+
+    finally:
+        if enhanced_audio_path and os.path.exists(enhanced_audio_path):
+            os.unlink(enhanced_audio_path)
+
+
+async def stream_utterance(
+    websocket: WebSocket,
+    encoder: AudioEncoder,
+    latents: Dict[str, torch.Tensor],
+    text: str,
+    language: str,
+    schedule: Tuple[int, ...],
+    trace: bool = False
+):
+    """Synthesize one utterance and send it (audio chunks, then {"status": "complete"})"""
+    timer = start_request(trace)
+    bridge = None
+    try:
+        synthesizer = tts_model.synthesizer
+
+        # Use XTTS with DEFAULT sampling parameters
+        # The Coqui team has already tuned these well
+        # The generator runs on an inference thread; this coroutine only awaits and sends
+        bridge = StreamBridge(lambda: ChunkSchedule.inference_stream(
+            synthesizer.tts_model,
+            text=text,
+            language=language,
+            gpt_cond_latent=latents["gpt_cond_latent"],
+            speaker_embedding=latents["speaker_embedding"],
+            schedule=schedule,
+            enable_text_splitting=True
+        ))
+
+        # Send audio chunks in the negotiated format - no post-processing
+        async for audio in bridge:
+            with stage_timer("encode"):
+                audio_bytes = encoder.encode(audio)
+            if audio_bytes:
+                with stage_timer("send"):
+                    await websocket.send_bytes(audio_bytes)
+            timer.on_audio(len(audio) / SAMPLE_RATE_XTTS, len(audio_bytes))
+
+        tail = encoder.flush()
+        if tail:
+            await websocket.send_bytes(tail)
+
+        timer.finish()
+        complete = {"status": "complete"}
+        if timer.trace:
+            complete["trace"] = timer.to_trace()
+        await websocket.send_json(complete)
+
+    except Exception:
+        # The connection stays open: don't carry this utterance's buffered samples into the next
+        encoder.reset()
+        raise
+
+    finally:
+        # Stops the generator if the client went away mid-utterance
+        if bridge is not None:
+            bridge.cancel()
+        timer.finish()
 
 
 # ===========================================
 # Lifespan
 # ===========================================
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    """Load models on startup"""
-    global tts_model, df_model, df_state
+def start_batch_decoder():
+    """Start the batched GPT decoder (per process: threads do not survive pre-fork)"""
+    global batch_decoder
+
+    model = tts_model.synthesizer.tts_model
+    if not ContinuousBatchDecoder.supports(model):
+        logger.warning("XTTS model lacks the GPT internals for batching, using per-stream decoding")
+        return
+    batch_decoder = ContinuousBatchDecoder(model.gpt, XTTS_BATCH_MAX)
 
-    logger.info("=" * 50)
-    logger.info("EUM AI Server v1.3.0 (Simplified)")
-    logger.info(f"Device: {DEVICE}")
-    logger.info("=" * 50)
+
+def load_models():
+    """Load XTTS v2 and DeepFilterNet (pre-fork parent or lifespan)"""
+    global tts_model
+
+    ChunkSchedule.parse(XTTS_CHUNK_SCHEDULE)  # Fail fast on a bad default schedule
 
     # Load XTTS v2
     logger.info(f"Loading XTTS v2 model...")
     try:
-        tts_model = TTS(MODEL_NAME).to(DEVICE)
+        with model_load_timer("xtts"):
+            tts_model = TTS(MODEL_NAME).to(DEVICE)
         logger.info("XTTS v2 loaded!")
     except Exception as e:
         logger.error(f"Failed to load TTS: {e}")
         raise
 
-    # Load DeepFilterNet
-    if DEEPFILTERNET_AVAILABLE:
-        logger.info("Loading DeepFilterNet...")
-        try:
-            df_model, df_state, _ = df_init_df()
-            logger.info("DeepFilterNet loaded!")
-        except Exception as e:
-            logger.warning(f"DeepFilterNet load failed: {e}")
-            df_model = None
-            df_state = None
+    # Load DeepFilterNet (shared with the other engine in the unified server)
+    DeepFilter.load()
+
+    # Recently active speakers, so a deploy does not start with a cold cache
+    with model_load_timer("latents_warmup"):
+        LatentStore.warm_up()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Load models on startup"""
+    logger.info("=" * 50)
+    logger.info("EUM AI Server v1.3.0 (Simplified)")
+    logger.info(f"Device: {DEVICE}")
+    logger.info("=" * 50)
+
+    # Model may already be loaded by the pre-fork parent (SERVER_WORKERS > 1)
+    if tts_model is None:
+        load_models()
+
+    if XTTS_BATCH_DECODE:
+        start_batch_decoder()
 
     yield
 
     # Cleanup
     logger.info("Shutting down...")
+    if batch_decoder is not None:
+        batch_decoder.stop()
+    xtts_executor.shutdown(wait=False, cancel_futures=True)
     torch.cuda.empty_cache()
 
 
@@ -235,9 +745,26 @@ async def health_check():
     return {
         "status": "healthy",
         "model_loaded": tts_model is not None,
-        "deepfilternet_loaded": df_model is not None,
+        "deepfilternet_loaded": DeepFilter.loaded(),
         "device": DEVICE,
-        "enrolled_users": list(user_latents.keys())
+        "chunk_schedule": XTTS_CHUNK_SCHEDULE,
+        "batch_decoder": batch_decoder.stats() if batch_decoder is not None else None,
+        "latents_cached": len(user_latents)  # Enrolled total: /admin/enrolled-users (scans LATENTS_DIR)
+    }
+
+
+@app.get("/admin/enrolled-users")
+async def list_enrolled_users(offset: int = 0, limit: int = 100):
+    """Paginated list of enrolled users (moved out of /health)"""
+    limit = max(1, min(limit, 1000))
+    offset = max(0, offset)
+    user_ids = LatentStore.list_users()
+    page = user_ids[offset:offset + limit]
+    return {
+        "total": len(user_ids),
+        "offset": offset,
+        "limit": limit,
+        "users": [{"user_id": uid, "cached": uid in user_latents} for uid in page]
     }
 
 
@@ -249,55 +776,13 @@ async def enroll_voice(user_id: str, audio: UploadFile = File(...)):
 
     logger.info(f"Enrolling voice for user: {user_id}")
 
-    temp_audio_path = None
-    enhanced_audio_path = None
-    enhanced_applied = False
-
     try:
-        # Save uploaded audio
-        suffix = os.path.splitext(audio.filename)[1] if audio.filename else ".wav"
-        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as f:
-            content = await audio.read()
-            f.write(content)
-            temp_audio_path = f.name
-
-        # Load audio
-        logger.info(f"Loading audio from: {temp_audio_path}")
-        raw_audio, orig_sr = AudioProcessor.load_audio(temp_audio_path)
+        # Decoding, DeepFilterNet and latent extraction run on threads: active streams keep flowing
+        raw_audio, orig_sr = await asyncio.to_thread(AudioProcessor.load_upload, await audio.read(), audio.filename)
         duration = len(raw_audio) / orig_sr
         logger.info(f"Loaded audio: {len(raw_audio)} samples @ {orig_sr}Hz ({duration:.2f}s)")
 
-        # Apply DeepFilterNet if available
-        if df_model is not None:
-            logger.info("Applying DeepFilterNet noise reduction...")
-            processed_audio, processed_sr = AudioProcessor.enhance_with_deepfilter(raw_audio, orig_sr)
-            enhanced_applied = True
-        else:
-            # Just resample
-            if orig_sr != SAMPLE_RATE_XTTS:
-                processed_audio = AudioProcessor.resample_audio(raw_audio, orig_sr, SAMPLE_RATE_XTTS)
-            else:
-                processed_audio = raw_audio
-            processed_sr = SAMPLE_RATE_XTTS
-
-        logger.info(f"Processed audio: {len(processed_audio)} samples @ {processed_sr}Hz")
-
-        # Save for XTTS
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as f:
-            sf.write(f.name, processed_audio, processed_sr)
-            enhanced_audio_path = f.name
-
-        # Extract speaker latents
-        logger.info("Extracting speaker latents...")
-        synthesizer = tts_model.synthesizer
-        gpt_cond_latent, speaker_embedding = synthesizer.tts_model.get_conditioning_latents(
-            audio_path=enhanced_audio_path
-        )
-
-        user_latents[user_id] = {
-            "gpt_cond_latent": gpt_cond_latent,
-            "speaker_embedding": speaker_embedding
-        }
+        enhanced_applied = await asyncio.to_thread(enroll_audio, user_id, raw_audio, orig_sr)
 
         logger.info(f"Enrolled user: {user_id} (enhanced={enhanced_applied})")
 
@@ -312,14 +797,6 @@ async def enroll_voice(user_id: str, audio: UploadFile = File(...)):
         logger.error(f"Enrollment failed for {user_id}: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-    finally:
-        for path in [temp_audio_path, enhanced_audio_path]:
-            if path and os.path.exists(path):
-                try:
-                    os.unlink(path)
-                except:
-                    pass
-
 
 @app.websocket("/ws/tts/{user_id}")
 async def websocket_tts(websocket: WebSocket, user_id: str):
@@ -328,11 +805,24 @@ async def websocket_tts(websocket: WebSocket, user_id: str):
 
     Uses XTTS default parameters - they're already well-tuned.
     No post-processing filters - XTTS output is already clean at 24kHz.
+
+    Query params: ?format=float32|pcm16|opus&sample_rate=16000 (optional)
+    Config message: {"type": "config", "format": "pcm16", "sample_rate": 16000}
+    Text message: {"text": "...", "language": "ko", "trace": false}
+                  ("trace": true adds a timing trace to the complete message)
+                  Optional "chunk_schedule": [8, 16, 32] (GPT tokens per chunk,
+                  last size repeats) or "stream_chunk_size": 20 (fixed);
+                  default XTTS_CHUNK_SCHEDULE
     """
     await websocket.accept()
     logger.info(f"WebSocket connected: {user_id}")
 
-    if user_id not in user_latents:
+    encoder = await open_encoder(websocket, SAMPLE_RATE_XTTS)
+    if encoder is None:
+        return
+
+    latents = LatentStore.get(user_id)
+    if latents is None:
         await websocket.send_json({"error": "User not enrolled"})
         await websocket.close(code=4001)
         return
@@ -342,9 +832,17 @@ async def websocket_tts(websocket: WebSocket, user_id: str):
         await websocket.close(code=4002)
         return
 
+    record_session = traffic_recorder.new_session() if traffic_recorder.enabled else None
+
     try:
         while True:
             data = await websocket.receive_json()
+
+            # Output format negotiation
+            if data.get("type") == "config":
+                encoder = await configure_encoder(websocket, data, encoder, SAMPLE_RATE_XTTS)
+                continue
+
             text = data.get("text", "")
             language = data.get("language", "ko")
 
@@ -352,32 +850,19 @@ async def websocket_tts(websocket: WebSocket, user_id: str):
                 await websocket.send_json({"error": "Empty text"})
                 continue
 
+            try:
+                schedule = ChunkSchedule.from_request(data)
+            except ValueError as e:
+                await websocket.send_json({"error": str(e)})
+                continue
+
+            traffic_recorder.record("text", "ws", user_id, record_session, language, text)
             logger.info(f"TTS: user={user_id}, lang={language}, text={text[:50]}...")
 
             try:
-                latents = user_latents[user_id]
-                synthesizer = tts_model.synthesizer
-
-                # Use XTTS with DEFAULT parameters
-                # The Coqui team has already tuned these well
-                chunks = synthesizer.tts_model.inference_stream(
-                    text=text,
-                    language=language,
-                    gpt_cond_latent=latents["gpt_cond_latent"],
-                    speaker_embedding=latents["speaker_embedding"],
-                    stream_chunk_size=20,
-                    enable_text_splitting=True
-                    # Let XTTS use its default temperature, repetition_penalty, etc.
+                await stream_utterance(
+                    websocket, encoder, latents, text, language, schedule, trace=bool(data.get("trace"))
                 )
-
-                # Send audio chunks directly - no post-processing
-                for chunk in chunks:
-                    if chunk is not None:
-                        audio_float32 = chunk.cpu().numpy().astype(np.float32)
-                        await websocket.send_bytes(audio_float32.tobytes())
-
-                await websocket.send_json({"status": "complete"})
-
             except Exception as e:
                 logger.error(f"TTS error: {e}")
                 await websocket.send_json({"error": str(e)})
@@ -389,12 +874,52 @@ async def websocket_tts(websocket: WebSocket, user_id: str):
         await websocket.close(code=4000)
 
 
+@app.post("/admin/profile")
+async def arm_profiler(requests: int = Body(default=5), mode: str = Body(default="torch")):
+    """
+    Profile the next N synthesis requests.
+    mode: "torch" (torch.profiler, Chrome trace) or "sample" (folded stacks)
+    """
+    if mode not in PROFILE_MODES:
+        raise HTTPException(status_code=400, detail=f"mode must be one of {PROFILE_MODES}")
+    try:
+        return on_demand_profiler.arm(requests, mode)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
+@app.get("/admin/profile")
+async def profiler_status():
+    """Profiler state: idle / armed / running / done"""
+    return on_demand_profiler.status()
+
+
+@app.get("/admin/profile/trace")
+async def profiler_trace():
+    """Download the last profile (Chrome trace JSON or folded stacks)"""
+    path = on_demand_profiler.trace_path
+    if not path or not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="No profile available")
+    return FileResponse(path, filename=os.path.basename(path))
+
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    """Prometheus metrics"""
+    # All XTTS work is live streaming: bridges waiting for a thread + sequences waiting for a batch slot
+    queued = StreamBridge.waiting + (batch_decoder.stats()["pending"] if batch_decoder is not None else 0)
+    set_queue_depth("live", queued)
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+
 @app.delete("/enroll/{user_id}")
 async def delete_enrollment(user_id: str):
-    if user_id not in user_latents:
+    if not LatentStore.delete(user_id):
         raise HTTPException(status_code=404, detail="User not enrolled")
 
-    del user_latents[user_id]
     logger.info(f"Deleted: {user_id}")
     return {"success": True}
 
@@ -403,5 +928,16 @@ async def delete_enrollment(user_id: str):
 # Main
 # ===========================================
 if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run("server:app", host="0.0.0.0", port=8000, reload=False)
+    if SERVER_WORKERS > 1:
+        from prefork import serve_prefork
+        # Speaker latents are shared through LATENTS_DIR (each worker keeps its own LRU)
+        serve_prefork(
+            app,
+            preload=load_models,
+            port=8000,
+            workers=SERVER_WORKERS,
+            threads_per_worker=SERVER_THREADS_PER_WORKER or None
+        )
+    else:
+        import uvicorn
+        uvicorn.run("server:app", host="0.0.0.0", port=8000, reload=False)
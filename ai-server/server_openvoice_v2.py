@@ -2,7 +2,18 @@
 AI Server for Real-time Voice Cloning using OpenVoice V2
 - POST /enroll/{user_id}: Voice enrollment with DeepFilterNet noise reduction
 - POST /enroll-url/{user_id}: Voice enrollment from S3 presigned URL
-- WebSocket /ws/tts/{user_id}: Real-time TTS streaming
+- POST /admin/bulk-enroll, GET|DELETE /admin/bulk-enroll/{job_id}, POST .../resume:
+  Throttled, resumable enrollment of a (user_id, audio URL) manifest
+- GET /admin/stale-embeddings: Users whose embedding predates the current converter checkpoint
+- WebSocket /ws/tts/{user_id}: Real-time TTS streaming (float32 / pcm16 / opus output)
+- POST /tts/file/{user_id}: Encoded (WAV/Opus) TTS for a single text
+- POST /tts/batch: Concurrent TTS for many (user_id, language, text) items
+- POST /admin/profile, GET /admin/profile[/trace]: Profile the next N requests
+- GET /metrics: Prometheus metrics (per-stage latency, TTFA, RTF, queues, caches)
+- GET /scheduler/stats: Inference queue depth / wait time per priority class
+- GET /ready: Capacity-aware readiness (queue depth, estimated wait, warm models)
+- GET /admin/enrolled-users: Paginated list of enrolled users
+- GET /cluster/route/{user_id}: Preferred replica for a speaker (consistent hashing)
 - GET /health: Health check
 
 Version 2.0.0 - OpenVoice V2 Migration:
@@ -12,67 +23,168 @@ Version 2.0.0 - OpenVoice V2 Migration:
 - Improved quality for all 4 languages
 """
 
+from __future__ import annotations  # Model type hints stay unevaluated when melo / openvoice are missing
+
+import io
 import os
 import re
+import time
+import json
+import uuid
+import base64
+import hashlib
 import tempfile
 import asyncio
-from typing import Dict, Optional, Tuple, Any, List
+import contextvars
+import threading
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple, Any, List, Set, Callable, Iterator
 from contextlib import asynccontextmanager
 
 import torch
 import numpy as np
-import librosa
 import soundfile as sf
+import soxr
 import requests
 import boto3
+from botocore.exceptions import ClientError
 from fastapi import FastAPI, UploadFile, File, WebSocket, WebSocketDisconnect, HTTPException, Body
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
 from loguru import logger
 
+from audio_codec import AudioEncoder, FILE_FORMATS, encode_file
+from metrics import (
+    current_request, current_sentence, model_load_timer, record_audio_sent, record_cache, record_gap_inserted,
+    record_queue_wait, record_silence_trimmed, render as render_metrics, set_queue_depth, stage_timer, start_request
+)
+from profiler import PROFILE_MODES, on_demand_profiler
+from traffic_recorder import traffic_recorder
+from cluster import DELETED, HashRing, SharedEmbeddingCache
+from process_engine import ProcessInferenceEngine
+from inference_scheduler import (
+    InferenceScheduler, Priority, JobInfo, DeadlineExceeded, PlaybackClock, current_job, job_with_deadline,
+    last_queue_wait
+)
+from tts_common import AudioProcessor as SharedAudioProcessor, DeepFilter, configure_encoder, open_encoder
+
 # ===========================================
 # Configuration
 # ===========================================
 DEVICE = "cuda" if torch.cuda.is_available() else "cpu"
 SAMPLE_RATE_OUTPUT = 24000  # Output sample rate
-SAMPLE_RATE_DF = 48000      # DeepFilterNet requires 48kHz
+
+# Inference concurrency (threads running MeloTTS + ToneColorConverter)
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", "2"))
+TTS_BATCH_MAX_ITEMS = int(os.getenv("TTS_BATCH_MAX_ITEMS", "64"))
+
+# Live sentences still queued this long after they are due for playback are dropped
+LIVE_DEADLINE_MS = float(os.getenv("LIVE_DEADLINE_MS", "10000"))
+# Fastest speech rate assumed when dating sentences whose base audio runs ahead
+LIVE_DUE_CHARS_PER_S = float(os.getenv("LIVE_DUE_CHARS_PER_S", "25"))
+
+# Admission control: reject new work when the projected queue wait exceeds the budget
+ADMISSION_BUDGET_MS = {
+    Priority.LIVE: float(os.getenv("ADMISSION_LIVE_BUDGET_MS", "3000")),
+    Priority.BATCH: float(os.getenv("ADMISSION_BATCH_BUDGET_MS", "60000")),
+    Priority.ENROLLMENT: float(os.getenv("ADMISSION_ENROLLMENT_BUDGET_MS", "120000")),
+}
+
+# MeloTTS text frontend (normalization, G2P, BERT) runs on its own CPU pool
+FRONTEND_WORKERS = int(os.getenv("FRONTEND_WORKERS", "2"))
+FRONTEND_DEVICE = os.getenv("FRONTEND_DEVICE", "cpu")
+FRONTEND_CACHE_SIZE = int(os.getenv("FRONTEND_CACHE_SIZE", "256"))
+
+# Batched MeloTTS acoustic model: same-language sentences share one forward pass
+MELO_BATCH_MAX = int(os.getenv("MELO_BATCH_MAX", "8"))
+MELO_BATCH_WINDOW_MS = float(os.getenv("MELO_BATCH_WINDOW_MS", "10"))
+
+# Incremental text input: force a segment once this much text has no sentence end
+STREAM_TEXT_MAX_CHARS = int(os.getenv("STREAM_TEXT_MAX_CHARS", "120"))
+# Segments of one utterance started but not yet sent; appends beyond this are rejected
+STREAM_MAX_PENDING_SEGMENTS = int(os.getenv("STREAM_MAX_PENDING_SEGMENTS", "32"))
+
+# Long-form synthesis (summaries): segments are synthesized in parallel
+LONGFORM_SEGMENT_CHARS = int(os.getenv("LONGFORM_SEGMENT_CHARS", "200"))
+LONGFORM_GAP_MS = int(os.getenv("LONGFORM_GAP_MS", "250"))
+
+# Silence trimming: MeloTTS leading / trailing silence is cut before conversion,
+# streamed sentences are joined with a fixed SENTENCE_GAP_MS pause instead
+SILENCE_TRIM = os.getenv("SILENCE_TRIM", "1") == "1"
+SILENCE_TRIM_DB = float(os.getenv("SILENCE_TRIM_DB", "-40"))   # Frame energy relative to the loudest frame
+SILENCE_FRAME_MS = float(os.getenv("SILENCE_FRAME_MS", "10"))
+SILENCE_KEEP_MS = float(os.getenv("SILENCE_KEEP_MS", "30"))    # Kept around speech (soft onsets, releases)
+SENTENCE_GAP_MS = int(os.getenv("SENTENCE_GAP_MS", "150"))
+
+# Windowed (overlap-add) tone conversion for long sentences
+STREAMING_CONVERT_MIN_SECONDS = float(os.getenv("STREAMING_CONVERT_MIN_SECONDS", "3.0"))
+CONVERT_WINDOW_FRAMES = int(os.getenv("CONVERT_WINDOW_FRAMES", "128"))   # ~1.5s @ 22.05kHz, hop 256
+CONVERT_OVERLAP_FRAMES = int(os.getenv("CONVERT_OVERLAP_FRAMES", "16"))  # ~186ms crossfade
 
 # S3 Configuration
 S3_BUCKET_NAME = os.getenv("S3_BUCKET_NAME", "eum2-voice-embeddings")
 AWS_REGION = os.getenv("AWS_REGION", "ap-northeast-2")
 
+# Cluster mode: speaker affinity across replicas + shared embedding tier
+CLUSTER_NODES = [n.strip() for n in os.getenv("CLUSTER_NODES", "").split(",") if n.strip()]
+CLUSTER_SELF = os.getenv("CLUSTER_SELF", "")
+CLUSTER_VNODES = int(os.getenv("CLUSTER_VNODES", "128"))
+EMBEDDING_CACHE_REDIS_URL = os.getenv("EMBEDDING_CACHE_REDIS_URL", "")
+EMBEDDING_CACHE_TTL_S = int(os.getenv("EMBEDDING_CACHE_TTL_S", "86400"))
+EMBEDDING_VERSION_TTL_S = float(os.getenv("EMBEDDING_VERSION_TTL_S", "2"))      # Version token reuse per replica
+EMBEDDING_CACHE_RETRY_S = float(os.getenv("EMBEDDING_CACHE_RETRY_S", "30"))    # Redis skipped after an error
+
+# Inference engine: "thread" (in-process pool) or "process" (worker processes, CPU only)
+INFERENCE_ENGINE = os.getenv("INFERENCE_ENGINE", "thread")
+PROCESS_WORKERS = int(os.getenv("PROCESS_WORKERS", "0"))          # 0 = auto-tune on startup
+PROCESS_THREADS = int(os.getenv("PROCESS_THREADS", "0"))          # 0 = cores / workers
+PROCESS_MAX_WORKERS = int(os.getenv("PROCESS_MAX_WORKERS", "4"))  # Auto-tune upper bound
+PROCESS_SHM_SLOT_MB = int(os.getenv("PROCESS_SHM_SLOT_MB", "16"))  # Per in-flight call result
+
+# Pre-forked serving: models load once in the parent, workers share them copy-on-write (CPU only)
+SERVER_WORKERS = int(os.getenv("SERVER_WORKERS", "1"))
+SERVER_THREADS_PER_WORKER = int(os.getenv("SERVER_THREADS_PER_WORKER", "0"))  # 0 = cores / workers
+PRELOAD_LANGUAGES = [l.strip() for l in os.getenv("PRELOAD_LANGUAGES", "ko").split(",") if l.strip()]
+
+# Incremental enrollment: each added clip updates a per-user running weighted sum
+# (weight = clip seconds). Older clips are scaled by ENROLL_DECAY per new clip and
+# the total weight is capped at ENROLL_MAX_WEIGHT_S (0 = no cap)
+ENROLL_DECAY = float(os.getenv("ENROLL_DECAY", "1.0"))
+ENROLL_MAX_WEIGHT_S = float(os.getenv("ENROLL_MAX_WEIGHT_S", "0"))
+
+# Embedding model version tag, stored with every embedding so a converter checkpoint
+# upgrade can find stale ones (default: content hash of the converter checkpoint)
+EMBEDDING_MODEL_VERSION = os.getenv("EMBEDDING_MODEL_VERSION", "")
+
+# Bulk enrollment jobs (manifest of user_id + audio URL), run behind live traffic
+BULK_ENROLL_DOWNLOADS = int(os.getenv("BULK_ENROLL_DOWNLOADS", "8"))   # Users downloaded / decoded ahead
+BULK_ENROLL_SLOTS = int(os.getenv("BULK_ENROLL_SLOTS", "0"))           # Users in extraction; 0 = workers - 1
+BULK_ENROLL_BACKOFF_S = float(os.getenv("BULK_ENROLL_BACKOFF_S", "0.5"))  # Poll interval while live work is queued
+
 # Paths
 CHECKPOINT_DIR = os.path.join(os.path.dirname(__file__), "checkpoints_v2")
 USER_EMBEDDINGS_DIR = os.path.join(os.path.dirname(__file__), "user_embeddings")
+USER_AGGREGATES_DIR = os.path.join(USER_EMBEDDINGS_DIR, "aggregates")
 
 # Create directories
 os.makedirs(USER_EMBEDDINGS_DIR, exist_ok=True)
-
-# ===========================================
-# DeepFilterNet Import
-# ===========================================
-DEEPFILTERNET_AVAILABLE = False
-df_enhance = None
-df_init_df = None
-
-try:
-    from df import enhance as df_enhance, init_df as df_init_df
-    DEEPFILTERNET_AVAILABLE = True
-    logger.info("DeepFilterNet imported successfully!")
-except ImportError as e:
-    logger.warning(f"DeepFilterNet ImportError: {e}")
-except OSError as e:
-    logger.warning(f"DeepFilterNet OSError: {e}")
-except Exception as e:
-    logger.warning(f"DeepFilterNet import failed: {e}")
+BULK_JOBS_DIR = os.path.join(os.path.dirname(__file__), "bulk_jobs")
+os.makedirs(USER_AGGREGATES_DIR, exist_ok=True)
+os.makedirs(BULK_JOBS_DIR, exist_ok=True)
 
 # ===========================================
 # OpenVoice V2 Imports
 # ===========================================
 try:
     from melo.api import TTS as MeloTTS
+    from melo import utils as melo_utils
     from openvoice import se_extractor
     from openvoice.api import ToneColorConverter
+    from openvoice.mel_processing import spectrogram_torch
     OPENVOICE_AVAILABLE = True
     logger.info("OpenVoice V2 imported successfully!")
 except ImportError as e:
@@ -82,21 +194,38 @@ except ImportError as e:
 # ===========================================
 # Global Storage
 # ===========================================
-# DeepFilterNet
-df_model: Optional[Any] = None
-df_state: Optional[Any] = None
-
 # OpenVoice V2 Models
 tone_color_converter: Optional[ToneColorConverter] = None
 melo_models: Dict[str, MeloTTS] = {}  # Language -> MeloTTS model
 source_embeddings: Dict[str, torch.Tensor] = {}  # Language -> source speaker embedding
+embedding_model_version = EMBEDDING_MODEL_VERSION  # Set from the converter checkpoint on load
 
-# User embeddings cache
+# User embeddings cache, and the version token of each cached embedding
 user_embeddings_cache: Dict[str, torch.Tensor] = {}
+user_embedding_versions: Dict[str, Optional[str]] = {}
+
+# Serializes each user's enrollments (aggregate read-modify-write); dropped when unused
+enrollment_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
 
 # S3 Client
 s3_client: Optional[Any] = None
 
+# Set once startup warm-up (converter, Korean MeloTTS, frontend) has finished
+models_warm = False
+
+# Inference thread pool (keeps blocking model calls off the event loop),
+# fronted by the priority / fair-share scheduler
+inference_executor = ThreadPoolExecutor(max_workers=INFERENCE_WORKERS, thread_name_prefix="inference")
+scheduler = InferenceScheduler(inference_executor, INFERENCE_WORKERS)
+
+# Worker-process engine for MeloTTS / conversion (INFERENCE_ENGINE=process)
+process_engine: Optional[ProcessInferenceEngine] = None
+
+# Text frontend thread pool + feature cache: (language, text) -> TextFeatures
+frontend_executor = ThreadPoolExecutor(max_workers=FRONTEND_WORKERS, thread_name_prefix="frontend")
+frontend_cache: "OrderedDict[Tuple[str, str], TextFeatures]" = OrderedDict()
+frontend_cache_lock = threading.Lock()
+
 # Language configuration
 LANGUAGE_CONFIG = {
     "ko": {"melo_lang": "KR", "speaker_key": "KR", "speaker_id": 0},
@@ -109,60 +238,41 @@ LANGUAGE_CONFIG = {
 # ===========================================
 # Audio Processing Utilities
 # ===========================================
-class AudioProcessor:
+class AudioProcessor(SharedAudioProcessor):
     """Audio processing utilities"""
 
     @staticmethod
-    def resample_audio(audio: np.ndarray, orig_sr: int, target_sr: int) -> np.ndarray:
-        """Resample audio using librosa"""
-        if orig_sr == target_sr:
+    def trim_silence(
+        audio: np.ndarray,
+        sample_rate: int,
+        threshold_db: float = SILENCE_TRIM_DB,
+        frame_ms: float = SILENCE_FRAME_MS,
+        keep_ms: float = SILENCE_KEEP_MS
+    ) -> np.ndarray:
+        """
+        Cut leading / trailing silence: frames whose mean energy is more than
+        threshold_db below the loudest frame, keeping keep_ms around the speech.
+        Returns a view; all-silent audio is returned unchanged.
+        """
+        frame = max(1, int(sample_rate * frame_ms / 1000))
+        n_frames = -(-len(audio) // frame)
+        if n_frames < 2:
             return audio
-        logger.debug(f"Resampling {orig_sr}Hz -> {target_sr}Hz")
-        return librosa.resample(audio, orig_sr=orig_sr, target_sr=target_sr, res_type="kaiser_best")
-
-    @staticmethod
-    def enhance_with_deepfilter(audio: np.ndarray, sample_rate: int) -> Tuple[np.ndarray, int]:
-        """Apply DeepFilterNet noise reduction"""
-        global df_model, df_state
-
-        if not DEEPFILTERNET_AVAILABLE or df_model is None:
-            logger.warning("DeepFilterNet not available")
-            return audio.astype(np.float32), sample_rate
-
-        try:
-            audio = audio.astype(np.float32)
-
-            # Resample to 48kHz for DeepFilterNet
-            if sample_rate != SAMPLE_RATE_DF:
-                audio_48k = AudioProcessor.resample_audio(audio, sample_rate, SAMPLE_RATE_DF)
-            else:
-                audio_48k = audio
-
-            # Convert to torch.Tensor
-            audio_tensor = torch.from_numpy(audio_48k).unsqueeze(0)
-
-            # Apply DeepFilterNet
-            logger.debug("Applying DeepFilterNet...")
-            enhanced_tensor = df_enhance(df_model, df_state, audio_tensor)
-
-            # Convert back to numpy
-            if isinstance(enhanced_tensor, torch.Tensor):
-                enhanced_48k = enhanced_tensor.squeeze().numpy()
-            else:
-                enhanced_48k = np.array(enhanced_tensor)
 
-            logger.info("DeepFilterNet enhancement successful!")
-            return enhanced_48k.astype(np.float32), SAMPLE_RATE_DF
+        frames = np.zeros(n_frames * frame, dtype=np.float32)
+        frames[:len(audio)] = audio
+        frames = frames.reshape(n_frames, frame)
+        energy = np.einsum("ij,ij->i", frames, frames) / frame
 
-        except Exception as e:
-            logger.error(f"DeepFilterNet failed: {e}")
-            return audio.astype(np.float32), sample_rate
+        peak = energy.max()
+        if peak <= 0:
+            return audio
+        voiced = np.flatnonzero(energy >= peak * 10 ** (threshold_db / 10))
 
-    @staticmethod
-    def load_audio(file_path: str) -> Tuple[np.ndarray, int]:
-        """Load audio file"""
-        audio, sr = librosa.load(file_path, sr=None, mono=True)
-        return audio.astype(np.float32), sr
+        keep = int(sample_rate * keep_ms / 1000)
+        start = max(0, voiced[0] * frame - keep)
+        end = min(len(audio), (voiced[-1] + 1) * frame + keep)
+        return audio[start:end]
 
 
 # ===========================================
@@ -175,32 +285,64 @@ class S3EmbeddingManager:
         self.bucket = bucket_name
         self.s3 = boto3.client('s3', region_name=region)
 
-    def upload_embedding(self, user_id: str, embedding: torch.Tensor) -> str:
-        """Upload embedding to S3"""
+    def upload_embedding(self, user_id: str, embedding: torch.Tensor, model_version: Optional[str] = None) -> str:
+        """Upload embedding to S3 (model_version goes into the object metadata)"""
         s3_key = f"voice-embeddings/{user_id}.pth"
         local_path = f"/tmp/{user_id}_embedding.pth"
 
         try:
             torch.save(embedding.cpu(), local_path)
-            self.s3.upload_file(local_path, self.bucket, s3_key)
+            extra_args = {"Metadata": {"model-version": model_version}} if model_version else None
+            self.s3.upload_file(local_path, self.bucket, s3_key, ExtraArgs=extra_args)
             logger.info(f"Uploaded embedding to S3: {s3_key}")
             return s3_key
         finally:
             if os.path.exists(local_path):
                 os.unlink(local_path)
 
-    def download_embedding(self, user_id: str, s3_key: str) -> Optional[torch.Tensor]:
-        """Download embedding from S3"""
-        local_path = f"/tmp/{user_id}_embedding.pth"
-
+    def download_embedding(self, user_id: str, s3_key: str) -> Optional[Tuple[torch.Tensor, Optional[str]]]:
+        """Download embedding from S3, with its model version (None if the object is untagged)"""
         try:
-            self.s3.download_file(self.bucket, s3_key, local_path)
-            embedding = torch.load(local_path, map_location=DEVICE)
+            response = self.s3.get_object(Bucket=self.bucket, Key=s3_key)
+            embedding = torch.load(io.BytesIO(response["Body"].read()), map_location=DEVICE)
             logger.info(f"Downloaded embedding from S3: {s3_key}")
-            return embedding
+            return embedding, response.get("Metadata", {}).get("model-version")
         except Exception as e:
-            logger.error(f"Failed to download embedding: {e}")
+            logger.error(f"Failed to download embedding of {user_id}: {e}")
             return None
+
+    @staticmethod
+    def aggregate_key(user_id: str) -> str:
+        return f"voice-embeddings/aggregates/{user_id}.pth"
+
+    def upload_aggregate(self, user_id: str, state: Dict[str, Any]) -> str:
+        """Upload a user's enrollment aggregate (running sum / weight / clips) to S3"""
+        s3_key = self.aggregate_key(user_id)
+        local_path = f"/tmp/{user_id}_aggregate.pth"
+
+        try:
+            torch.save(state, local_path)
+            self.s3.upload_file(local_path, self.bucket, s3_key)
+            return s3_key
+        finally:
+            if os.path.exists(local_path):
+                os.unlink(local_path)
+
+    def download_aggregate(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Download a user's enrollment aggregate (None if there is none).
+        Other errors raise: the caller must not start over from an empty aggregate.
+        """
+        local_path = f"/tmp/{user_id}_aggregate.pth"
+
+        try:
+            self.s3.download_file(self.bucket, self.aggregate_key(user_id), local_path)
+            return torch.load(local_path, map_location="cpu")
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey"):
+                logger.debug(f"No enrollment aggregate in S3 for {user_id}")
+                return None
+            raise
         finally:
             if os.path.exists(local_path):
                 os.unlink(local_path)
@@ -219,6 +361,12 @@ class S3EmbeddingManager:
 # Global S3 manager
 s3_manager: Optional[S3EmbeddingManager] = None
 
+# Shared second-tier embedding cache (between in-process cache and S3)
+shared_embedding_cache: Optional[SharedEmbeddingCache] = None
+
+# Speaker -> replica affinity
+hash_ring = HashRing(CLUSTER_NODES, vnodes=CLUSTER_VNODES)
+
 
 # ===========================================
 # Model Manager
@@ -228,15 +376,33 @@ class ModelManager:
 
     @staticmethod
     def load_tone_converter() -> ToneColorConverter:
-        """Load ToneColorConverter"""
+        """Load ToneColorConverter (and derive the embedding model version tag)"""
+        global embedding_model_version
         ckpt_path = os.path.join(CHECKPOINT_DIR, "converter")
         config_path = os.path.join(ckpt_path, "config.json")
 
-        converter = ToneColorConverter(config_path, device=DEVICE)
-        converter.load_ckpt(os.path.join(ckpt_path, "checkpoint.pth"))
-        logger.info("ToneColorConverter loaded!")
+        with model_load_timer("tone_converter"):
+            converter = ToneColorConverter(config_path, device=DEVICE)
+            converter.load_ckpt(os.path.join(ckpt_path, "checkpoint.pth"))
+
+        if not EMBEDDING_MODEL_VERSION:
+            embedding_model_version = ModelManager.checkpoint_version(os.path.join(ckpt_path, "checkpoint.pth"))
+        logger.info(f"ToneColorConverter loaded! (embedding model version {embedding_model_version})")
         return converter
 
+    @staticmethod
+    def checkpoint_version(ckpt_file: str) -> str:
+        """Short content hash of a checkpoint file ("unknown" if it can't be read)"""
+        digest = hashlib.blake2b(digest_size=6)
+        try:
+            with open(ckpt_file, "rb") as f:
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(block)
+        except OSError as e:
+            logger.warning(f"Checkpoint version unavailable: {e}")
+            return "unknown"
+        return digest.hexdigest()
+
     @staticmethod
     def get_melo_model(language: str) -> MeloTTS:
         """Get or load MeloTTS model for language (lazy loading)"""
@@ -248,7 +414,8 @@ class ModelManager:
         if language not in melo_models:
             config = LANGUAGE_CONFIG[language]
             logger.info(f"Loading MeloTTS for {language}...")
-            melo_models[language] = MeloTTS(language=config["melo_lang"], device=DEVICE)
+            with model_load_timer(f"melotts_{language}"):
+                melo_models[language] = MeloTTS(language=config["melo_lang"], device=DEVICE)
             logger.info(f"MeloTTS loaded for {language}")
 
         return melo_models[language]
@@ -300,10 +467,186 @@ class ModelManager:
 
         return source_embeddings[language]
 
+    @staticmethod
+    def load_all(languages: List[str]):
+        """
+        Load converter, DeepFilterNet and MeloTTS for languages, and warm up
+        the text frontend. Runs in the pre-fork parent or in lifespan.
+        """
+        global tone_color_converter, models_warm
+
+        TTSPipeline.check_convert_windows()  # Fail fast on a bad window config
+
+        # Check OpenVoice availability
+        if not OPENVOICE_AVAILABLE:
+            logger.error("OpenVoice V2 not available! Install with:")
+            logger.error("  pip install -e ./_openvoice")
+            logger.error("  pip install git+https://github.com/myshell-ai/MeloTTS.git")
+            raise RuntimeError("OpenVoice V2 not installed")
+
+        # Load ToneColorConverter
+        logger.info("Loading ToneColorConverter...")
+        try:
+            tone_color_converter = ModelManager.load_tone_converter()
+        except Exception as e:
+            logger.error(f"Failed to load ToneColorConverter: {e}")
+            logger.error("Make sure checkpoints_v2/ directory exists with model files")
+            raise
+
+        # Load DeepFilterNet (shared with the other engine in the unified server)
+        DeepFilter.load()
+
+        # Pre-load MeloTTS + source embeddings
+        for language in languages:
+            logger.info(f"Pre-loading MeloTTS ({language})...")
+            try:
+                ModelManager.get_melo_model(language)
+                ModelManager.get_source_embedding(language)
+            except Exception as e:
+                logger.warning(f"Failed to pre-load MeloTTS ({language}): {e}")
+
+        if "ko" in languages:
+            try:
+                TextFrontend.extract("안녕하세요", "ko")  # Warm up G2P/BERT
+            except Exception as e:
+                logger.warning(f"Text frontend warm-up failed: {e}")
+
+        models_warm = True
+
+    @staticmethod
+    def load_synthesis_models(languages: List[str]):
+        """Converter + MeloTTS + source embeddings only (process engine workers)"""
+        global tone_color_converter
+
+        tone_color_converter = ModelManager.load_tone_converter()
+        for language in languages:
+            ModelManager.get_melo_model(language)
+            ModelManager.get_source_embedding(language)
+
+
+# ===========================================
+# Text Frontend
+# ===========================================
+@dataclass
+class TextFeatures:
+    """MeloTTS frontend output for one text (CPU tensors)"""
+    bert: torch.Tensor
+    ja_bert: torch.Tensor
+    phones: torch.Tensor
+    tones: torch.Tensor
+    lang_ids: torch.Tensor
+
+
+class TextFrontend:
+    """
+    MeloTTS text frontend as a separate stage.
+
+    Normalization, G2P and BERT feature extraction run on the CPU frontend
+    pool, so sentence i+1 is prepared while the device runs the acoustic
+    model and converter for sentence i.
+    """
+
+    @staticmethod
+    def extract(text: str, language: str) -> TextFeatures:
+        """Compute (or fetch cached) frontend features for text"""
+        key = (language, text)
+        with frontend_cache_lock:
+            features = frontend_cache.get(key)
+            if features is not None:
+                frontend_cache.move_to_end(key)
+                record_cache("frontend", True)
+                return features
+        record_cache("frontend", False)
+
+        melo = ModelManager.get_melo_model(language)
+        if melo.language in ["EN", "ZH_MIX_EN"]:
+            text = re.sub(r'([a-z])([A-Z])', r'\1 \2', text)
+
+        with stage_timer("frontend"):
+            bert, ja_bert, phones, tones, lang_ids = melo_utils.get_text_for_tts_infer(
+                text, melo.language, melo.hps, FRONTEND_DEVICE, melo.symbol_to_id
+            )
+        features = TextFeatures(
+            bert=bert.cpu(),
+            ja_bert=ja_bert.cpu(),
+            phones=phones.cpu(),
+            tones=tones.cpu(),
+            lang_ids=lang_ids.cpu()
+        )
+
+        with frontend_cache_lock:
+            frontend_cache[key] = features
+            while len(frontend_cache) > FRONTEND_CACHE_SIZE:
+                frontend_cache.popitem(last=False)
+
+        return features
+
+    @staticmethod
+    def prefetch(texts: List[str], language: str, first_index: int = 0) -> List[asyncio.Future]:
+        """Schedule frontend work for texts; await the futures in order"""
+        loop = asyncio.get_running_loop()
+        futures = []
+        for i, text in enumerate(texts):
+            # Carry the request trace into the frontend thread, tagged with the sentence index
+            context = contextvars.copy_context()
+            context.run(current_sentence.set, first_index + i)
+            futures.append(
+                loop.run_in_executor(frontend_executor, context.run, TextFrontend.extract, text, language)
+            )
+        return futures
+
 
 # ===========================================
 # TTS Pipeline
 # ===========================================
+async def run_inference(fn: Callable, *args, job: Optional[JobInfo] = None, cost: float = 1.0):
+    """Run a blocking model call through the scheduler (job defaults to current_job)"""
+    try:
+        return await scheduler.run(fn, *args, job=job, cost=cost)
+    finally:
+        record_queue_wait(last_queue_wait.get())
+
+
+async def run_synthesis(fn: Callable, *args, job: Optional[JobInfo] = None, cost: float = 1.0):
+    """
+    run_inference for picklable synthesis ops (MeloTTS, conversion). With the
+    process engine they run in a worker process; the scheduler still decides
+    the order.
+    """
+    if process_engine is None:
+        return await run_inference(fn, *args, job=job, cost=cost)
+    return await run_inference(process_engine.call, fn, *args, job=job, cost=cost)
+
+
+def start_process_engine() -> ProcessInferenceEngine:
+    """Spawn the engine workers (auto-tuning workers x threads unless PROCESS_WORKERS is set)"""
+    init_args = (PRELOAD_LANGUAGES,)
+    slot_bytes = PROCESS_SHM_SLOT_MB * 1024 * 1024
+
+    if PROCESS_WORKERS > 0:
+        threads = PROCESS_THREADS or max(1, (os.cpu_count() or 1) // PROCESS_WORKERS)
+        return ProcessInferenceEngine(
+            PROCESS_WORKERS, threads, ModelManager.load_synthesis_models, init_args, slot_bytes
+        )
+
+    language = PRELOAD_LANGUAGES[0] if PRELOAD_LANGUAGES else "ko"
+    bench_text = {
+        "ko": "안녕하세요, 오늘 회의를 시작하겠습니다.",
+        "en": "Hello everyone, let's start today's meeting.",
+        "ja": "皆さん、今日の会議を始めます。",
+        "zh": "大家好，我们开始今天的会议。"
+    }.get(language, "Hello everyone, let's start today's meeting.")
+
+    return ProcessInferenceEngine.autotune(
+        ModelManager.load_synthesis_models,
+        init_args,
+        TTSPipeline.synthesize_array,
+        (bench_text, language, ModelManager.get_source_embedding(language)),
+        max_workers=PROCESS_MAX_WORKERS,
+        slot_bytes=slot_bytes
+    )
+
+
 class TTSPipeline:
     """MeloTTS + ToneColorConverter pipeline"""
 
@@ -321,12 +664,357 @@ class TTSPipeline:
         # Filter empty strings and strip whitespace
         return [s.strip() for s in sentences if s.strip()]
 
+    @staticmethod
+    def convert_audio(
+        audio: np.ndarray,
+        sample_rate: int,
+        source_se: torch.Tensor,
+        target_se: torch.Tensor
+    ) -> Tuple[np.ndarray, int]:
+        """
+        In-memory equivalent of ToneColorConverter.convert (no temp files).
+
+        Returns: (converted audio, converter sample rate)
+        """
+        hps = tone_color_converter.hps
+        converter_sr = hps.data.sampling_rate
+        with stage_timer("resample"):
+            audio = AudioProcessor.resample_audio(audio, sample_rate, converter_sr, res_type="soxr_hq")
+
+        with stage_timer("conversion"), torch.no_grad():
+            y = torch.from_numpy(audio.astype(np.float32)).to(DEVICE).unsqueeze(0)
+            spec = spectrogram_torch(
+                y,
+                hps.data.filter_length,
+                hps.data.sampling_rate,
+                hps.data.hop_length,
+                hps.data.win_length,
+                center=False
+            ).to(DEVICE)
+            spec_lengths = torch.LongTensor([spec.size(-1)]).to(DEVICE)
+            converted = tone_color_converter.model.voice_conversion(
+                spec, spec_lengths, sid_src=source_se, sid_tgt=target_se, tau=0.3
+            )[0][0, 0].data.cpu().float().numpy()
+
+        with stage_timer("watermark"):
+            converted = tone_color_converter.add_watermark(converted, "@EUM")  # Watermark
+        return converted, converter_sr
+
+    @staticmethod
+    def convert_audio_streaming(
+        audio: np.ndarray,
+        sample_rate: int,
+        source_se: torch.Tensor,
+        target_se: torch.Tensor,
+        window_frames: int = CONVERT_WINDOW_FRAMES,
+        overlap_frames: int = CONVERT_OVERLAP_FRAMES
+    ) -> Iterator[np.ndarray]:
+        """
+        Windowed tone conversion: yields converted audio as each window completes.
+
+        The spectrogram is cut into windows of window_frames that overlap by
+        overlap_frames. Each window is converted on its own, and the overlap
+        is linearly crossfaded with the previous window's tail, so there are no
+        seams. Concatenating the yielded chunks approximates convert_audio; it
+        differs only near window edges, where the converter sees less context.
+
+        Chunks are at the converter sample rate. stream_converted_windows runs
+        the same steps, each one through the inference engine.
+        """
+        spec = TTSPipeline.converter_spectrogram(audio, sample_rate)
+        tail: Optional[np.ndarray] = None
+        for start, end in TTSPipeline.convert_windows(spec.shape[-1], window_frames, overlap_frames):
+            chunk, tail = TTSPipeline.convert_window(
+                spec[:, start:end], source_se, target_se, tail, overlap_frames, end >= spec.shape[-1]
+            )
+            yield chunk
+
+    @staticmethod
+    def converter_spectrogram(audio: np.ndarray, sample_rate: int) -> np.ndarray:
+        """Converter input for windowed conversion: [bins, frames] (numpy, so it crosses the process engine)"""
+        hps = tone_color_converter.hps
+        with stage_timer("resample"):
+            audio = AudioProcessor.resample_audio(audio, sample_rate, hps.data.sampling_rate, res_type="soxr_hq")
+
+        with stage_timer("conversion"), torch.no_grad():
+            y = torch.from_numpy(audio.astype(np.float32)).to(DEVICE).unsqueeze(0)
+            spec = spectrogram_torch(
+                y,
+                hps.data.filter_length,
+                hps.data.sampling_rate,
+                hps.data.hop_length,
+                hps.data.win_length,
+                center=False
+            )
+        return spec[0].cpu().float().numpy()
+
+    @staticmethod
+    def convert_windows(
+        total_frames: int,
+        window_frames: int = CONVERT_WINDOW_FRAMES,
+        overlap_frames: int = CONVERT_OVERLAP_FRAMES
+    ) -> List[Tuple[int, int]]:
+        """(start, end) frames of each window; the last one ends at total_frames"""
+        TTSPipeline.check_convert_windows(window_frames, overlap_frames)
+        step = window_frames - overlap_frames
+        bounds = [(0, min(window_frames, total_frames))]
+        while bounds[-1][1] < total_frames:
+            start = bounds[-1][0] + step
+            bounds.append((start, min(start + window_frames, total_frames)))
+        return bounds
+
+    @staticmethod
+    def convert_window(
+        spec: np.ndarray,
+        source_se: torch.Tensor,
+        target_se: torch.Tensor,
+        tail: Optional[np.ndarray],
+        overlap_frames: int,
+        last: bool
+    ) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """
+        Convert one window and crossfade the previous window's tail into it.
+
+        Returns: (watermarked chunk, tail held back for the next window)
+        """
+        overlap = overlap_frames * tone_color_converter.hps.data.hop_length
+        with stage_timer("conversion"), torch.no_grad():
+            window = torch.from_numpy(np.ascontiguousarray(spec)).to(DEVICE).unsqueeze(0)
+            window_lengths = torch.LongTensor([window.size(-1)]).to(DEVICE)
+            out = tone_color_converter.model.voice_conversion(
+                window, window_lengths, sid_src=source_se, sid_tgt=target_se, tau=0.3
+            )[0][0, 0].data.cpu().float().numpy()
+
+        # Crossfade with the held-back tail of the previous window
+        if tail is not None:
+            fade_in = np.linspace(0.0, 1.0, overlap, dtype=np.float32)
+            out[:overlap] = tail * (1.0 - fade_in) + out[:overlap] * fade_in
+
+        # Hold back the overlap region until the next window arrives
+        tail = None
+        if not last:
+            keep = len(out) - overlap
+            tail = out[keep:].copy()
+            out = out[:keep]
+
+        with stage_timer("watermark"):
+            out = tone_color_converter.add_watermark(out, "@EUM")
+        return out, tail
+
+    @staticmethod
+    def check_convert_windows(
+        window_frames: int = CONVERT_WINDOW_FRAMES,
+        overlap_frames: int = CONVERT_OVERLAP_FRAMES
+    ):
+        """Windowed conversion needs 0 <= overlap < window, or the window never advances"""
+        if window_frames < 1 or not 0 <= overlap_frames < window_frames:
+            raise ValueError(
+                f"CONVERT_OVERLAP_FRAMES ({overlap_frames}) must be >= 0 and "
+                f"below CONVERT_WINDOW_FRAMES ({window_frames})"
+            )
+
+    @staticmethod
+    def synthesize_base(
+        text: str,
+        language: str,
+        features: Optional[TextFeatures] = None
+    ) -> Tuple[np.ndarray, int]:
+        """
+        Generate base speaker audio with the MeloTTS acoustic model.
+        Uses precomputed frontend features when given.
+
+        Returns: (audio, MeloTTS sample rate)
+        """
+        config = LANGUAGE_CONFIG.get(language, LANGUAGE_CONFIG["en"])
+        melo = ModelManager.get_melo_model(language)
+
+        if features is None:
+            features = TextFrontend.extract(text, language)
+
+        logger.debug(f"MeloTTS generating: {text[:30]}...")
+        device = melo.device
+        with stage_timer("melotts"), torch.no_grad():
+            x_tst = features.phones.to(device).unsqueeze(0)
+            x_tst_lengths = torch.LongTensor([features.phones.size(0)]).to(device)
+            speakers = torch.LongTensor([config["speaker_id"]]).to(device)
+            base_audio = melo.model.infer(
+                x_tst,
+                x_tst_lengths,
+                speakers,
+                features.tones.to(device).unsqueeze(0),
+                features.lang_ids.to(device).unsqueeze(0),
+                features.bert.to(device).unsqueeze(0),
+                features.ja_bert.to(device).unsqueeze(0),
+                sdp_ratio=0.2,
+                noise_scale=0.6,
+                noise_scale_w=0.8,
+                length_scale=1.0
+            )[0][0, 0].data.cpu().float().numpy()
+
+        return base_audio, melo.hps.data.sampling_rate
+
+    @staticmethod
+    def synthesize_base_batch(
+        features_list: List[TextFeatures],
+        language: str
+    ) -> List[Tuple[np.ndarray, int]]:
+        """
+        Batched MeloTTS acoustic model: pad several same-language items into
+        one forward pass and split the output back by per-item length.
+
+        Returns: [(audio, MeloTTS sample rate), ...] in input order
+        """
+        config = LANGUAGE_CONFIG.get(language, LANGUAGE_CONFIG["en"])
+        melo = ModelManager.get_melo_model(language)
+        sample_rate = melo.hps.data.sampling_rate
+        device = melo.device
+
+        if len(features_list) == 1:
+            return [TTSPipeline.synthesize_base("", language, features_list[0])]
+
+        batch_size = len(features_list)
+        lengths = [f.phones.size(0) for f in features_list]
+        max_len = max(lengths)
+
+        x_tst = torch.zeros(batch_size, max_len, dtype=torch.long)
+        tones = torch.zeros(batch_size, max_len, dtype=torch.long)
+        lang_ids = torch.zeros(batch_size, max_len, dtype=torch.long)
+        bert = torch.zeros(batch_size, features_list[0].bert.size(0), max_len)
+        ja_bert = torch.zeros(batch_size, features_list[0].ja_bert.size(0), max_len)
+
+        for i, f in enumerate(features_list):
+            n = lengths[i]
+            x_tst[i, :n] = f.phones
+            tones[i, :n] = f.tones
+            lang_ids[i, :n] = f.lang_ids
+            bert[i, :, :n] = f.bert
+            ja_bert[i, :, :n] = f.ja_bert
+
+        logger.debug(f"MeloTTS batch: {batch_size} items ({language}), max_len={max_len}")
+        with stage_timer("melotts"), torch.no_grad():
+            o, _, y_mask, _ = melo.model.infer(
+                x_tst.to(device),
+                torch.LongTensor(lengths).to(device),
+                torch.LongTensor([config["speaker_id"]] * batch_size).to(device),
+                tones.to(device),
+                lang_ids.to(device),
+                bert.to(device),
+                ja_bert.to(device),
+                sdp_ratio=0.2,
+                noise_scale=0.6,
+                noise_scale_w=0.8,
+                length_scale=1.0
+            )
+            # y_mask marks each item's valid spectrogram frames
+            audio_lengths = (y_mask.sum(dim=(1, 2)).long() * melo.hps.data.hop_length).tolist()
+            audio = o[:, 0].data.cpu().float().numpy()
+
+        return [(audio[i, :audio_lengths[i]].copy(), sample_rate) for i in range(batch_size)]
+
+    @staticmethod
+    def trim_base(base_audio: np.ndarray, base_sr: int) -> np.ndarray:
+        """Trim silence from base audio before conversion (recorded per sentence)"""
+        if not SILENCE_TRIM:
+            return base_audio
+        trimmed = AudioProcessor.trim_silence(base_audio, base_sr)
+        removed = len(base_audio) - len(trimmed)
+        if removed:
+            record_silence_trimmed(removed / base_sr)
+        return trimmed
+
+    @staticmethod
+    def convert_to_output(
+        base_audio: np.ndarray,
+        base_sr: int,
+        language: str,
+        target_se: torch.Tensor
+    ) -> np.ndarray:
+        """Apply voice cloning and resample to SAMPLE_RATE_OUTPUT"""
+        source_se = ModelManager.get_source_embedding(language)
+
+        logger.debug("Applying ToneColorConverter...")
+        converted, converter_sr = TTSPipeline.convert_audio(base_audio, base_sr, source_se, target_se)
+
+        with stage_timer("resample"):
+            return AudioProcessor.resample_audio(
+                converted, converter_sr, SAMPLE_RATE_OUTPUT, res_type="soxr_hq"
+            ).astype(np.float32)
+
+    @staticmethod
+    def synthesize_array(
+        text: str,
+        language: str,
+        target_se: torch.Tensor,
+        features: Optional[TextFeatures] = None
+    ) -> np.ndarray:
+        """
+        Synthesize text with voice cloning entirely in memory.
+        Returns float32 audio at SAMPLE_RATE_OUTPUT.
+        """
+        base_audio, base_sr = TTSPipeline.synthesize_base(text, language, features)
+        base_audio = TTSPipeline.trim_base(base_audio, base_sr)
+        return TTSPipeline.convert_to_output(base_audio, base_sr, language, target_se)
+
+    @staticmethod
+    async def send_audio(websocket: WebSocket, encoder: AudioEncoder, audio: np.ndarray):
+        """Encode and send one chunk at SAMPLE_RATE_OUTPUT (records encode/send time and TTFA)"""
+        with stage_timer("encode"):
+            audio_bytes = encoder.encode(audio)
+        if audio_bytes:
+            with stage_timer("send"):
+                await websocket.send_bytes(audio_bytes)
+        record_audio_sent(len(audio) / SAMPLE_RATE_OUTPUT, len(audio_bytes))
+
+    @staticmethod
+    async def stream_converted_windows(
+        base_audio: np.ndarray,
+        base_sr: int,
+        language: str,
+        target_se: torch.Tensor,
+        websocket: WebSocket,
+        encoder: AudioEncoder,
+        clock: Optional[PlaybackClock] = None
+    ):
+        """
+        Send a long sentence window by window instead of after full conversion (each window due in turn).
+
+        Same steps as convert_audio_streaming, but each one goes through
+        run_synthesis, so windows run on the process engine when it is on.
+        """
+        source_se = ModelManager.get_source_embedding(language)
+        spec = await run_synthesis(TTSPipeline.converter_spectrogram, base_audio, base_sr)
+        total_frames = spec.shape[-1]
+
+        # Stateful resampler so window boundaries don't click
+        resampler = soxr.ResampleStream(
+            tone_color_converter.hps.data.sampling_rate, SAMPLE_RATE_OUTPUT, 1, dtype="float32", quality="HQ"
+        )
+
+        tail: Optional[np.ndarray] = None
+        for start, end in TTSPipeline.convert_windows(total_frames):
+            if clock is not None:
+                current_job.set(clock.job())
+            last = end >= total_frames
+            chunk, tail = await run_synthesis(
+                TTSPipeline.convert_window,
+                spec[:, start:end], source_se, target_se, tail, CONVERT_OVERLAP_FRAMES, last
+            )
+
+            with stage_timer("resample"):
+                chunk = resampler.resample_chunk(chunk.astype(np.float32), last=last)
+            await TTSPipeline.send_audio(websocket, encoder, chunk)
+            if clock is not None:
+                clock.sent(len(chunk) / SAMPLE_RATE_OUTPUT)
+
     @staticmethod
     async def synthesize_streaming(
         text: str,
         language: str,
         target_se: torch.Tensor,
-        websocket: WebSocket
+        websocket: WebSocket,
+        encoder: AudioEncoder,
+        trace: bool = False,
+        require_audio: bool = False
     ):
         """
         Streaming TTS with voice cloning.
@@ -334,96 +1022,489 @@ class TTSPipeline:
         Pipeline for each sentence:
         1. MeloTTS generates base audio
         2. ToneColorConverter applies target voice
-        3. Send audio chunk via WebSocket
-        """
-        global tone_color_converter
+        3. Encode in the negotiated wire format and send via WebSocket
 
+        Sentences longer than STREAMING_CONVERT_MIN_SECONDS are converted
+        window by window so the first audio goes out before the whole
+        sentence is converted.
+
+        With trace=True the complete message carries per-sentence timings.
+
+        Each sentence (and window) gets the current job's deadline budget
+        from when it is due for playback, not from when the text arrived.
+
+        With require_audio=True a failure before any audio was sent raises
+        instead of skipping the sentence, and so does an utterance that sent
+        no audio at all, so the caller can retry elsewhere (no complete
+        message is sent then).
+        """
+        timer = start_request(trace)
         sentences = TTSPipeline.split_into_sentences(text, language)
         if not sentences:
             sentences = [text]
 
-        config = LANGUAGE_CONFIG.get(language, LANGUAGE_CONFIG["en"])
-        melo = ModelManager.get_melo_model(language)
-        source_se = ModelManager.get_source_embedding(language)
+        clock = PlaybackClock(current_job.get())
+        pending_base = TTSPipeline.start_sentences(sentences, language, clock=clock)
+
+        try:
+            await TTSPipeline._send_sentences(
+                sentences, pending_base, language, target_se, websocket, encoder,
+                require_audio=require_audio, clock=clock
+            )
+            if require_audio and timer.first_audio is None:
+                raise RuntimeError("No audio produced")
+
+            tail = encoder.flush()
+            if tail:
+                await websocket.send_bytes(tail)
+        except Exception:
+            # The connection stays open: don't carry this utterance's buffered samples into the next
+            encoder.reset()
+            raise
+        finally:
+            for task in pending_base:
+                task.cancel()
+            timer.finish()
+
+        complete = {"status": "complete"}
+        if trace:
+            complete["trace"] = timer.to_trace()
+        await websocket.send_json(complete)
+
+    @staticmethod
+    def start_sentences(
+        sentences: List[str],
+        language: str,
+        first_index: int = 0,
+        clock: Optional[PlaybackClock] = None,
+        ready: Optional[float] = None
+    ) -> List[asyncio.Future]:
+        """
+        Kick off base audio for sentences: the frontend runs ahead on the CPU
+        pool and base synthesis runs ahead through the batcher (later
+        sentences batch up). Resolves to (audio, MeloTTS sample rate), with
+        leading / trailing silence already trimmed.
+
+        With a clock, each sentence's base job is due after the sentences
+        before it, at LIVE_DUE_CHARS_PER_S (their audio is not known yet).
+        """
+        pending_features = TextFrontend.prefetch(sentences, language, first_index)
+        batcher = MeloBatcher.get(language)
+
+        async def base_for(index: int, pending: asyncio.Future, ahead_s: float) -> Tuple[np.ndarray, int]:
+            current_sentence.set(index)
+            if clock is not None:
+                current_job.set(clock.job(ready, ahead_s))
+            base_audio, base_sr = await batcher.submit(await pending)
+            return TTSPipeline.trim_base(base_audio, base_sr), base_sr
+
+        futures = []
+        chars_before = 0
+        for i, pending in enumerate(pending_features):
+            ahead_s = chars_before / LIVE_DUE_CHARS_PER_S
+            futures.append(asyncio.ensure_future(base_for(first_index + i, pending, ahead_s)))
+            chars_before += len(sentences[i])
+        return futures
+
+    @staticmethod
+    async def _send_sentences(
+        sentences: List[str],
+        pending_base: List[asyncio.Future],
+        language: str,
+        target_se: torch.Tensor,
+        websocket: WebSocket,
+        encoder: AudioEncoder,
+        first_index: int = 0,
+        require_audio: bool = False,
+        clock: Optional[PlaybackClock] = None,
+        ready: Optional[float] = None
+    ):
+        """
+        Convert and send each sentence as its base audio becomes ready.
+        Every sentence after the utterance's first is preceded by SENTENCE_GAP_MS
+        of silence (sent right away, so it plays while the sentence converts).
+        With a clock, each sentence runs under its own deadline (clock.job).
+
+        A failed sentence is logged and skipped; with require_audio=True it is
+        re-raised while no audio has been sent yet.
+        """
+        gap = np.zeros(int(SAMPLE_RATE_OUTPUT * SENTENCE_GAP_MS / 1000), dtype=np.float32)
 
         for i, sentence in enumerate(sentences):
             if not sentence:
                 continue
 
-            temp_base = f"/tmp/tts_base_{i}.wav"
-            temp_out = f"/tmp/tts_out_{i}.wav"
-
+            current_sentence.set(first_index + i)
             try:
-                # 1. Generate base audio with MeloTTS
-                logger.debug(f"MeloTTS generating: {sentence[:30]}...")
-                melo.tts_to_file(sentence, config["speaker_id"], temp_base)
-
-                # 2. Apply voice cloning with ToneColorConverter
-                logger.debug("Applying ToneColorConverter...")
-                tone_color_converter.convert(
-                    audio_src_path=temp_base,
-                    src_se=source_se,
-                    tgt_se=target_se,
-                    output_path=temp_out,
-                    message="@EUM"  # Watermark
-                )
-
-                # 3. Load and send audio
-                audio, sr = librosa.load(temp_out, sr=SAMPLE_RATE_OUTPUT)
-                audio_bytes = audio.astype(np.float32).tobytes()
-                await websocket.send_bytes(audio_bytes)
+                if SILENCE_TRIM and len(gap) and first_index + i > 0:
+                    await TTSPipeline.send_audio(websocket, encoder, gap)
+                    record_gap_inserted(len(gap) / SAMPLE_RATE_OUTPUT)
+                    if clock is not None:
+                        clock.sent(len(gap) / SAMPLE_RATE_OUTPUT)
+
+                base_audio, base_sr = await pending_base[i]
+
+                if clock is not None:
+                    current_job.set(clock.job(ready))
+                if len(base_audio) / base_sr >= STREAMING_CONVERT_MIN_SECONDS:
+                    await TTSPipeline.stream_converted_windows(
+                        base_audio, base_sr, language, target_se, websocket, encoder, clock
+                    )
+                else:
+                    audio = await run_synthesis(
+                        TTSPipeline.convert_to_output, base_audio, base_sr, language, target_se
+                    )
+                    await TTSPipeline.send_audio(websocket, encoder, audio)
+                    if clock is not None:
+                        clock.sent(len(audio) / SAMPLE_RATE_OUTPUT)
 
                 logger.debug(f"Sent chunk {i+1}/{len(sentences)}")
 
+            except DeadlineExceeded:
+                logger.warning(f"Dropped stale sentence {i+1}/{len(sentences)}")
+                continue
+
             except Exception as e:
                 logger.error(f"Error processing sentence {i}: {e}")
+                timer = current_request.get()
+                if require_audio and (timer is None or timer.first_audio is None):
+                    raise
                 continue
 
-            finally:
-                # Cleanup temp files
-                for path in [temp_base, temp_out]:
-                    if os.path.exists(path):
-                        os.unlink(path)
+    @staticmethod
+    def split_into_segments(text: str, language: str, max_chars: int = LONGFORM_SEGMENT_CHARS) -> List[str]:
+        """Group sentences into segments of at most max_chars (a single long sentence stays whole)"""
+        segments: List[str] = []
+        current = ""
+        joiner = "" if language in ["ja", "zh"] else " "
+
+        for sentence in TTSPipeline.split_into_sentences(text, language):
+            if current and len(current) + len(joiner) + len(sentence) > max_chars:
+                segments.append(current)
+                current = sentence
+            else:
+                current = f"{current}{joiner}{sentence}" if current else sentence
 
-        await websocket.send_json({"status": "complete"})
+        if current:
+            segments.append(current)
+        return segments
 
     @staticmethod
-    def synthesize_to_file(
-        text: str,
-        language: str,
-        target_se: torch.Tensor,
-        output_path: str
-    ) -> str:
+    async def synthesize_full(text: str, language: str, target_se: torch.Tensor) -> np.ndarray:
         """
-        Non-streaming TTS to file.
-        Returns the output file path.
+        Non-streaming TTS for a whole text.
+
+        Long-form mode: the text is split into segments that are synthesized
+        and converted in parallel across the inference workers, then joined
+        with a fixed LONGFORM_GAP_MS pause (segment edges are trimmed of
+        silence first). Each worker only holds one segment's spectrogram at a
+        time.
+
+        Returns float32 audio at SAMPLE_RATE_OUTPUT.
         """
-        global tone_color_converter
+        segments = TTSPipeline.split_into_segments(text, language) or [text]
+        pending_features = TextFrontend.prefetch(segments, language)
+
+        batcher = MeloBatcher.get(language)
+
+        async def render(segment: str, pending: asyncio.Future) -> np.ndarray:
+            base_audio, base_sr = await batcher.submit(await pending)
+            base_audio = TTSPipeline.trim_base(base_audio, base_sr)
+            return await run_synthesis(TTSPipeline.convert_to_output, base_audio, base_sr, language, target_se)
+
+        if len(segments) == 1:
+            return await render(segments[0], pending_features[0])
+
+        logger.info(f"Long-form TTS: {len(segments)} segments across {scheduler.slots} workers")
+        results = await asyncio.gather(*[
+            render(segment, pending) for segment, pending in zip(segments, pending_features)
+        ])
+
+        gap = np.zeros(int(SAMPLE_RATE_OUTPUT * LONGFORM_GAP_MS / 1000), dtype=np.float32)
+        pieces: List[np.ndarray] = []
+        for i, audio in enumerate(results):
+            if i > 0:
+                pieces.append(gap)
+            pieces.append(audio)
+        return np.concatenate(pieces)
+
+
+class MeloBatcher:
+    """
+    Collects same-language base-synthesis requests (from one request or many
+    concurrent ones) and runs them as batched MeloTTS forward passes.
+
+    A batch closes after MELO_BATCH_WINDOW_MS or MELO_BATCH_MAX items. At most
+    scheduler.slots batches per language run at once; while they run, new
+    arrivals pile up and form the next, larger batch.
+    """
+
+    _batchers: Dict[str, "MeloBatcher"] = {}
+
+    def __init__(self, language: str):
+        self.language = language
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.slots = asyncio.Semaphore(scheduler.slots)
+        self.task: Optional[asyncio.Task] = None
+        # Running batches: the loop only keeps weak references to tasks
+        self.running: Set[asyncio.Task] = set()
+
+    @classmethod
+    def get(cls, language: str) -> "MeloBatcher":
+        batcher = cls._batchers.get(language)
+        if batcher is None:
+            batcher = cls._batchers[language] = cls(language)
+        return batcher
+
+    async def submit(self, features: TextFeatures) -> Tuple[np.ndarray, int]:
+        """Queue one item; resolves to (audio, MeloTTS sample rate)"""
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._collect())
+
+        future = asyncio.get_running_loop().create_future()
+        origin = (current_request.get(), current_sentence.get())  # For request traces
+        await self.queue.put((features, current_job.get(), future, origin))
+        return await future
+
+    async def _collect(self):
+        # Shared by many requests: don't attribute batch stages to the first submitter
+        current_request.set(None)
+        loop = asyncio.get_running_loop()
+        while True:
+            await self.slots.acquire()
+            batch = [await self.queue.get()]
+
+            deadline = loop.time() + MELO_BATCH_WINDOW_MS / 1000
+            while len(batch) < MELO_BATCH_MAX:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            task = asyncio.create_task(self._execute(batch))
+            self.running.add(task)
+            task.add_done_callback(self.running.discard)
+
+    async def _execute(self, batch: List[Tuple[TextFeatures, JobInfo, asyncio.Future, tuple]]):
+        now = time.monotonic()
+        live = []
+        for features, job, future, origin in batch:
+            if future.done():
+                continue
+            if job.deadline is not None and now > job.deadline:
+                future.set_exception(DeadlineExceeded("live job exceeded deadline in batch queue"))
+                continue
+            live.append((features, job, future, origin))
+
+        try:
+            if not live:
+                return
+
+            # The batch is scheduled as its most urgent member; it is never
+            # dropped as a whole, since other members may still be on time
+            urgent = min((job for _, job, _, _ in live), key=lambda j: j.priority)
+            batch_job = JobInfo(priority=urgent.priority, tenant=urgent.tenant)
+
+            started = time.perf_counter()
+            results = await run_synthesis(
+                TTSPipeline.synthesize_base_batch,
+                [features for features, _, _, _ in live],
+                self.language,
+                job=batch_job,
+                cost=len(live)
+            )
+            wait = last_queue_wait.get()
+            elapsed = time.perf_counter() - started
+
+            for (_, _, future, (timer, sentence)), result in zip(live, results):
+                if timer is not None:
+                    timer.add_queue_wait(wait, sentence)
+                    timer.add_stage("melotts", elapsed - wait, sentence)
+                if not future.done():
+                    future.set_result(result)
+        except Exception as e:
+            for _, _, future, _ in live:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            self.slots.release()
+
+
+# ===========================================
+# Incremental Text Input
+# ===========================================
+class TextChunker:
+    """Buffers incrementally arriving text and cuts it into complete segments"""
+
+    # Full-width terminators end a sentence at once; ASCII ones only once
+    # followed by whitespace (so "3.5" or a half-received "Mr." isn't cut)
+    SENTENCE_END = re.compile(r'[。！？]+|[.!?]+(?=\s)')
+    SOFT_BREAKS = (",", "，", "、", " ")
+
+    def __init__(self, max_chars: int = STREAM_TEXT_MAX_CHARS):
+        self.max_chars = max_chars
+        self.buffer = ""
+
+    def append(self, text: str) -> List[str]:
+        """Add text; returns segments that are now complete"""
+        self.buffer += text
+        segments = []
+
+        while True:
+            match = self.SENTENCE_END.search(self.buffer)
+            if match:
+                cut = match.end()
+            elif len(self.buffer) > self.max_chars:
+                cut = self._soft_cut()
+            else:
+                break
+
+            segment = self.buffer[:cut].strip()
+            self.buffer = self.buffer[cut:]
+            if segment:
+                segments.append(segment)
+
+        return segments
+
+    def flush(self) -> Optional[str]:
+        """Return whatever is buffered as a segment"""
+        segment = self.buffer.strip()
+        self.buffer = ""
+        return segment or None
+
+    def _soft_cut(self) -> int:
+        """Cut an over-long run at the last comma/space within max_chars"""
+        window = self.buffer[:self.max_chars]
+        index = max(window.rfind(c) for c in self.SOFT_BREAKS)
+        return index + 1 if index > 0 else self.max_chars
 
-        config = LANGUAGE_CONFIG.get(language, LANGUAGE_CONFIG["en"])
-        melo = ModelManager.get_melo_model(language)
-        source_se = ModelManager.get_source_embedding(language)
 
-        temp_base = f"/tmp/tts_base_full.wav"
+class StreamingTextSession:
+    """
+    One utterance of incremental text input on a WebSocket.
+
+    Each segment the chunker completes starts frontend + base synthesis
+    immediately; a sender task converts and sends segments in order, so
+    audio flows while the rest of the utterance is still being translated.
+    At most STREAM_MAX_PENDING_SEGMENTS segments wait to be sent (full()).
+    """
 
+    def __init__(
+        self,
+        language: str,
+        target_se: torch.Tensor,
+        websocket: WebSocket,
+        encoder: AudioEncoder,
+        trace: bool = False
+    ):
+        self.language = language
+        self.target_se = target_se
+        self.websocket = websocket
+        self.encoder = encoder
+        self.chunker = TextChunker()
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.pending: List[asyncio.Future] = []
+        self.segments = 0
+        self.sent = 0
+        self.clock = PlaybackClock(current_job.get())  # Segments are due in turn, from when their text arrived
+        self.timer = start_request(trace)  # Before the sender task, so it inherits the timer
+        self.sender = asyncio.create_task(self._send_loop())
+
+    def full(self) -> bool:
+        """Too many segments waiting to be sent to accept more text"""
+        return self.segments - self.sent >= STREAM_MAX_PENDING_SEGMENTS
+
+    def append(self, text: str):
+        for segment in self.chunker.append(text):
+            self._start(segment)
+
+    def flush(self):
+        segment = self.chunker.flush()
+        if segment:
+            self._start(segment)
+
+    async def finish(self):
+        """End of utterance: flush, wait for all audio, then send complete"""
+        self.flush()
+        await self.queue.put(None)
         try:
-            # Generate base audio
-            melo.tts_to_file(text, config["speaker_id"], temp_base)
-
-            # Apply voice cloning
-            tone_color_converter.convert(
-                audio_src_path=temp_base,
-                src_se=source_se,
-                tgt_se=target_se,
-                output_path=output_path,
-                message="@EUM"
+            await self.sender
+        except Exception:
+            self.encoder.reset()
+            raise
+
+        tail = self.encoder.flush()
+        if tail:
+            await self.websocket.send_bytes(tail)
+        self.timer.finish()
+
+        complete = {"status": "complete"}
+        if self.timer.trace:
+            complete["trace"] = self.timer.to_trace()
+        await self.websocket.send_json(complete)
+
+    def cancel(self):
+        self.sender.cancel()
+        for task in self.pending:
+            task.cancel()
+        self.encoder.reset()
+        self.timer.finish()
+
+    def _start(self, segment: str):
+        logger.debug(f"Incremental segment ready: {segment[:30]}...")
+        index = self.segments
+        self.segments += 1
+        ready = time.monotonic()
+        [pending_base] = TTSPipeline.start_sentences([segment], self.language, index, self.clock, ready)
+        self.pending = [task for task in self.pending if not task.done()]
+        self.pending.append(pending_base)
+        self.queue.put_nowait((index, segment, pending_base, ready))
+
+    async def _send_loop(self):
+        while True:
+            item = await self.queue.get()
+            if item is None:
+                return
+            index, segment, pending_base, ready = item
+            await TTSPipeline._send_sentences(
+                [segment], [pending_base], self.language, self.target_se, self.websocket, self.encoder, index,
+                clock=self.clock, ready=ready
             )
+            self.sent += 1
 
-            return output_path
 
-        finally:
-            if os.path.exists(temp_base):
-                os.unlink(temp_base)
+# ===========================================
+# Admission Control
+# ===========================================
+class AdmissionControl:
+    """Fast rejection of new work when projected latency exceeds the budget"""
+
+    @staticmethod
+    def retry_after_ms(priority: Priority) -> Optional[int]:
+        """None if admitted, else a retry hint in milliseconds"""
+        projected_ms = scheduler.estimated_wait(priority) * 1000
+        budget_ms = ADMISSION_BUDGET_MS[priority]
+        if projected_ms <= budget_ms:
+            return None
+        logger.warning(
+            f"Admission rejected ({priority.name.lower()}): "
+            f"projected {projected_ms:.0f}ms > budget {budget_ms:.0f}ms"
+        )
+        return max(1000, int(projected_ms - budget_ms))
+
+    @staticmethod
+    def check_http(priority: Priority):
+        """Raise 503 with Retry-After for HTTP endpoints"""
+        retry_ms = AdmissionControl.retry_after_ms(priority)
+        if retry_ms is not None:
+            raise HTTPException(
+                status_code=503,
+                detail={"error": "overloaded", "retry_after_ms": retry_ms},
+                headers={"Retry-After": str((retry_ms + 999) // 1000)}
+            )
 
 
 # ===========================================
@@ -433,18 +1514,32 @@ class SpeakerEmbeddingManager:
     """User speaker embedding management"""
 
     @staticmethod
-    async def enroll_user(user_id: str, audio_path: str, upload_to_s3: bool = True) -> Tuple[torch.Tensor, Optional[str]]:
+    async def enroll_user(
+        user_id: str,
+        audio_path: str,
+        upload_to_s3: bool = True,
+        incremental: bool = False
+    ) -> Tuple[torch.Tensor, Optional[str], int]:
         """
         Enroll user voice and extract speaker embedding.
 
-        Returns: (embedding, s3_key or None)
+        incremental=False replaces the voice with this clip. incremental=True
+        adds the clip to the user's running aggregate (earlier audio is never
+        reprocessed); the stored embedding becomes the weighted mean.
+
+        Returns: (embedding, s3_key or None, clips in the aggregate)
         """
         global tone_color_converter, user_embeddings_cache, s3_manager
 
         # Extract speaker embedding using se_extractor
         # Note: get_se() returns (speaker_embedding, audio_name) tuple
         logger.info(f"Extracting speaker embedding for {user_id}...")
-        se_result = se_extractor.get_se(audio_path, tone_color_converter, vad=True)
+
+        def extract():
+            with stage_timer("se_extractor"):
+                return se_extractor.get_se(audio_path, tone_color_converter, vad=True)
+
+        se_result = await run_inference(extract, job=JobInfo(priority=Priority.ENROLLMENT, tenant=user_id))
 
         # Handle tuple return value (embedding, audio_name)
         if isinstance(se_result, tuple):
@@ -452,47 +1547,329 @@ class SpeakerEmbeddingManager:
         else:
             target_se = se_result
 
-        # Cache in memory
-        user_embeddings_cache[user_id] = target_se
+        # Fold into the running aggregate: the S3 read-modify-write runs on a thread,
+        # under the user's lock so concurrent enrollments of one user can't interleave it
+        weight = max(sf.info(audio_path).duration, 1e-3)
+        version = uuid.uuid4().hex
+        async with SpeakerEmbeddingManager._enrollment_lock(user_id):
+            state = await asyncio.to_thread(
+                SpeakerEmbeddingManager._update_aggregate,
+                user_id, target_se, weight, incremental, upload_to_s3, version
+            )
+            target_se = (state["sum"] / state["weight"]).to(target_se.device, target_se.dtype)
+            s3_key = await asyncio.to_thread(
+                SpeakerEmbeddingManager._save_enrollment, user_id, target_se, version, state["clips"], upload_to_s3
+            )
 
-        # Save locally
-        local_path = os.path.join(USER_EMBEDDINGS_DIR, f"{user_id}.pth")
-        torch.save(target_se.cpu(), local_path)
-        logger.info(f"Saved embedding locally: {local_path}")
+        return target_se, s3_key, state["clips"]
+
+    @staticmethod
+    def _save_enrollment(
+        user_id: str,
+        target_se: torch.Tensor,
+        version: str,
+        clips: int,
+        upload_to_s3: bool
+    ) -> Optional[str]:
+        """Store a new embedding in every tier (blocking: local disk, Redis, S3). Returns the S3 key"""
+        # Cache in memory and save locally, under the new version token
+        SpeakerEmbeddingManager._store_local(user_id, target_se, version, embedding_model_version, clips)
+        logger.info(f"Saved embedding locally: {user_id} (version {version})")
+
+        # Write through to the shared tier so other replicas see the new voice
+        SpeakerEmbeddingManager._put_shared(user_id, target_se, version, embedding_model_version)
 
         # Upload to S3 if enabled
-        s3_key = None
         if upload_to_s3 and s3_manager:
-            s3_key = s3_manager.upload_embedding(user_id, target_se)
+            return s3_manager.upload_embedding(user_id, target_se, embedding_model_version)
+        return None
+
+    @staticmethod
+    def _enrollment_lock(user_id: str) -> asyncio.Lock:
+        lock = enrollment_locks.get(user_id)
+        if lock is None:
+            lock = asyncio.Lock()
+            enrollment_locks[user_id] = lock
+        return lock
+
+    @staticmethod
+    async def enroll_audio(
+        user_id: str,
+        raw_audio: np.ndarray,
+        sample_rate: int,
+        incremental: bool = False
+    ) -> Tuple[torch.Tensor, Optional[str], int, bool]:
+        """
+        DeepFilterNet (if available) + enroll_user for decoded audio.
+
+        Returns: (embedding, s3_key or None, clips in the aggregate, enhanced)
+        """
+        processed_audio_path = None
+        try:
+            if DeepFilter.loaded():
+                logger.info("Applying DeepFilterNet noise reduction...")
+                processed_audio, processed_sr = await run_inference(
+                    AudioProcessor.enhance_with_deepfilter, raw_audio, sample_rate,
+                    job=JobInfo(priority=Priority.ENROLLMENT, tenant=user_id)
+                )
+                enhanced = True
+            else:
+                processed_audio, processed_sr = raw_audio, sample_rate
+                enhanced = False
+
+            with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as f:
+                sf.write(f.name, processed_audio, processed_sr)
+                processed_audio_path = f.name
+
+            target_se, s3_key, clips = await SpeakerEmbeddingManager.enroll_user(
+                user_id, processed_audio_path, upload_to_s3=True, incremental=incremental
+            )
+            return target_se, s3_key, clips, enhanced
+        finally:
+            if processed_audio_path and os.path.exists(processed_audio_path):
+                os.unlink(processed_audio_path)
+
+    @staticmethod
+    def _meta_path(user_id: str) -> str:
+        return os.path.join(USER_EMBEDDINGS_DIR, f"{user_id}.json")
+
+    @staticmethod
+    def _write_meta(user_id: str, clips: Optional[int], version: Optional[str], model_version: Optional[str]):
+        """
+        Sidecar next to the local embedding: which converter checkpoint produced
+        it, and its version token (compared with the shared tier's)
+        """
+        meta = {
+            "model_version": model_version,
+            "version": version,
+            "clips": clips,
+            "updated": round(time.time(), 3),
+        }
+        with open(SpeakerEmbeddingManager._meta_path(user_id), "w") as f:
+            json.dump(meta, f)
+
+    @staticmethod
+    def _read_meta(user_id: str) -> Dict[str, Any]:
+        try:
+            with open(SpeakerEmbeddingManager._meta_path(user_id)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    @staticmethod
+    def model_version(user_id: str) -> Optional[str]:
+        """Model version tag of the user's local embedding (None if untagged)"""
+        return SpeakerEmbeddingManager._read_meta(user_id).get("model_version")
+
+    @staticmethod
+    def _store_local(
+        user_id: str,
+        embedding: torch.Tensor,
+        version: Optional[str],
+        model_version: Optional[str],
+        clips: Optional[int] = None
+    ):
+        """Memory cache + local file + sidecar (model_version: the tag of the tier it came from)"""
+        user_embeddings_cache[user_id] = embedding
+        user_embedding_versions[user_id] = version
+        torch.save(embedding.cpu(), os.path.join(USER_EMBEDDINGS_DIR, f"{user_id}.pth"))
+        SpeakerEmbeddingManager._write_meta(user_id, clips, version, model_version)
+
+    @staticmethod
+    def _current_model(model_version: Optional[str]) -> bool:
+        """Usable with the loaded converter: tagged with its version, or untagged (pre-tagging copies)"""
+        return model_version in (None, embedding_model_version)
+
+    @staticmethod
+    def _drop_local(user_id: str):
+        """Forget this replica's copies (memory, local file, sidecar, local aggregate)"""
+        user_embeddings_cache.pop(user_id, None)
+        user_embedding_versions.pop(user_id, None)
+        for path in (
+            os.path.join(USER_EMBEDDINGS_DIR, f"{user_id}.pth"),
+            os.path.join(USER_AGGREGATES_DIR, f"{user_id}.pth"),
+            SpeakerEmbeddingManager._meta_path(user_id),
+        ):
+            if os.path.exists(path):
+                os.unlink(path)
+
+    @staticmethod
+    def _load_aggregate(user_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Running aggregate: S3 -> local file -> seeded from a pre-aggregate embedding
+
+        With S3 configured its copy is authoritative (clips added on other
+        replicas, replace-enrollments elsewhere) and the local file is not
+        read. Without S3, the local file is used only if it carries the
+        shared tier's current version token (when there is one).
+        """
+        state = None
+        if s3_manager:
+            state = s3_manager.download_aggregate(user_id)
+        else:
+            local_path = os.path.join(USER_AGGREGATES_DIR, f"{user_id}.pth")
+            if os.path.exists(local_path):
+                state = torch.load(local_path, map_location="cpu")
+                current = SpeakerEmbeddingManager._shared_version(user_id)
+                if current is not None and state.get("version") != current:
+                    logger.info(f"Discarding local enrollment aggregate of {user_id}: re-enrolled elsewhere")
+                    state = None
+
+        # Sums from another converter checkpoint live in a different embedding space
+        if state is not None:
+            if state.get("model_version", embedding_model_version) == embedding_model_version:
+                return state
+            logger.info(f"Discarding enrollment aggregate of {user_id} from model {state.get('model_version')}")
+            return None
+
+        # Enrolled before aggregates existed: the old voice counts as one clip
+        # (get_embedding skips embeddings of another converter checkpoint)
+        embedding = SpeakerEmbeddingManager.get_embedding(user_id)
+        if embedding is not None:
+            return {"sum": embedding.detach().cpu().float(), "weight": 1.0, "clips": 1, "seed": True}
+        return None
+
+    @staticmethod
+    def _update_aggregate(
+        user_id: str,
+        clip_se: torch.Tensor,
+        weight: float,
+        incremental: bool,
+        upload_to_s3: bool,
+        version: str
+    ) -> Dict[str, Any]:
+        """Add one clip (weight = seconds) to the user's aggregate and store it (tagged with version)"""
+        clip_se = clip_se.detach().cpu().float()
+        state = SpeakerEmbeddingManager._load_aggregate(user_id) if incremental else None
+
+        if state is None:
+            state = {"sum": clip_se * weight, "weight": weight, "clips": 1}
+        else:
+            if state.pop("seed", False):
+                # Seeded from a bare embedding: give the old voice this clip's weight
+                state = {"sum": state["sum"] * weight, "weight": weight, "clips": 1}
+            state["sum"] = state["sum"] * ENROLL_DECAY + clip_se * weight
+            state["weight"] = state["weight"] * ENROLL_DECAY + weight
+            state["clips"] += 1
+        state["model_version"] = embedding_model_version
+        state["version"] = version
+
+        if ENROLL_MAX_WEIGHT_S > 0 and state["weight"] > ENROLL_MAX_WEIGHT_S:
+            # Scaling sum and weight together keeps the mean, but shrinks the history
+            # so the next clip moves the voice by at least weight / cap
+            scale = ENROLL_MAX_WEIGHT_S / state["weight"]
+            state["sum"] = state["sum"] * scale
+            state["weight"] = ENROLL_MAX_WEIGHT_S
+
+        torch.save(state, os.path.join(USER_AGGREGATES_DIR, f"{user_id}.pth"))
+        if upload_to_s3 and s3_manager:
+            # S3 holds the authoritative aggregate: a failed upload fails the enrollment
+            s3_manager.upload_aggregate(user_id, state)
+
+        logger.info(
+            f"Enrollment aggregate for {user_id}: {state['clips']} clips, "
+            f"{state['weight']:.1f}s weight ({'added' if incremental else 'replaced'})"
+        )
+        return state
+
+    @staticmethod
+    def _put_shared(user_id: str, embedding: torch.Tensor, version: str, model_version: Optional[str]):
+        """Blob + version token; the version becomes current for every replica"""
+        if shared_embedding_cache is None:
+            return
+        buffer = io.BytesIO()
+        torch.save({"embedding": embedding.cpu(), "version": version, "model_version": model_version}, buffer)
+        shared_embedding_cache.put(user_id, buffer.getvalue(), version)
+
+    @staticmethod
+    def _get_shared(user_id: str) -> Optional[Dict[str, Any]]:
+        """{"embedding", "version", "model_version"} from the shared tier (None on a miss)"""
+        if shared_embedding_cache is None:
+            return None
+        data = shared_embedding_cache.get(user_id)
+        if data is None:
+            return None
+        entry = torch.load(io.BytesIO(data), map_location=DEVICE)
+        if isinstance(entry, torch.Tensor):  # Written before version tokens
+            return {"embedding": entry, "version": None, "model_version": None}
+        return entry
 
-        return target_se, s3_key
+    @staticmethod
+    def _shared_version(user_id: str) -> Optional[str]:
+        if shared_embedding_cache is None:
+            return None
+        return shared_embedding_cache.get_version(user_id)
 
     @staticmethod
     def get_embedding(user_id: str, s3_key: Optional[str] = None) -> Optional[torch.Tensor]:
         """
-        Get user embedding (memory cache -> local file -> S3)
+        Get user embedding (memory cache -> local file -> shared cache -> S3)
+
+        With the shared tier, its version token decides which copies are
+        current: memory / local copies of another version (re-enrolled on
+        another replica) are skipped, and a deleted voice is dropped here too.
+        Without a token (no shared tier, or it is unreachable) local copies
+        are trusted. Copies tagged with another converter checkpoint are
+        skipped in every tier (they live in a different embedding space).
         """
         global user_embeddings_cache, s3_manager
 
+        current = SpeakerEmbeddingManager._shared_version(user_id)
+        if current == DELETED:
+            SpeakerEmbeddingManager._drop_local(user_id)
+            return None
+
         # 1. Check memory cache
-        if user_id in user_embeddings_cache:
+        hit = user_id in user_embeddings_cache and current in (None, user_embedding_versions.get(user_id))
+        record_cache("embedding_memory", hit)
+        if hit:
             return user_embeddings_cache[user_id]
 
         # 2. Check local file
         local_path = os.path.join(USER_EMBEDDINGS_DIR, f"{user_id}.pth")
-        if os.path.exists(local_path):
+        meta = SpeakerEmbeddingManager._read_meta(user_id)
+        hit = (
+            os.path.exists(local_path)
+            and current in (None, meta.get("version"))
+            and SpeakerEmbeddingManager._current_model(meta.get("model_version"))
+        )
+        record_cache("embedding_local", hit)
+        if hit:
             embedding = torch.load(local_path, map_location=DEVICE)
             user_embeddings_cache[user_id] = embedding
+            user_embedding_versions[user_id] = meta.get("version")
             logger.info(f"Loaded embedding from local: {local_path}")
             return embedding
 
-        # 3. Try S3
+        # 3. Check shared cache (populated by any replica)
+        entry = SpeakerEmbeddingManager._get_shared(user_id)
+        if entry is not None and (
+            current not in (None, entry["version"])
+            or not SpeakerEmbeddingManager._current_model(entry.get("model_version"))
+        ):
+            entry = None
+        if shared_embedding_cache is not None:
+            record_cache("embedding_shared", entry is not None)
+        if entry is not None:
+            SpeakerEmbeddingManager._store_local(
+                user_id, entry["embedding"], entry["version"], entry.get("model_version")
+            )
+            logger.info(f"Loaded embedding from shared cache: {user_id}")
+            return entry["embedding"]
+
+        # 4. Try S3 (written on every enrollment, so it holds the current version)
         if s3_key and s3_manager:
-            embedding = s3_manager.download_embedding(user_id, s3_key)
-            if embedding is not None:
-                user_embeddings_cache[user_id] = embedding
-                # Save locally for next time
-                torch.save(embedding.cpu(), local_path)
+            downloaded = s3_manager.download_embedding(user_id, s3_key)
+            if downloaded is not None and not SpeakerEmbeddingManager._current_model(downloaded[1]):
+                logger.info(f"Skipping S3 embedding of {user_id} from model {downloaded[1]}")
+                downloaded = None
+            record_cache("embedding_s3", downloaded is not None)
+            if downloaded is not None:
+                # Save locally and in the shared tier (with its tags) for next time
+                embedding, model_version = downloaded
+                version = current or uuid.uuid4().hex
+                SpeakerEmbeddingManager._store_local(user_id, embedding, version, model_version)
+                SpeakerEmbeddingManager._put_shared(user_id, embedding, version, model_version)
                 return embedding
 
         return None
@@ -502,29 +1879,231 @@ class SpeakerEmbeddingManager:
         """Delete user embedding from all storage"""
         global user_embeddings_cache, s3_manager
 
-        # Remove from cache
-        user_embeddings_cache.pop(user_id, None)
+        # Remove from cache, local file, sidecar and local aggregate
+        SpeakerEmbeddingManager._drop_local(user_id)
 
-        # Remove local file
-        local_path = os.path.join(USER_EMBEDDINGS_DIR, f"{user_id}.pth")
-        if os.path.exists(local_path):
-            os.unlink(local_path)
+        # Remove from shared cache (leaves a DELETED version: other replicas drop their copies)
+        if shared_embedding_cache is not None:
+            shared_embedding_cache.delete(user_id)
 
         # Remove from S3
         if s3_key and s3_manager:
             s3_manager.delete_embedding(s3_key)
+        if s3_manager:
+            s3_manager.delete_embedding(S3EmbeddingManager.aggregate_key(user_id))
 
         logger.info(f"Deleted embedding for {user_id}")
         return True
 
 
+# ===========================================
+# Bulk Enrollment
+# ===========================================
+class BulkEnrollmentJob:
+    """
+    Enrolls a manifest of (user_id, audio URL) pairs behind live traffic, e.g.
+    to re-extract every embedding after a converter checkpoint upgrade.
+
+    - Downloads + decodes run on threads, BULK_ENROLL_DOWNLOADS users ahead
+    - DeepFilterNet + extraction run as ENROLLMENT jobs for at most
+      BULK_ENROLL_SLOTS users at once; a user waits while live jobs are queued.
+      These calls are not batched across users: se_extractor splits each
+      clip with VAD and encodes the pieces one file at a time, so a job costs
+      the same inference as one /enroll per user. The slots bound how much
+      of the pool it takes from live synthesis instead.
+    - Entries of one user are combined: the first clip replaces the voice,
+      later ones are added incrementally
+    - Progress is appended to BULK_JOBS_DIR/<job_id>.jsonl; resuming skips
+      users already done with the current model version. With skip_current,
+      users whose embedding already carries the current model version are
+      skipped too, unless this job started them and was interrupted (their
+      sidecar is tagged after the first clip, with the later clips missing).
+    """
+
+    JOB_ID = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+    _jobs: Dict[str, "BulkEnrollmentJob"] = {}
+
+    def __init__(self, job_id: str, items: List[Tuple[str, str]], skip_current: bool = True):
+        self.job_id = job_id
+        self.items = items
+        self.skip_current = skip_current
+        self.users: Dict[str, List[str]] = {}
+        for user_id, audio_url in items:
+            self.users.setdefault(user_id, []).append(audio_url)
+
+        self.done: Dict[str, str] = {}    # user_id -> "ok" | "skipped"
+        self.failed: Dict[str, str] = {}  # user_id -> last error
+        self.interrupted: Set[str] = set()  # Started by this job, not finished
+        self.throttled_s = 0.0
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.task: Optional[asyncio.Task] = None
+        self._progress = None
+
+    @classmethod
+    def create(cls, job_id: str, items: List[Tuple[str, str]], skip_current: bool = True) -> "BulkEnrollmentJob":
+        """New job; its manifest is written so the job can be resumed later"""
+        job = cls(job_id, items, skip_current)
+        with open(job._path(".manifest.json"), "w") as f:
+            json.dump({"items": items, "skip_current": skip_current, "created": round(time.time(), 3)}, f)
+        job._load_progress()
+        cls._jobs[job_id] = job
+        return job
+
+    @classmethod
+    def load(cls, job_id: str) -> Optional["BulkEnrollmentJob"]:
+        """Job from memory, else from its stored manifest and progress"""
+        job = cls._jobs.get(job_id)
+        if job is not None:
+            return job
+        try:
+            with open(os.path.join(BULK_JOBS_DIR, f"{job_id}.manifest.json")) as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return None
+        job = cls(job_id, [tuple(item) for item in manifest["items"]], manifest.get("skip_current", True))
+        job._load_progress()
+        cls._jobs[job_id] = job
+        return job
+
+    @classmethod
+    def cancel_all(cls):
+        for job in cls._jobs.values():
+            job.cancel()
+
+    @property
+    def running(self) -> bool:
+        return self.task is not None and not self.task.done()
+
+    def start(self):
+        if not self.running:
+            self.task = asyncio.create_task(self._run())
+
+    def cancel(self):
+        if self.running:
+            self.task.cancel()
+
+    def status(self) -> Dict[str, Any]:
+        ended = self.finished if self.finished is not None else time.time()
+        return {
+            "job_id": self.job_id,
+            "running": self.running,
+            "model_version": embedding_model_version,
+            "users": len(self.users),
+            "clips": len(self.items),
+            "enrolled": sum(1 for v in self.done.values() if v == "ok"),
+            "skipped": sum(1 for v in self.done.values() if v == "skipped"),
+            "failed": len(self.failed),
+            "failed_samples": dict(list(self.failed.items())[:10]),
+            "throttled_s": round(self.throttled_s, 1),
+            "elapsed_s": round(ended - self.started, 1) if self.started is not None else 0.0,
+        }
+
+    def _path(self, suffix: str) -> str:
+        return os.path.join(BULK_JOBS_DIR, f"{self.job_id}{suffix}")
+
+    def _load_progress(self):
+        try:
+            with open(self._path(".jsonl"), encoding="utf-8") as f:
+                for line in f:
+                    entry = json.loads(line)
+                    user_id = entry["user_id"]
+                    if entry["status"] == "started":
+                        self.interrupted.add(user_id)
+                        continue
+                    self.interrupted.discard(user_id)
+                    if entry["status"] == "error":
+                        self.failed[user_id] = entry.get("error", "")
+                    elif entry.get("model_version") == embedding_model_version:
+                        self.done[user_id] = entry["status"]
+                        self.failed.pop(user_id, None)
+        except OSError:
+            pass
+
+    def _record(self, user_id: str, status: str, error: Optional[str] = None):
+        if status == "started":
+            self.interrupted.add(user_id)
+        elif status == "error":
+            self.interrupted.discard(user_id)
+            self.failed[user_id] = error or ""
+        else:
+            self.interrupted.discard(user_id)
+            self.done[user_id] = status
+            self.failed.pop(user_id, None)
+
+        entry = {"t": round(time.time(), 3), "user_id": user_id, "status": status,
+                 "model_version": embedding_model_version}
+        if error:
+            entry["error"] = error
+        self._progress.write(json.dumps(entry) + "\n")
+
+    async def _run(self):
+        # Background work: not part of whichever request started the job
+        current_request.set(None)
+        self.started = time.time()
+        self.finished = None
+        pending = [user_id for user_id in self.users if user_id not in self.done]
+        downloads = asyncio.Semaphore(BULK_ENROLL_DOWNLOADS)
+        slots = asyncio.Semaphore(BULK_ENROLL_SLOTS or max(1, scheduler.slots - 1))
+        logger.info(f"Bulk enrollment {self.job_id}: {len(pending)}/{len(self.users)} users to process")
+
+        self._progress = open(self._path(".jsonl"), "a", buffering=1, encoding="utf-8")
+        try:
+            await asyncio.gather(*[self._enroll(user_id, downloads, slots) for user_id in pending])
+        finally:
+            self._progress.close()
+            self.finished = time.time()
+            logger.info(f"Bulk enrollment {self.job_id} stopped: {self.status()}")
+
+    async def _enroll(self, user_id: str, downloads: asyncio.Semaphore, slots: asyncio.Semaphore):
+        if (
+            self.skip_current
+            and user_id not in self.interrupted
+            and SpeakerEmbeddingManager.model_version(user_id) == embedding_model_version
+        ):
+            self._record(user_id, "skipped")
+            return
+
+        try:
+            # Holding the download slot until extraction is done bounds decoded audio in memory
+            async with downloads:
+                clips = [await asyncio.to_thread(self._fetch, url) for url in self.users[user_id]]
+                async with slots:
+                    await self._wait_for_live()
+                    # Logged before the first clip tags the sidecar, so a resume redoes this user
+                    self._record(user_id, "started")
+                    for i, (audio, sample_rate) in enumerate(clips):
+                        await SpeakerEmbeddingManager.enroll_audio(user_id, audio, sample_rate, incremental=i > 0)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Bulk enrollment {self.job_id}: {user_id} failed: {e}")
+            self._record(user_id, "error", f"{type(e).__name__}: {e}")
+            return
+        self._record(user_id, "ok")
+
+    async def _wait_for_live(self):
+        """Live (dubbing) work first: don't start a user while live jobs are queued"""
+        while scheduler.queue_depth(Priority.LIVE) > 0:
+            self.throttled_s += BULK_ENROLL_BACKOFF_S
+            await asyncio.sleep(BULK_ENROLL_BACKOFF_S)
+
+    @staticmethod
+    def _fetch(audio_url: str) -> Tuple[np.ndarray, int]:
+        """Download + decode one clip (blocking, runs on a thread)"""
+        response = requests.get(audio_url, timeout=30)
+        response.raise_for_status()
+        return AudioProcessor.load_upload(response.content)
+
+
 # ===========================================
 # Lifespan
 # ===========================================
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Load models on startup"""
-    global tone_color_converter, df_model, df_state, s3_manager
+    global s3_manager, shared_embedding_cache, process_engine
 
     logger.info("=" * 60)
     logger.info("EUM AI Server v2.0.0 (OpenVoice V2)")
@@ -535,32 +2114,26 @@ async def lifespan(app: FastAPI):
         logger.info(f"VRAM: {torch.cuda.get_device_properties(0).total_memory / 1024**3:.1f} GB")
     logger.info("=" * 60)
 
-    # Check OpenVoice availability
-    if not OPENVOICE_AVAILABLE:
-        logger.error("OpenVoice V2 not available! Install with:")
-        logger.error("  pip install -e ./_openvoice")
-        logger.error("  pip install git+https://github.com/myshell-ai/MeloTTS.git")
-        raise RuntimeError("OpenVoice V2 not installed")
-
-    # Load ToneColorConverter
-    logger.info("Loading ToneColorConverter...")
-    try:
-        tone_color_converter = ModelManager.load_tone_converter()
-    except Exception as e:
-        logger.error(f"Failed to load ToneColorConverter: {e}")
-        logger.error("Make sure checkpoints_v2/ directory exists with model files")
-        raise
+    # Models may already be loaded by the pre-fork parent (SERVER_WORKERS > 1)
+    if not models_warm:
+        ModelManager.load_all(PRELOAD_LANGUAGES)
 
-    # Load DeepFilterNet
-    if DEEPFILTERNET_AVAILABLE:
-        logger.info("Loading DeepFilterNet...")
-        try:
-            df_model, df_state, _ = df_init_df()
-            logger.info("DeepFilterNet loaded!")
-        except Exception as e:
-            logger.warning(f"DeepFilterNet load failed: {e}")
-            df_model = None
-            df_state = None
+    # Start worker-process engine (CPU only)
+    if INFERENCE_ENGINE == "process":
+        if DEVICE == "cuda":
+            logger.warning("INFERENCE_ENGINE=process is CPU only; using the thread engine")
+        else:
+            logger.info("Starting process inference engine...")
+            try:
+                process_engine = await asyncio.to_thread(start_process_engine)
+                # One blocking call per engine worker; keep those threads off the in-process pool
+                scheduler.executor = ThreadPoolExecutor(
+                    max_workers=process_engine.workers, thread_name_prefix="engine"
+                )
+                scheduler.slots = process_engine.workers
+            except Exception as e:
+                logger.warning(f"Process engine start failed, using the thread engine: {e}")
+                process_engine = None
 
     # Initialize S3 manager
     logger.info("Initializing S3 manager...")
@@ -571,12 +2144,21 @@ async def lifespan(app: FastAPI):
         logger.warning(f"S3 manager init failed: {e}")
         s3_manager = None
 
-    # Pre-load Korean MeloTTS (most commonly used)
-    logger.info("Pre-loading Korean MeloTTS...")
-    try:
-        ModelManager.get_melo_model("ko")
-    except Exception as e:
-        logger.warning(f"Failed to pre-load Korean MeloTTS: {e}")
+    # Initialize shared embedding cache (cluster mode)
+    if EMBEDDING_CACHE_REDIS_URL:
+        logger.info("Initializing shared embedding cache...")
+        try:
+            shared_embedding_cache = SharedEmbeddingCache(
+                EMBEDDING_CACHE_REDIS_URL, EMBEDDING_CACHE_TTL_S,
+                version_ttl_s=EMBEDDING_VERSION_TTL_S, retry_after_s=EMBEDDING_CACHE_RETRY_S
+            )
+            logger.info("Shared embedding cache initialized")
+        except Exception as e:
+            logger.warning(f"Shared embedding cache init failed: {e}")
+            shared_embedding_cache = None
+
+    if CLUSTER_NODES:
+        logger.info(f"Cluster mode: {len(CLUSTER_NODES)} nodes, self={CLUSTER_SELF or 'unset'}")
 
     logger.info("=" * 60)
     logger.info("Server ready!")
@@ -586,6 +2168,9 @@ async def lifespan(app: FastAPI):
 
     # Cleanup
     logger.info("Shutting down...")
+    BulkEnrollmentJob.cancel_all()  # Progress is on disk; resume with POST /admin/bulk-enroll/{job_id}/resume
+    if process_engine is not None:
+        process_engine.shutdown()
     torch.cuda.empty_cache()
 
 
@@ -617,10 +2202,37 @@ class EnrollResponse(BaseModel):
     user_id: str
     s3_key: Optional[str] = None
     enhanced: bool = False
+    clips: int = 1
 
 
 class EnrollUrlRequest(BaseModel):
     audio_url: str
+    incremental: bool = False
+
+
+class BulkEnrollItem(BaseModel):
+    user_id: str
+    audio_url: str
+
+
+class BulkEnrollRequest(BaseModel):
+    job_id: Optional[str] = None
+    items: List[BulkEnrollItem] = []
+    manifest_url: Optional[str] = None  # JSONL of {"user_id": ..., "audio_url": ...}
+    skip_current: bool = True
+
+
+class TTSBatchItem(BaseModel):
+    user_id: str
+    text: str
+    language: str = "ko"
+    s3_key: Optional[str] = None
+
+
+class TTSBatchRequest(BaseModel):
+    items: List[TTSBatchItem]
+    format: str = "wav"
+    meeting_id: Optional[str] = None
 
 
 # ===========================================
@@ -634,85 +2246,255 @@ async def health_check():
         "version": "2.0.0",
         "model": "OpenVoice V2",
         "tone_converter_loaded": tone_color_converter is not None,
-        "deepfilternet_loaded": df_model is not None,
+        "deepfilternet_loaded": DeepFilter.loaded(),
         "melo_models_loaded": list(melo_models.keys()),
         "device": DEVICE,
-        "enrolled_users": list(user_embeddings_cache.keys()),
+        "inference_engine": "process" if process_engine is not None else "thread",
+        "enrolled_users_cached": len(user_embeddings_cache),
         "s3_enabled": s3_manager is not None,
+        "shared_cache_enabled": shared_embedding_cache is not None,
         "supported_languages": list(LANGUAGE_CONFIG.keys())
     }
 
 
+@app.get("/ready")
+async def readiness_check():
+    """
+    Capacity-aware readiness for the load balancer (O(1)).
+    Returns 503 until models are warm or while projected live wait exceeds the budget.
+    """
+    estimated_wait_ms = round(scheduler.estimated_wait(Priority.LIVE) * 1000)
+    warm = models_warm and tone_color_converter is not None
+    accepting = estimated_wait_ms <= ADMISSION_BUDGET_MS[Priority.LIVE]
+
+    body = {
+        "ready": warm and accepting,
+        "warm": warm,
+        "accepting": accepting,
+        "queue_depth": scheduler.queue_depth(),
+        "running": scheduler.running,
+        "slots": scheduler.slots,
+        "estimated_wait_ms": estimated_wait_ms,
+        "live_budget_ms": ADMISSION_BUDGET_MS[Priority.LIVE],
+        "melo_models_loaded": list(melo_models.keys()),
+    }
+    status_code = 200 if body["ready"] else 503
+    headers = {} if accepting else {"Retry-After": str(max(1, estimated_wait_ms // 1000))}
+    return JSONResponse(content=body, status_code=status_code, headers=headers)
+
+
+@app.get("/admin/enrolled-users")
+async def list_enrolled_users(offset: int = 0, limit: int = 100):
+    """Paginated list of users with a stored embedding (moved out of /health)"""
+    limit = max(1, min(limit, 1000))
+    offset = max(0, offset)
+
+    user_ids = sorted(
+        entry.name[:-len(".pth")]
+        for entry in os.scandir(USER_EMBEDDINGS_DIR)
+        if entry.is_file() and entry.name.endswith(".pth")
+    )
+    page = user_ids[offset:offset + limit]
+
+    return {
+        "total": len(user_ids),
+        "offset": offset,
+        "limit": limit,
+        "users": [{"user_id": uid, "cached": uid in user_embeddings_cache} for uid in page],
+    }
+
+
+@app.get("/admin/stale-embeddings")
+async def list_stale_embeddings(offset: int = 0, limit: int = 100):
+    """Users whose local embedding was not extracted with the current converter checkpoint"""
+    limit = max(1, min(limit, 1000))
+    offset = max(0, offset)
+
+    stale = []
+    for entry in sorted(os.scandir(USER_EMBEDDINGS_DIR), key=lambda e: e.name):
+        if entry.is_file() and entry.name.endswith(".pth"):
+            user_id = entry.name[:-len(".pth")]
+            version = SpeakerEmbeddingManager.model_version(user_id)
+            if version != embedding_model_version:
+                stale.append({"user_id": user_id, "model_version": version})
+
+    return {
+        "model_version": embedding_model_version,
+        "total": len(stale),
+        "offset": offset,
+        "limit": limit,
+        "users": stale[offset:offset + limit],
+    }
+
+
+@app.post("/admin/bulk-enroll")
+async def start_bulk_enrollment(request: BulkEnrollRequest):
+    """
+    Start a bulk enrollment job from inline items and / or a JSONL manifest URL.
+    Runs in the background at ENROLLMENT priority; poll GET /admin/bulk-enroll/{job_id}.
+    """
+    if tone_color_converter is None:
+        raise HTTPException(status_code=503, detail="Model not loaded")
+
+    job_id = request.job_id or uuid.uuid4().hex[:12]
+    if not BulkEnrollmentJob.JOB_ID.match(job_id):
+        raise HTTPException(status_code=400, detail="job_id must be 1-64 of [A-Za-z0-9_-]")
+    existing = BulkEnrollmentJob.load(job_id)
+    if existing is not None:
+        raise HTTPException(status_code=409, detail=f"Job {job_id} exists; use /admin/bulk-enroll/{job_id}/resume")
+
+    items = [(item.user_id, item.audio_url) for item in request.items]
+    if request.manifest_url:
+        try:
+            response = await asyncio.to_thread(requests.get, request.manifest_url, timeout=60)
+            response.raise_for_status()
+            for line in response.text.splitlines():
+                if line.strip():
+                    entry = json.loads(line)
+                    items.append((entry["user_id"], entry["audio_url"]))
+        except (requests.RequestException, ValueError, KeyError) as e:
+            raise HTTPException(status_code=400, detail=f"Failed to read manifest: {e}")
+    if not items:
+        raise HTTPException(status_code=400, detail="Empty manifest")
+
+    job = BulkEnrollmentJob.create(job_id, items, request.skip_current)
+    job.start()
+    return job.status()
+
+
+@app.get("/admin/bulk-enroll/{job_id}")
+async def bulk_enrollment_status(job_id: str):
+    job = BulkEnrollmentJob.load(job_id) if BulkEnrollmentJob.JOB_ID.match(job_id) else None
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job")
+    return job.status()
+
+
+@app.post("/admin/bulk-enroll/{job_id}/resume")
+async def resume_bulk_enrollment(job_id: str):
+    """Continue a stopped job (after a restart or cancel); users already done are skipped"""
+    if tone_color_converter is None:
+        raise HTTPException(status_code=503, detail="Model not loaded")
+    job = BulkEnrollmentJob.load(job_id) if BulkEnrollmentJob.JOB_ID.match(job_id) else None
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job")
+    job.start()
+    return job.status()
+
+
+@app.delete("/admin/bulk-enroll/{job_id}")
+async def cancel_bulk_enrollment(job_id: str):
+    job = BulkEnrollmentJob.load(job_id) if BulkEnrollmentJob.JOB_ID.match(job_id) else None
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job")
+    job.cancel()
+    return job.status()
+
+
+@app.get("/cluster/route/{user_id}")
+async def cluster_route(user_id: str, replicas: int = 2):
+    """
+    Preferred replica(s) for a speaker. Callers connect to "node" so the
+    speaker's embedding stays hot there; "replicas" is the failover order.
+    """
+    if not CLUSTER_NODES:
+        raise HTTPException(status_code=404, detail="Cluster mode not enabled")
+
+    nodes = hash_ring.get_nodes(user_id, max(1, replicas))
+    return {
+        "user_id": user_id,
+        "node": nodes[0],
+        "replicas": nodes,
+        "self": CLUSTER_SELF or None,
+        "is_local": bool(CLUSTER_SELF) and nodes[0] == CLUSTER_SELF,
+    }
+
+
+@app.post("/admin/profile")
+async def arm_profiler(requests: int = Body(default=5), mode: str = Body(default="torch")):
+    """
+    Profile the next N synthesis requests.
+    mode: "torch" (torch.profiler, Chrome trace) or "sample" (folded stacks)
+    """
+    if mode not in PROFILE_MODES:
+        raise HTTPException(status_code=400, detail=f"mode must be one of {PROFILE_MODES}")
+    try:
+        return on_demand_profiler.arm(requests, mode)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
+@app.get("/admin/profile")
+async def profiler_status():
+    """Profiler state: idle / armed / running / done"""
+    return on_demand_profiler.status()
+
+
+@app.get("/admin/profile/trace")
+async def profiler_trace():
+    """Download the last profile (Chrome trace JSON or folded stacks)"""
+    path = on_demand_profiler.trace_path
+    if not path or not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="No profile available")
+    return FileResponse(path, filename=os.path.basename(path))
+
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    """Prometheus metrics"""
+    for priority in Priority:
+        set_queue_depth(priority.name.lower(), scheduler.queue_depth(priority))
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+
+@app.get("/scheduler/stats")
+async def scheduler_stats():
+    """Inference queue depth and wait times per priority class"""
+    return scheduler.stats()
+
+
 @app.post("/enroll/{user_id}", response_model=EnrollResponse)
-async def enroll_voice(user_id: str, audio: UploadFile = File(...)):
+async def enroll_voice(user_id: str, audio: UploadFile = File(...), incremental: bool = False):
     """
     Enroll user voice from uploaded file.
     Applies DeepFilterNet noise reduction if available.
+    With ?incremental=true the clip is added to the existing voice instead of replacing it.
     """
     if tone_color_converter is None:
         raise HTTPException(status_code=503, detail="Model not loaded")
 
-    logger.info(f"Enrolling voice for user: {user_id}")
+    AdmissionControl.check_http(Priority.ENROLLMENT)
 
-    temp_audio_path = None
-    processed_audio_path = None
-    enhanced_applied = False
+    logger.info(f"Enrolling voice for user: {user_id}")
 
     try:
-        # Save uploaded audio
-        suffix = os.path.splitext(audio.filename)[1] if audio.filename else ".wav"
-        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as f:
-            content = await audio.read()
-            f.write(content)
-            temp_audio_path = f.name
-
-        # Load audio
-        logger.info(f"Loading audio from: {temp_audio_path}")
-        raw_audio, orig_sr = AudioProcessor.load_audio(temp_audio_path)
+        raw_audio, orig_sr = AudioProcessor.load_upload(await audio.read(), audio.filename)
         duration = len(raw_audio) / orig_sr
         logger.info(f"Loaded: {duration:.2f}s @ {orig_sr}Hz")
 
-        # Apply DeepFilterNet if available
-        if df_model is not None:
-            logger.info("Applying DeepFilterNet noise reduction...")
-            processed_audio, processed_sr = AudioProcessor.enhance_with_deepfilter(raw_audio, orig_sr)
-            enhanced_applied = True
-        else:
-            processed_audio = raw_audio
-            processed_sr = orig_sr
-
-        # Save processed audio
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as f:
-            sf.write(f.name, processed_audio, processed_sr)
-            processed_audio_path = f.name
-
-        # Extract speaker embedding
-        target_se, s3_key = await SpeakerEmbeddingManager.enroll_user(
-            user_id, processed_audio_path, upload_to_s3=True
+        # DeepFilterNet (if available) + speaker embedding
+        target_se, s3_key, clips, enhanced_applied = await SpeakerEmbeddingManager.enroll_audio(
+            user_id, raw_audio, orig_sr, incremental=incremental
         )
 
-        logger.info(f"Enrolled user: {user_id} (enhanced={enhanced_applied}, s3_key={s3_key})")
+        logger.info(f"Enrolled user: {user_id} (enhanced={enhanced_applied}, s3_key={s3_key}, clips={clips})")
 
         return EnrollResponse(
             success=True,
             message=f"Voice enrolled for {user_id}",
             user_id=user_id,
             s3_key=s3_key,
-            enhanced=enhanced_applied
+            enhanced=enhanced_applied,
+            clips=clips
         )
 
     except Exception as e:
         logger.error(f"Enrollment failed for {user_id}: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-    finally:
-        for path in [temp_audio_path, processed_audio_path]:
-            if path and os.path.exists(path):
-                try:
-                    os.unlink(path)
-                except:
-                    pass
-
 
 @app.post("/enroll-url/{user_id}", response_model=EnrollResponse)
 async def enroll_voice_from_url(user_id: str, request: EnrollUrlRequest):
@@ -723,53 +2505,32 @@ async def enroll_voice_from_url(user_id: str, request: EnrollUrlRequest):
     if tone_color_converter is None:
         raise HTTPException(status_code=503, detail="Model not loaded")
 
-    logger.info(f"Enrolling voice from URL for user: {user_id}")
+    AdmissionControl.check_http(Priority.ENROLLMENT)
 
-    temp_audio_path = None
-    processed_audio_path = None
-    enhanced_applied = False
+    logger.info(f"Enrolling voice from URL for user: {user_id}")
 
     try:
         # Download audio from URL
         response = requests.get(request.audio_url, timeout=30)
         response.raise_for_status()
-
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as f:
-            f.write(response.content)
-            temp_audio_path = f.name
-
-        # Load audio
-        raw_audio, orig_sr = AudioProcessor.load_audio(temp_audio_path)
+        raw_audio, orig_sr = AudioProcessor.load_upload(response.content)
         duration = len(raw_audio) / orig_sr
         logger.info(f"Downloaded and loaded: {duration:.2f}s @ {orig_sr}Hz")
 
-        # Apply DeepFilterNet if available
-        if df_model is not None:
-            logger.info("Applying DeepFilterNet noise reduction...")
-            processed_audio, processed_sr = AudioProcessor.enhance_with_deepfilter(raw_audio, orig_sr)
-            enhanced_applied = True
-        else:
-            processed_audio = raw_audio
-            processed_sr = orig_sr
-
-        # Save processed audio
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as f:
-            sf.write(f.name, processed_audio, processed_sr)
-            processed_audio_path = f.name
-
-        # Extract speaker embedding
-        target_se, s3_key = await SpeakerEmbeddingManager.enroll_user(
-            user_id, processed_audio_path, upload_to_s3=True
+        # DeepFilterNet (if available) + speaker embedding
+        target_se, s3_key, clips, enhanced_applied = await SpeakerEmbeddingManager.enroll_audio(
+            user_id, raw_audio, orig_sr, incremental=request.incremental
         )
 
-        logger.info(f"Enrolled user from URL: {user_id} (enhanced={enhanced_applied})")
+        logger.info(f"Enrolled user from URL: {user_id} (enhanced={enhanced_applied}, clips={clips})")
 
         return EnrollResponse(
             success=True,
             message=f"Voice enrolled for {user_id}",
             user_id=user_id,
             s3_key=s3_key,
-            enhanced=enhanced_applied
+            enhanced=enhanced_applied,
+            clips=clips
         )
 
     except requests.RequestException as e:
@@ -779,28 +2540,35 @@ async def enroll_voice_from_url(user_id: str, request: EnrollUrlRequest):
         logger.error(f"Enrollment failed for {user_id}: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-    finally:
-        for path in [temp_audio_path, processed_audio_path]:
-            if path and os.path.exists(path):
-                try:
-                    os.unlink(path)
-                except:
-                    pass
-
 
 @app.websocket("/ws/tts/{user_id}")
 async def websocket_tts(websocket: WebSocket, user_id: str):
     """
     Real-time TTS streaming with voice cloning.
 
-    Expects JSON: {"text": "...", "language": "ko", "s3_key": "optional"}
-    Sends: Binary audio chunks (float32) + {"status": "complete"}
+    Query params: ?format=float32|pcm16|opus&sample_rate=16000 (optional)
+                  ?meeting_id=... (fair-share tenant, defaults to user_id)
+    Expects JSON: {"text": "...", "language": "ko", "s3_key": "optional", "trace": false}
+              or {"type": "config", "format": "pcm16", "sample_rate": 16000}
+
+    Incremental text input (synthesis starts as segments complete):
+              {"type": "append", "text": "...", "language": "ko"}
+              {"type": "flush"}   - synthesize buffered text now
+              {"type": "end"}     - end of utterance
+              (text and config messages are rejected until the utterance ends)
+    Sends: Binary audio chunks (negotiated format) + {"status": "complete"}
+           ("trace": true on the text / first append message adds a
+           per-sentence timing trace to the complete message)
     """
     await websocket.accept()
     logger.info(f"WebSocket connected: {user_id}")
 
-    # Get user embedding
-    target_se = SpeakerEmbeddingManager.get_embedding(user_id)
+    encoder = await open_encoder(websocket, SAMPLE_RATE_OUTPUT)
+    if encoder is None:
+        return
+
+    # Get user embedding (may reach Redis / disk: off the event loop)
+    target_se = await asyncio.to_thread(SpeakerEmbeddingManager.get_embedding, user_id)
 
     if target_se is None:
         await websocket.send_json({"error": "User not enrolled"})
@@ -812,16 +2580,87 @@ async def websocket_tts(websocket: WebSocket, user_id: str):
         await websocket.close(code=4002)
         return
 
+    retry_ms = AdmissionControl.retry_after_ms(Priority.LIVE)
+    if retry_ms is not None:
+        await websocket.send_json({"error": "overloaded", "retry_after_ms": retry_ms})
+        await websocket.close(code=4029)
+        return
+
+    tenant = websocket.query_params.get("meeting_id") or user_id
+    session: Optional[StreamingTextSession] = None
+    record_session = traffic_recorder.new_session() if traffic_recorder.enabled else None
+
     try:
         while True:
             data = await websocket.receive_json()
+            message_type = data.get("type")
+
+            # Output format negotiation (not under a live utterance: its segments hold the encoder)
+            if message_type == "config":
+                if session is not None:
+                    await websocket.send_json({"error": "Incremental utterance in progress; send end first"})
+                    continue
+                encoder = await configure_encoder(websocket, data, encoder, SAMPLE_RATE_OUTPUT)
+                continue
+
+            # Incremental text input
+            if message_type == "append":
+                language = data.get("language", session.language if session else "ko")
+                if language not in LANGUAGE_CONFIG:
+                    await websocket.send_json({"error": f"Unsupported language: {language}"})
+                    continue
+                traffic_recorder.record("append", "ws", user_id, record_session, language, data.get("text", ""))
+                if session is None:
+                    retry_ms = AdmissionControl.retry_after_ms(Priority.LIVE)
+                    if retry_ms is not None:
+                        await websocket.send_json({"error": "overloaded", "retry_after_ms": retry_ms})
+                        continue
+                    logger.info(f"Incremental TTS: user={user_id}, lang={language}")
+                    current_job.set(job_with_deadline(Priority.LIVE, tenant, LIVE_DEADLINE_MS))
+                    session = StreamingTextSession(
+                        language, target_se, websocket, encoder, trace=bool(data.get("trace"))
+                    )
+                elif language != session.language:
+                    await websocket.send_json({"error": "Language changed mid-utterance"})
+                    continue
+                elif session.full():
+                    await websocket.send_json({"error": "Too many pending segments", "retry_after_ms": 1000})
+                    continue
+                session.append(data.get("text", ""))
+                continue
+
+            if message_type == "flush":
+                traffic_recorder.record("flush", "ws", user_id, record_session)
+                if session:
+                    session.flush()
+                continue
+
+            if message_type == "end":
+                traffic_recorder.record("end", "ws", user_id, record_session)
+                if session is None:
+                    await websocket.send_json({"status": "complete"})
+                    continue
+                try:
+                    await session.finish()
+                except Exception as e:
+                    logger.error(f"TTS error: {e}")
+                    await websocket.send_json({"error": str(e)})
+                finally:
+                    session = None
+                continue
+
+            # A whole-text message would interleave its audio with the open utterance's
+            if session is not None:
+                await websocket.send_json({"error": "Incremental utterance in progress; send end first"})
+                continue
+
             text = data.get("text", "")
             language = data.get("language", "ko")
 
             # Optional: load from S3 if s3_key provided
             s3_key = data.get("s3_key")
             if s3_key and target_se is None:
-                target_se = SpeakerEmbeddingManager.get_embedding(user_id, s3_key)
+                target_se = await asyncio.to_thread(SpeakerEmbeddingManager.get_embedding, user_id, s3_key)
                 if target_se is None:
                     await websocket.send_json({"error": "Failed to load embedding"})
                     continue
@@ -834,14 +2673,24 @@ async def websocket_tts(websocket: WebSocket, user_id: str):
                 await websocket.send_json({"error": f"Unsupported language: {language}"})
                 continue
 
+            traffic_recorder.record("text", "ws", user_id, record_session, language, text)
+
+            retry_ms = AdmissionControl.retry_after_ms(Priority.LIVE)
+            if retry_ms is not None:
+                await websocket.send_json({"error": "overloaded", "retry_after_ms": retry_ms})
+                continue
+
             logger.info(f"TTS: user={user_id}, lang={language}, text={text[:50]}...")
+            current_job.set(job_with_deadline(Priority.LIVE, tenant, LIVE_DEADLINE_MS))
 
             try:
                 await TTSPipeline.synthesize_streaming(
                     text=text,
                     language=language,
                     target_se=target_se,
-                    websocket=websocket
+                    websocket=websocket,
+                    encoder=encoder,
+                    trace=bool(data.get("trace"))
                 )
             except Exception as e:
                 logger.error(f"TTS error: {e}")
@@ -852,6 +2701,9 @@ async def websocket_tts(websocket: WebSocket, user_id: str):
     except Exception as e:
         logger.error(f"WebSocket error: {e}")
         await websocket.close(code=4000)
+    finally:
+        if session:
+            session.cancel()
 
 
 @app.delete("/enroll/{user_id}")
@@ -874,13 +2726,15 @@ async def tts_to_file(
     user_id: str,
     text: str = Body(...),
     language: str = Body(default="ko"),
-    s3_key: Optional[str] = Body(default=None)
+    s3_key: Optional[str] = Body(default=None),
+    format: str = Body(default="wav"),
+    meeting_id: Optional[str] = Body(default=None)
 ):
     """
-    Generate TTS to file and return the audio.
+    Generate TTS and return it as an encoded audio file (WAV or Ogg Opus).
     Useful for non-streaming use cases like meeting summaries.
     """
-    target_se = SpeakerEmbeddingManager.get_embedding(user_id, s3_key)
+    target_se = await asyncio.to_thread(SpeakerEmbeddingManager.get_embedding, user_id, s3_key)
 
     if target_se is None:
         raise HTTPException(status_code=404, detail="User not enrolled")
@@ -888,39 +2742,112 @@ async def tts_to_file(
     if language not in LANGUAGE_CONFIG:
         raise HTTPException(status_code=400, detail=f"Unsupported language: {language}")
 
-    output_path = f"/tmp/tts_output_{user_id}.wav"
+    if format not in FILE_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format: {format}")
 
-    try:
-        TTSPipeline.synthesize_to_file(
-            text=text,
-            language=language,
-            target_se=target_se,
-            output_path=output_path
-        )
+    traffic_recorder.record("file", "file", user_id, language=language, text=text)
+    AdmissionControl.check_http(Priority.BATCH)
 
-        # Read and return audio
-        audio, sr = librosa.load(output_path, sr=SAMPLE_RATE_OUTPUT)
+    current_job.set(JobInfo(priority=Priority.BATCH, tenant=meeting_id or user_id))
+    audio = await TTSPipeline.synthesize_full(text, language, target_se)
+    # Whole-utterance encoding (Opus especially) would block live streams on the loop
+    audio_bytes, media_type = await asyncio.to_thread(encode_file, audio, SAMPLE_RATE_OUTPUT, format)
+    extension = FILE_FORMATS[format][3]
 
-        from fastapi.responses import Response
-        audio_bytes = audio.astype(np.float32).tobytes()
+    return Response(
+        content=audio_bytes,
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f"attachment; filename=tts_{user_id}.{extension}",
+            "X-Sample-Rate": str(SAMPLE_RATE_OUTPUT)
+        }
+    )
 
-        return Response(
-            content=audio_bytes,
-            media_type="audio/wav",
-            headers={
-                "Content-Disposition": f"attachment; filename=tts_{user_id}.wav",
-                "X-Sample-Rate": str(SAMPLE_RATE_OUTPUT)
-            }
-        )
 
-    finally:
-        if os.path.exists(output_path):
-            os.unlink(output_path)
+@app.post("/tts/batch")
+async def tts_batch(request: TTSBatchRequest):
+    """
+    Synthesize many (user_id, language, text) items concurrently.
+
+    Streams NDJSON, one line per item in completion order:
+    {"index": 0, "user_id": "...", "format": "wav", "media_type": "audio/wav",
+     "sample_rate": 24000, "duration_ms": 1234, "audio": "<base64>"}
+    Failed items carry {"index": ..., "user_id": ..., "error": "..."} instead.
+    """
+    if not request.items:
+        raise HTTPException(status_code=400, detail="No items")
+
+    if len(request.items) > TTS_BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"Too many items (max {TTS_BATCH_MAX_ITEMS})")
+
+    if request.format not in FILE_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format: {request.format}")
+
+    if tone_color_converter is None:
+        raise HTTPException(status_code=503, detail="Model not loaded")
+
+    record_session = traffic_recorder.new_session() if traffic_recorder.enabled else None
+    for item in request.items:
+        traffic_recorder.record("batch", "batch", item.user_id, record_session, item.language, item.text)
+    AdmissionControl.check_http(Priority.BATCH)
+
+    async def synthesize_item(index: int, item: TTSBatchItem) -> Dict[str, Any]:
+        result = {"index": index, "user_id": item.user_id, "language": item.language}
+        current_job.set(JobInfo(priority=Priority.BATCH, tenant=request.meeting_id or item.user_id))
+        try:
+            if not item.text:
+                raise ValueError("Empty text")
+            if item.language not in LANGUAGE_CONFIG:
+                raise ValueError(f"Unsupported language: {item.language}")
+
+            target_se = await asyncio.to_thread(SpeakerEmbeddingManager.get_embedding, item.user_id, item.s3_key)
+            if target_se is None:
+                raise ValueError("User not enrolled")
+
+            audio = await TTSPipeline.synthesize_full(item.text, item.language, target_se)
+            audio_bytes, media_type = await asyncio.to_thread(encode_file, audio, SAMPLE_RATE_OUTPUT, request.format)
+
+            result.update({
+                "format": request.format,
+                "media_type": media_type,
+                "sample_rate": SAMPLE_RATE_OUTPUT,
+                "duration_ms": round(len(audio) / SAMPLE_RATE_OUTPUT * 1000),
+                "audio": base64.b64encode(audio_bytes).decode("ascii")
+            })
+        except Exception as e:
+            logger.error(f"Batch TTS item {index} failed ({item.user_id}): {e}")
+            result["error"] = str(e)
+        return result
+
+    logger.info(f"Batch TTS: {len(request.items)} items, format={request.format}")
+    tasks = [asyncio.create_task(synthesize_item(i, item)) for i, item in enumerate(request.items)]
+
+    async def stream_results():
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                result = await next_done
+                yield json.dumps(result, ensure_ascii=False) + "\n"
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
 
 
 # ===========================================
 # Main
 # ===========================================
 if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run("server_openvoice_v2:app", host="0.0.0.0", port=8000, reload=False)
+    if SERVER_WORKERS > 1:
+        from prefork import serve_prefork
+        # Lazily loaded models would be duplicated per worker, so preload all languages
+        serve_prefork(
+            app,
+            preload=lambda: ModelManager.load_all(list(LANGUAGE_CONFIG)),
+            port=8000,
+            workers=SERVER_WORKERS,
+            threads_per_worker=SERVER_THREADS_PER_WORKER or None
+        )
+    else:
+        import uvicorn
+        uvicorn.run("server_openvoice_v2:app", host="0.0.0.0", port=8000, reload=False)
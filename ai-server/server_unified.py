@@ -0,0 +1,534 @@
+"""
+Unified AI Server: XTTS v2 and OpenVoice V2 as pluggable TTS engines
+- POST /enroll/{user_id}: Voice enrollment on every engine (audio decoded once)
+- DELETE /enroll/{user_id}: Delete the voice from every engine
+- WebSocket /ws/tts/{user_id}: Real-time TTS streaming, engine chosen per utterance
+- GET /admin/engines: Engine load / queue state and routing statistics
+- GET /metrics: Prometheus metrics (shared by all engines)
+- GET /health: Health check
+
+Engines wrap the single-engine servers (server.py, server_openvoice_v2.py):
+their models, caches, schedulers and storage are used as they are, this
+server only adds the routing. Audio loading, DeepFilterNet (one instance for
+both engines) and output format negotiation come from tts_common.py. UNIFIED_ENGINES picks the engines; one whose
+dependencies are missing is disabled with a warning.
+
+Routing (engine_router.py) uses the measured time to first audio per
+(engine, language) plus each engine's current queue wait, against the
+request's latency budget / quality tier. A saturated engine's traffic fails
+over to the other one, as does an utterance whose engine fails before
+sending audio.
+"""
+
+import os
+import time
+import asyncio
+import importlib
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from fastapi import FastAPI, UploadFile, File, WebSocket, WebSocketDisconnect, HTTPException
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response
+from pydantic import BaseModel
+from loguru import logger
+
+from audio_codec import AudioEncoder
+from engine_router import TIERS, Candidate, EngineRouter
+from inference_scheduler import Priority, current_job, job_with_deadline
+from metrics import current_request, record_engine_route, render as render_metrics
+from traffic_recorder import traffic_recorder
+from tts_common import AudioProcessor, configure_encoder, open_encoder
+
+# ===========================================
+# Configuration
+# ===========================================
+SAMPLE_RATE_OUTPUT = 24000  # Both engines stream 24kHz
+
+UNIFIED_ENGINES = [e.strip() for e in os.getenv("UNIFIED_ENGINES", "xtts,openvoice").split(",") if e.strip()]
+
+# Routing: default latency budget for first audio, and TTFA priors until measured
+UNIFIED_LATENCY_BUDGET_MS = float(os.getenv("UNIFIED_LATENCY_BUDGET_MS", "800"))
+UNIFIED_TTFA_ALPHA = float(os.getenv("UNIFIED_TTFA_ALPHA", "0.2"))
+UNIFIED_TTFA_HALF_LIFE_S = float(os.getenv("UNIFIED_TTFA_HALF_LIFE_S", "60"))  # Decay toward the prior
+UNIFIED_PRIOR_TTFA_MS = {
+    "xtts": float(os.getenv("UNIFIED_XTTS_PRIOR_TTFA_MS", "700")),
+    "openvoice": float(os.getenv("UNIFIED_OPENVOICE_PRIOR_TTFA_MS", "350")),
+}
+
+# XTTS has no scheduler queue: saturated once this many streams per stream slot are active
+UNIFIED_XTTS_MAX_STREAMS_PER_SLOT = float(os.getenv("UNIFIED_XTTS_MAX_STREAMS_PER_SLOT", "2"))
+
+STREAM_EWMA_ALPHA = 0.2
+
+
+# ===========================================
+# Engines
+# ===========================================
+class TTSEngine:
+    """One TTS backend behind the unified server (subclasses wrap a server module)"""
+
+    name = ""
+    quality = 0       # Higher = better voice quality
+    module_name = ""
+
+    def __init__(self, module):
+        self.module = module
+
+    @classmethod
+    def load_module(cls):
+        return importlib.import_module(cls.module_name)
+
+    def lifespan(self):
+        """The wrapped server's own startup / shutdown (model loading, S3, ...)"""
+        return self.module.lifespan(self.module.app)
+
+    def loaded(self) -> bool:
+        raise NotImplementedError
+
+    def supports(self, language: str) -> bool:
+        raise NotImplementedError
+
+    def is_enrolled(self, user_id: str) -> bool:
+        raise NotImplementedError
+
+    async def enroll(self, user_id: str, raw_audio: np.ndarray, sample_rate: int) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def delete(self, user_id: str):
+        raise NotImplementedError
+
+    def wait_s(self) -> float:
+        """Expected queue wait for a new live utterance"""
+        raise NotImplementedError
+
+    def saturated(self) -> bool:
+        raise NotImplementedError
+
+    async def stream(
+        self,
+        websocket: WebSocket,
+        encoder: AudioEncoder,
+        user_id: str,
+        text: str,
+        language: str,
+        data: Dict[str, Any],
+        tenant: str
+    ):
+        """Synthesize one utterance and send audio + {"status": "complete"}"""
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, Any]:
+        return {}
+
+
+class XttsEngine(TTSEngine):
+    """XTTS v2 (server.py): closest voice match, slower first audio"""
+
+    name = "xtts"
+    quality = 2
+    module_name = "server"
+
+    LANGUAGES = {"en", "es", "fr", "de", "it", "pt", "pl", "tr", "ru", "nl", "cs", "ar", "zh", "ja", "hu", "ko", "hi"}
+
+    def __init__(self, module):
+        super().__init__(module)
+        self.active = 0
+        self.stream_s = 0.0  # EWMA of utterance wall time
+
+    def capacity(self) -> int:
+        decoder = self.module.batch_decoder
+        return decoder.max_batch if decoder is not None else self.module.XTTS_STREAM_WORKERS
+
+    def loaded(self) -> bool:
+        return self.module.tts_model is not None
+
+    def supports(self, language: str) -> bool:
+        return language.split("-")[0] in self.LANGUAGES
+
+    def is_enrolled(self, user_id: str) -> bool:
+        return self.module.LatentStore.get(user_id) is not None
+
+    async def enroll(self, user_id: str, raw_audio: np.ndarray, sample_rate: int) -> Dict[str, Any]:
+        enhanced = await asyncio.to_thread(self.module.enroll_audio, user_id, raw_audio, sample_rate)
+        return {"enhanced": enhanced}
+
+    def delete(self, user_id: str):
+        self.module.LatentStore.delete(user_id)
+
+    def wait_s(self) -> float:
+        capacity = self.capacity()
+        queued = max(0, self.active - capacity + 1)
+        return queued / capacity * self.stream_s
+
+    def saturated(self) -> bool:
+        return self.active >= self.capacity() * UNIFIED_XTTS_MAX_STREAMS_PER_SLOT
+
+    async def stream(self, websocket, encoder, user_id, text, language, data, tenant):
+        latents = self.module.LatentStore.get(user_id)
+        schedule = self.module.ChunkSchedule.from_request(data)
+        language = "zh-cn" if language == "zh" else language  # XTTS language code
+
+        self.active += 1
+        started = time.perf_counter()
+        try:
+            await self.module.stream_utterance(
+                websocket, encoder, latents, text, language, schedule, trace=bool(data.get("trace"))
+            )
+        finally:
+            self.active -= 1
+            elapsed = time.perf_counter() - started
+            if not self.stream_s:
+                self.stream_s = elapsed
+            else:
+                self.stream_s += STREAM_EWMA_ALPHA * (elapsed - self.stream_s)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"active": self.active, "capacity": self.capacity(), "stream_s": round(self.stream_s, 3)}
+
+
+class OpenVoiceEngine(TTSEngine):
+    """MeloTTS + OpenVoice V2 (server_openvoice_v2.py): fast first audio, batched"""
+
+    name = "openvoice"
+    quality = 1
+    module_name = "server_openvoice_v2"
+
+    def loaded(self) -> bool:
+        return self.module.tone_color_converter is not None
+
+    def supports(self, language: str) -> bool:
+        return language in self.module.LANGUAGE_CONFIG
+
+    def is_enrolled(self, user_id: str) -> bool:
+        return self.module.SpeakerEmbeddingManager.get_embedding(user_id) is not None
+
+    async def enroll(self, user_id: str, raw_audio: np.ndarray, sample_rate: int) -> Dict[str, Any]:
+        _, s3_key, _, enhanced = await self.module.SpeakerEmbeddingManager.enroll_audio(
+            user_id, raw_audio, sample_rate
+        )
+        return {"enhanced": enhanced, "s3_key": s3_key}
+
+    def delete(self, user_id: str):
+        self.module.SpeakerEmbeddingManager.delete_user(user_id)
+
+    def wait_s(self) -> float:
+        return self.module.scheduler.estimated_wait(Priority.LIVE)
+
+    def saturated(self) -> bool:
+        return self.wait_s() * 1000 > self.module.ADMISSION_BUDGET_MS[Priority.LIVE]
+
+    async def stream(self, websocket, encoder, user_id, text, language, data, tenant):
+        target_se = await asyncio.to_thread(self.module.SpeakerEmbeddingManager.get_embedding, user_id)
+        current_job.set(job_with_deadline(Priority.LIVE, tenant, self.module.LIVE_DEADLINE_MS))
+        await self.module.TTSPipeline.synthesize_streaming(
+            text=text,
+            language=language,
+            target_se=target_se,
+            websocket=websocket,
+            encoder=encoder,
+            trace=bool(data.get("trace")),
+            require_audio=True  # Failed sentences are skipped otherwise: raise so the utterance fails over
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        return self.module.scheduler.stats()
+
+
+class EngineRegistry:
+    """Engines enabled by UNIFIED_ENGINES, in that order"""
+
+    ENGINE_TYPES = {"xtts": XttsEngine, "openvoice": OpenVoiceEngine}
+
+    engines: Dict[str, TTSEngine] = {}
+
+    @classmethod
+    def load(cls, names: List[str]):
+        for name in names:
+            engine_type = cls.ENGINE_TYPES.get(name)
+            if engine_type is None:
+                logger.warning(f"Unknown engine in UNIFIED_ENGINES: {name}")
+                continue
+            try:
+                cls.engines[name] = engine_type(engine_type.load_module())
+            except Exception as e:
+                # Missing dependencies surface as more than ImportError at module import
+                logger.warning(f"{name} engine unavailable: {type(e).__name__}: {e}")
+
+    @classmethod
+    def loaded(cls) -> List[TTSEngine]:
+        return [engine for engine in cls.engines.values() if engine.loaded()]
+
+
+EngineRegistry.load(UNIFIED_ENGINES)
+
+router = EngineRouter(
+    {k: v / 1000 for k, v in UNIFIED_PRIOR_TTFA_MS.items()}, UNIFIED_TTFA_ALPHA, UNIFIED_TTFA_HALF_LIFE_S
+)
+
+
+def select_engines(user_id: str, language: str, data: Dict[str, Any]) -> Tuple[List[TTSEngine], Optional[str]]:
+    """Engines to try for one utterance, in order; or an error message"""
+    forced = data.get("engine")
+    if forced:
+        engine = EngineRegistry.engines.get(forced)
+        if engine is None or not engine.loaded():
+            return [], f"Engine not available: {forced}"
+        return [engine], None
+
+    tier = data.get("quality", "balanced")
+    if tier not in TIERS:
+        return [], f"quality must be one of {TIERS}"
+    budget_ms = float(data.get("latency_budget_ms", UNIFIED_LATENCY_BUDGET_MS))
+
+    engines = [e for e in EngineRegistry.loaded() if e.supports(language)]
+    if not engines:
+        return [], f"Unsupported language: {language}"
+    engines = [e for e in engines if e.is_enrolled(user_id)]
+    if not engines:
+        return [], "User not enrolled"
+
+    candidates = [Candidate(e.name, e.quality, e.wait_s(), e.saturated()) for e in engines]
+    order = router.choose(candidates, language, budget_ms / 1000, tier)
+    if not order:
+        return [], "overloaded"
+    return [EngineRegistry.engines[name] for name in order], None
+
+
+# ===========================================
+# Lifespan
+# ===========================================
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start every engine (its server's own lifespan); an engine that fails to start is disabled"""
+    logger.info("=" * 60)
+    logger.info(f"EUM AI Server (unified): engines={list(EngineRegistry.engines)}")
+    logger.info("=" * 60)
+
+    async with AsyncExitStack() as stack:
+        for name, engine in list(EngineRegistry.engines.items()):
+            logger.info(f"Starting engine: {name}")
+            try:
+                await stack.enter_async_context(engine.lifespan())
+            except Exception as e:
+                logger.error(f"Engine {name} failed to start, disabled: {e}")
+                del EngineRegistry.engines[name]
+
+        if not EngineRegistry.engines:
+            raise RuntimeError("No TTS engine available")
+
+        logger.info("Server ready!")
+        yield
+        logger.info("Shutting down...")
+
+
+# ===========================================
+# FastAPI App
+# ===========================================
+app = FastAPI(
+    title="EUM AI Server",
+    description="Real-time Voice Cloning TTS (XTTS v2 + OpenVoice V2)",
+    version="3.0.0",
+    lifespan=lifespan
+)
+
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
+
+# ===========================================
+# Models
+# ===========================================
+class EnrollResponse(BaseModel):
+    success: bool
+    message: str
+    user_id: str
+    engines: Dict[str, Dict[str, Any]] = {}
+
+
+# ===========================================
+# Endpoints
+# ===========================================
+@app.get("/health")
+async def health_check():
+    return {
+        "status": "healthy",
+        "version": "3.0.0",
+        "engines": {engine.name: engine.loaded() for engine in EngineRegistry.engines.values()},
+    }
+
+
+@app.get("/admin/engines")
+async def engine_status():
+    """Per-engine queue state and the router's TTFA statistics"""
+    return {
+        "engines": {
+            engine.name: {
+                "loaded": engine.loaded(),
+                "quality": engine.quality,
+                "wait_ms": round(engine.wait_s() * 1000, 1),
+                "saturated": engine.saturated(),
+                "stats": engine.stats(),
+            }
+            for engine in EngineRegistry.engines.values()
+        },
+        "latency_budget_ms": UNIFIED_LATENCY_BUDGET_MS,
+        "router": router.stats(),
+    }
+
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    """Prometheus metrics"""
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+
+@app.post("/enroll/{user_id}", response_model=EnrollResponse)
+async def enroll_voice(user_id: str, audio: UploadFile = File(...)):
+    """Enroll user voice on every loaded engine (one shared DeepFilterNet model, if available)"""
+    engines = EngineRegistry.loaded()
+    if not engines:
+        raise HTTPException(status_code=503, detail="Model not loaded")
+
+    logger.info(f"Enrolling voice for user: {user_id} on {[e.name for e in engines]}")
+
+    raw_audio, orig_sr = AudioProcessor.load_upload(await audio.read(), audio.filename)
+
+    results = await asyncio.gather(
+        *[engine.enroll(user_id, raw_audio, orig_sr) for engine in engines], return_exceptions=True
+    )
+
+    report = {}
+    for engine, result in zip(engines, results):
+        if isinstance(result, Exception):
+            logger.error(f"Enrollment on {engine.name} failed for {user_id}: {result}")
+            report[engine.name] = {"ok": False, "error": str(result)}
+        else:
+            report[engine.name] = {"ok": True, **result}
+
+    if not any(r["ok"] for r in report.values()):
+        raise HTTPException(status_code=500, detail=report)
+
+    return EnrollResponse(
+        success=True,
+        message=f"Voice enrolled for {user_id}",
+        user_id=user_id,
+        engines=report
+    )
+
+
+@app.delete("/enroll/{user_id}")
+async def delete_enrollment(user_id: str):
+    deleted = []
+    for engine in EngineRegistry.engines.values():
+        if engine.is_enrolled(user_id):
+            engine.delete(user_id)
+            deleted.append(engine.name)
+
+    if not deleted:
+        raise HTTPException(status_code=404, detail="User not enrolled")
+
+    logger.info(f"Deleted: {user_id} ({deleted})")
+    return {"success": True, "engines": deleted}
+
+
+@app.websocket("/ws/tts/{user_id}")
+async def websocket_tts(websocket: WebSocket, user_id: str):
+    """
+    Real-time TTS streaming; the engine is chosen per utterance.
+
+    Query params: ?format=float32|pcm16|opus&sample_rate=16000 (optional)
+                  ?meeting_id=... (fair-share tenant, defaults to user_id)
+    Config message: {"type": "config", "format": "pcm16", "sample_rate": 16000}
+    Text message: {"text": "...", "language": "ko", "trace": false}
+                  Optional routing: "latency_budget_ms": 800 (first audio),
+                  "quality": "fast" | "balanced" | "high",
+                  "engine": "xtts" | "openvoice" (skips routing).
+                  Engine options pass through (e.g. XTTS "chunk_schedule").
+    Sends: Binary audio chunks (negotiated format) + {"status": "complete"}
+           (with "trace": true, {"status": "routed", "engine": ...} first)
+    """
+    await websocket.accept()
+    logger.info(f"WebSocket connected: {user_id}")
+
+    encoder = await open_encoder(websocket, SAMPLE_RATE_OUTPUT)
+    if encoder is None:
+        return
+
+    if not EngineRegistry.loaded():
+        await websocket.send_json({"error": "Model not loaded"})
+        await websocket.close(code=4002)
+        return
+
+    tenant = websocket.query_params.get("meeting_id") or user_id
+    record_session = traffic_recorder.new_session() if traffic_recorder.enabled else None
+
+    try:
+        while True:
+            data = await websocket.receive_json()
+
+            # Output format negotiation
+            if data.get("type") == "config":
+                encoder = await configure_encoder(websocket, data, encoder, SAMPLE_RATE_OUTPUT)
+                continue
+
+            text = data.get("text", "")
+            language = data.get("language", "ko")
+
+            if not text:
+                await websocket.send_json({"error": "Empty text"})
+                continue
+
+            traffic_recorder.record("text", "ws", user_id, record_session, language, text)
+
+            engines, error = select_engines(user_id, language, data)
+            if error:
+                await websocket.send_json({"error": error})
+                continue
+
+            logger.info(f"TTS: user={user_id}, lang={language}, engine={engines[0].name}, text={text[:50]}...")
+
+            for attempt, engine in enumerate(engines):
+                current_request.set(None)
+                if data.get("trace"):
+                    await websocket.send_json({"status": "routed", "engine": engine.name})
+                try:
+                    await engine.stream(websocket, encoder, user_id, text, language, data, tenant)
+                except WebSocketDisconnect:
+                    raise
+                except Exception as e:
+                    timer = current_request.get()
+                    if (timer is not None and timer.first_audio is not None) or attempt == len(engines) - 1:
+                        logger.error(f"TTS error ({engine.name}): {e}")
+                        await websocket.send_json({"error": str(e)})
+                        break
+                    # Nothing sent yet: the client can't tell, try the next engine
+                    logger.warning(f"{engine.name} failed before first audio, failing over: {e}")
+                    continue
+
+                timer = current_request.get()
+                router.record(engine.name, language, timer.first_audio if timer is not None else None)
+                router.count(engine.name, failover=attempt > 0)
+                record_engine_route(engine.name, failover=attempt > 0)
+                break
+
+    except WebSocketDisconnect:
+        logger.info(f"Disconnected: {user_id}")
+    except Exception as e:
+        logger.error(f"WebSocket error: {e}")
+        await websocket.close(code=4000)
+
+
+# ===========================================
+# Main
+# ===========================================
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run("server_unified:app", host="0.0.0.0", port=8000, reload=False)
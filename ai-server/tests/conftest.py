@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Server modules live in ai-server/ (not a package)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,47 @@
+"""AudioEncoder state across the chunks of an utterance (resampler, reset after a failure)."""
+
+import numpy as np
+import pytest
+
+for _dependency in ("soxr", "librosa", "soundfile", "loguru"):
+    pytest.importorskip(_dependency)
+
+import soxr  # noqa: E402
+
+from audio_codec import AudioEncoder  # noqa: E402
+
+SOURCE_RATE = 24000
+
+
+def speech(seconds: float, seed: int = 0) -> np.ndarray:
+    return np.random.default_rng(seed).uniform(-0.5, 0.5, int(SOURCE_RATE * seconds)).astype(np.float32)
+
+
+def stream(encoder: AudioEncoder, audio: np.ndarray, chunk: int) -> bytes:
+    parts = [encoder.encode(audio[i:i + chunk]) for i in range(0, len(audio), chunk)]
+    return b"".join(parts) + encoder.flush()
+
+
+@pytest.mark.parametrize("sample_rate", [16000, 48000])
+def test_chunked_matches_one_shot_resample(sample_rate):
+    audio = speech(1.0)
+    expected = soxr.ResampleStream(SOURCE_RATE, sample_rate, 1, dtype="float32", quality="HQ")
+    expected = expected.resample_chunk(audio, last=True)
+
+    wire = stream(AudioEncoder("float32", SOURCE_RATE, sample_rate), audio, chunk=1234)
+    np.testing.assert_allclose(np.frombuffer(wire, dtype="<f4"), expected, atol=1e-6)
+
+
+def test_reset_drops_a_failed_utterance():
+    encoder = AudioEncoder("pcm16", SOURCE_RATE, 16000)
+    encoder.encode(speech(0.3, seed=1))  # Utterance fails after this chunk
+    encoder.reset()
+
+    audio = speech(0.5, seed=2)
+    assert stream(encoder, audio, chunk=999) == stream(AudioEncoder("pcm16", SOURCE_RATE, 16000), audio, chunk=999)
+
+
+def test_flush_ends_the_utterance():
+    encoder = AudioEncoder("pcm16", SOURCE_RATE, 16000)
+    first = stream(encoder, speech(0.5, seed=3), chunk=700)
+    assert stream(encoder, speech(0.5, seed=3), chunk=700) == first
@@ -0,0 +1,88 @@
+"""
+Windowed tone conversion (TTSPipeline.convert_audio_streaming) against the
+one-shot TTSPipeline.convert_audio.
+
+The server runs on the benchmark stubs with an identity converter: the
+"spectrogram" frames are the hop-sized sample blocks and voice_conversion
+lays them back out. Each output frame then depends on its input frame
+only, so the crossfaded windows must reproduce the one-shot output exactly.
+"""
+
+import importlib
+
+import numpy as np
+import pytest
+
+for _dependency in ("torch", "fastapi", "librosa", "soundfile", "soxr", "boto3", "requests"):
+    pytest.importorskip(_dependency)
+
+from benchmarks import stubs  # noqa: E402
+
+SAMPLE_RATE = stubs.CONVERTER_SAMPLE_RATE
+HOP = stubs.CONVERTER_HOP
+
+
+def frame_spectrogram(y, n_fft, sampling_rate, hop_size, win_size, center=False):
+    """spectrogram_torch stand-in: frame f holds samples [f * hop, (f + 1) * hop)"""
+    frames = (y.size(-1) - n_fft) // hop_size + 1
+    return y[:, :frames * hop_size].reshape(y.size(0), frames, hop_size).transpose(1, 2)
+
+
+class IdentityConverterModel:
+    def voice_conversion(self, spec, spec_lengths, sid_src, sid_tgt, tau=0.3):
+        return spec.transpose(1, 2).reshape(1, 1, -1), None, None
+
+
+@pytest.fixture(scope="module")
+def ov():
+    stubs.install()
+    return importlib.import_module("server_openvoice_v2")
+
+
+@pytest.fixture
+def pipeline(ov, monkeypatch):
+    converter = stubs.StubToneColorConverter()
+    converter.model = IdentityConverterModel()
+    monkeypatch.setattr(ov, "tone_color_converter", converter)
+    monkeypatch.setattr(ov, "spectrogram_torch", frame_spectrogram)
+    return ov.TTSPipeline
+
+
+def speech(seconds: float) -> np.ndarray:
+    return np.random.default_rng(0).uniform(-0.5, 0.5, int(SAMPLE_RATE * seconds)).astype(np.float32)
+
+
+@pytest.mark.parametrize("window_frames, overlap_frames", [(128, 16), (40, 8), (64, 0), (16, 15), (1000, 16)])
+def test_streamed_matches_one_shot(pipeline, window_frames, overlap_frames):
+    audio = speech(3.0)
+    one_shot, sample_rate = pipeline.convert_audio(audio, SAMPLE_RATE, None, None)
+
+    chunks = list(pipeline.convert_audio_streaming(
+        audio, SAMPLE_RATE, None, None, window_frames=window_frames, overlap_frames=overlap_frames
+    ))
+    streamed = np.concatenate(chunks)
+
+    assert sample_rate == SAMPLE_RATE
+    assert len(streamed) == len(one_shot)
+    np.testing.assert_allclose(streamed, one_shot, atol=1e-6)
+
+    # One window, then one per step until the last window reaches the end
+    frames = len(one_shot) // HOP
+    step = window_frames - overlap_frames
+    assert len(chunks) == 1 + max(0, -(-(frames - window_frames) // step))
+
+
+def test_first_chunk_is_one_window(pipeline):
+    """Audio goes out after the first window, not after the whole sentence"""
+    chunks = pipeline.convert_audio_streaming(speech(3.0), SAMPLE_RATE, None, None, window_frames=32, overlap_frames=8)
+    assert len(next(chunks)) == (32 - 8) * HOP
+
+
+@pytest.mark.parametrize("window_frames, overlap_frames", [(16, 16), (16, 32), (16, -1), (0, 0)])
+def test_overlap_must_be_below_window(pipeline, window_frames, overlap_frames):
+    with pytest.raises(ValueError):
+        pipeline.check_convert_windows(window_frames, overlap_frames)
+    with pytest.raises(ValueError):
+        next(pipeline.convert_audio_streaming(
+            speech(1.0), SAMPLE_RATE, None, None, window_frames=window_frames, overlap_frames=overlap_frames
+        ))
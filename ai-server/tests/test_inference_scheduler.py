@@ -0,0 +1,34 @@
+"""InferenceScheduler queue accounting: callers that go away while queued stop counting."""
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from inference_scheduler import InferenceScheduler, JobInfo, Priority
+
+BATCH = JobInfo(priority=Priority.BATCH, tenant="summary")
+
+
+def test_cancelled_jobs_leave_the_queue_depth():
+    async def scenario():
+        release = threading.Event()
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            scheduler = InferenceScheduler(executor, slots=1)
+            running = asyncio.ensure_future(scheduler.run(release.wait, job=BATCH))
+            queued = [asyncio.ensure_future(scheduler.run(lambda: None, job=BATCH)) for _ in range(3)]
+            await asyncio.sleep(0)
+            assert scheduler.queue_depth(Priority.BATCH) == 3
+
+            queued[0].cancel()
+            queued[1].cancel()
+            await asyncio.sleep(0)
+            assert scheduler.queue_depth(Priority.BATCH) == 1
+            assert scheduler.queue_depth() == 1
+            assert scheduler.stats()["classes"]["batch"]["queued"] == 1
+
+            release.set()
+            await running
+            await queued[2]
+            assert scheduler.queue_depth() == 0
+
+    asyncio.run(scenario())
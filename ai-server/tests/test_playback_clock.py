@@ -0,0 +1,38 @@
+"""PlaybackClock: per-sentence deadlines from when each sentence is due for playback."""
+
+import time
+
+import pytest
+
+from inference_scheduler import JobInfo, PlaybackClock, Priority, job_with_deadline
+
+
+def test_first_sentence_keeps_the_message_deadline():
+    job = job_with_deadline(Priority.LIVE, "meeting", 2000)
+    clock = PlaybackClock(job)
+    assert clock.job().deadline == pytest.approx(job.deadline)
+
+
+def test_later_sentences_are_due_after_the_audio_before_them():
+    clock = PlaybackClock(job_with_deadline(Priority.LIVE, "meeting", 2000))
+    first = clock.job().deadline
+
+    clock.sent(30.0)
+    assert clock.job().deadline == pytest.approx(first + 30.0, abs=0.05)
+    assert clock.job(ahead_s=4.0).deadline == pytest.approx(first + 34.0, abs=0.05)
+
+
+def test_text_arriving_after_playback_ended_is_due_on_arrival():
+    clock = PlaybackClock(job_with_deadline(Priority.LIVE, "meeting", 2000))
+    clock.sent(0.01)
+    time.sleep(0.02)
+
+    ready = time.monotonic()
+    assert clock.job(ready).deadline == pytest.approx(ready + 2.0)
+
+
+def test_no_deadline_stays_unbounded():
+    job = JobInfo(priority=Priority.LIVE, tenant="meeting")
+    clock = PlaybackClock(job)
+    clock.sent(5.0)
+    assert clock.job(ahead_s=1.0) == job
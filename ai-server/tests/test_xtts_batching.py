@@ -0,0 +1,229 @@
+"""
+ContinuousBatchDecoder against a reference decode on a tiny GPT.
+
+ToyGPT.get_generator follows coqui's generate_stream (greedy): the whole
+sequence is re-run every step (no KV cache), the repetition penalty covers
+every input id (fake prefix ids included) and the stop token's latent is
+yielded. The batched decoder must produce the same tokens and latents,
+with several sequences of different prefix lengths sharing its steps.
+"""
+
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from xtts_batching import FAKE_INPUT_ID, ContinuousBatchDecoder  # noqa: E402
+
+DIM = 16
+TEXT_VOCAB = 32
+MEL_VOCAB = 12
+START_AUDIO = 10
+STOP_AUDIO = 11
+COND_LEN = 4
+MAX_MEL_TOKENS = 24
+
+SAMPLING = dict(top_k=50, top_p=0.85, temperature=0.75, do_sample=False, repetition_penalty=10.0)
+
+
+class Positions(torch.nn.Module):
+    """LearnedPositionEmbeddings: called on a sequence, or one fixed position"""
+
+    def __init__(self, positions: int):
+        super().__init__()
+        self.emb = torch.nn.Embedding(positions, DIM)
+
+    def forward(self, x):
+        return self.emb(torch.arange(x.shape[1], device=x.device))
+
+    def get_fixed_embedding(self, ind, dev):
+        return self.emb(torch.tensor([ind], device=dev)).unsqueeze(0)
+
+
+class ToyTransformer(torch.nn.Module):
+    """One causal attention layer with a KV cache and a padding mask"""
+
+    def __init__(self):
+        super().__init__()
+        self.query = torch.nn.Linear(DIM, DIM)
+        self.key = torch.nn.Linear(DIM, DIM)
+        self.value = torch.nn.Linear(DIM, DIM)
+        self.delay_s = 0.0  # Slows steps down so concurrent streams overlap
+
+    def forward(self, inputs_embeds, past_key_values=None, attention_mask=None, **kwargs):
+        time.sleep(self.delay_s)
+        steps = inputs_embeds.shape[1]
+        query = self.query(inputs_embeds).unsqueeze(1)  # [batch, 1 head, steps, dim]
+        key = self.key(inputs_embeds).unsqueeze(1)
+        value = self.value(inputs_embeds).unsqueeze(1)
+        if past_key_values is not None:
+            key = torch.cat([past_key_values[0][0], key], dim=2)
+            value = torch.cat([past_key_values[0][1], value], dim=2)
+        total = key.shape[2]
+
+        scores = query @ key.transpose(-1, -2) / math.sqrt(DIM)
+        positions = torch.arange(total - steps, total).unsqueeze(1)
+        allowed = torch.arange(total).unsqueeze(0) <= positions  # [steps, total]
+        if attention_mask is not None:
+            allowed = allowed & attention_mask.bool()[:, None, None, :]
+        scores = scores.masked_fill(~allowed, float("-inf"))
+
+        hidden = inputs_embeds + (scores.softmax(dim=-1) @ value).squeeze(1)
+        return SimpleNamespace(last_hidden_state=hidden, past_key_values=((key, value),))
+
+
+class ToyInference(torch.nn.Module):
+    """GPT2InferenceModel's parts the batched decoder drives"""
+
+    def __init__(self):
+        super().__init__()
+        self.transformer = ToyTransformer()
+        self.embeddings = torch.nn.Embedding(MEL_VOCAB, DIM)
+        self.pos_embedding = Positions(MAX_MEL_TOKENS + 2)
+        self.lm_head = torch.nn.Linear(DIM, MEL_VOCAB)
+        self.final_norm = torch.nn.LayerNorm(DIM)
+
+
+class ToyGPT(torch.nn.Module):
+    start_text_token = 0
+    stop_text_token = 1
+    start_audio_token = START_AUDIO
+    stop_audio_token = STOP_AUDIO
+    max_gen_mel_tokens = MAX_MEL_TOKENS
+
+    def __init__(self):
+        super().__init__()
+        self.gpt_inference = ToyInference()
+        self.text_embedding = torch.nn.Embedding(TEXT_VOCAB, DIM)
+        self.text_pos_embedding = Positions(64)
+        self.prefix_emb = None
+
+    def compute_embeddings(self, cond_latents, text_inputs):
+        text_inputs = torch.nn.functional.pad(text_inputs, (0, 1), value=self.stop_text_token)
+        text_inputs = torch.nn.functional.pad(text_inputs, (1, 0), value=self.start_text_token)
+        emb = self.text_embedding(text_inputs) + self.text_pos_embedding(text_inputs)
+        self.prefix_emb = torch.cat([cond_latents, emb], dim=1)
+        fake_inputs = torch.full((1, self.prefix_emb.shape[1] + 1), fill_value=1, dtype=torch.long)
+        fake_inputs[:, -1] = self.start_audio_token
+        return fake_inputs
+
+    def get_generator(self, fake_inputs, repetition_penalty=1.0, **kwargs):
+        """Reference greedy generate_stream: full forward per step, yields (token, latent)"""
+        inference = self.gpt_inference
+        prefix_len = self.prefix_emb.shape[1]
+        max_length = self.max_gen_mel_tokens + fake_inputs.shape[-1]
+        input_ids = fake_inputs
+
+        while True:
+            gen_ids = input_ids[:, prefix_len:]
+            gen_emb = inference.embeddings(gen_ids) + inference.pos_embedding(gen_ids)
+            emb = torch.cat([self.prefix_emb, gen_emb], dim=1)
+            hidden = inference.transformer(inputs_embeds=emb).last_hidden_state
+            logits = inference.lm_head(hidden)[:, -1, :]
+
+            # RepetitionPenaltyLogitsProcessor: every input id, fake prefix ids included
+            score = logits.gather(1, input_ids)
+            score = torch.where(score < 0, score * repetition_penalty, score / repetition_penalty)
+            logits = logits.scatter(1, input_ids, score)
+
+            token = logits.argmax(dim=-1)
+            input_ids = torch.cat([input_ids, token[:, None]], dim=-1)
+            yield token, inference.final_norm(hidden[:, -1])
+            if token.item() == self.stop_audio_token or input_ids.shape[-1] >= max_length:
+                return
+
+
+def make_gpt(seed: int = 0) -> ToyGPT:
+    torch.manual_seed(seed)
+    return ToyGPT().eval()
+
+
+def make_inputs(text_len: int, seed: int):
+    generator = torch.Generator().manual_seed(seed)
+    cond = torch.randn(1, COND_LEN, DIM, generator=generator)
+    text = torch.randint(2, TEXT_VOCAB, (1, text_len), generator=generator)
+    return cond, text
+
+
+def reference(gpt: ToyGPT, cond, text):
+    with torch.no_grad():
+        fake_inputs = gpt.compute_embeddings(cond, text)
+        return [(int(token), latent) for token, latent in gpt.get_generator(fake_inputs, **SAMPLING)]
+
+
+def batched(decoder: ContinuousBatchDecoder, cond, text):
+    return [(int(token), latent) for token, latent in decoder.generate(cond, text, **SAMPLING)]
+
+
+def assert_same(expected, actual):
+    assert [token for token, _ in actual] == [token for token, _ in expected]
+    for (_, want), (_, got) in zip(expected, actual):
+        torch.testing.assert_close(got, want, atol=1e-5, rtol=1e-5)
+
+
+@pytest.fixture
+def gpt():
+    return make_gpt()
+
+
+@pytest.fixture
+def decoder(gpt):
+    decoder = ContinuousBatchDecoder(gpt, max_batch=4)
+    yield decoder
+    decoder.stop()
+
+
+def test_single_sequence_matches_reference(gpt, decoder):
+    cond, text = make_inputs(7, seed=1)
+    assert_same(reference(gpt, cond, text), batched(decoder, cond, text))
+
+
+def test_concurrent_sequences_match_reference(gpt, decoder):
+    """Different prefix lengths share steps (left-padded KV caches)"""
+    with torch.no_grad():
+        gpt.gpt_inference.lm_head.bias[STOP_AUDIO] = -1e4  # Run to max_gen_mel_tokens, so streams overlap
+    inputs = [make_inputs(text_len, seed) for seed, text_len in enumerate((3, 9, 5, 12, 6, 2))]
+    expected = [reference(gpt, cond, text) for cond, text in inputs]
+
+    gpt.gpt_inference.transformer.delay_s = 0.005
+    with ThreadPoolExecutor(max_workers=len(inputs)) as pool:
+        actual = list(pool.map(lambda args: batched(decoder, *args), inputs))
+
+    for want, got in zip(expected, actual):
+        assert_same(want, got)
+    assert decoder.stats()["avg_batch"] > 1
+
+
+def test_stop_token_latent_is_yielded(gpt, decoder):
+    """The stop token comes out with its latent, like generate_stream"""
+    with torch.no_grad():
+        gpt.gpt_inference.lm_head.weight.zero_()
+        gpt.gpt_inference.lm_head.bias.zero_()
+        gpt.gpt_inference.lm_head.bias[STOP_AUDIO] = 5.0
+
+    cond, text = make_inputs(4, seed=2)
+    expected = reference(gpt, cond, text)
+    actual = batched(decoder, cond, text)
+
+    assert [token for token, _ in actual] == [STOP_AUDIO]
+    assert_same(expected, actual)
+
+
+def test_fake_prefix_ids_are_penalized(gpt, decoder):
+    """The fake prefix ids count as seen for the repetition penalty"""
+    with torch.no_grad():
+        gpt.gpt_inference.lm_head.weight.zero_()
+        gpt.gpt_inference.lm_head.bias.zero_()
+        gpt.gpt_inference.lm_head.bias[FAKE_INPUT_ID] = 2.0  # 0.2 once penalized
+        gpt.gpt_inference.lm_head.bias[3] = 1.0
+
+    cond, text = make_inputs(4, seed=3)
+    expected = reference(gpt, cond, text)
+    actual = batched(decoder, cond, text)
+
+    assert actual[0][0] == 3
+    assert_same(expected, actual)
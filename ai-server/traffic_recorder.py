@@ -0,0 +1,108 @@
+"""
+Opt-in recorder of anonymized request shapes (JSONL), for capacity planning
+and regression tests with real arrival patterns (replay: benchmarks/replay.py).
+
+Enabled by TRAFFIC_RECORD_PATH. One line per request event:
+
+    {"t": 1760770000.123, "event": "text", "endpoint": "ws", "session": "9f2c...",
+     "user": "51ab...", "language": "ko", "chars": 18, "text": "c0de..."}
+
+- t:        arrival time (unix seconds)
+- event:    text | append | flush | end (WebSocket messages), file (POST /tts/file),
+            batch (one per item of POST /tts/batch)
+- session:  per-connection id (replay reuses one connection per session);
+            per-request id for batch items
+- user:     salted hash of user_id
+- chars:    text length
+- text:     salted hash of the text, only with TRAFFIC_RECORD_TEXT_HASH=1
+            (lets a replay reproduce repeated utterances, e.g. for cache hits)
+
+No text or user_id is written. Set TRAFFIC_RECORD_SALT so hashes cannot be
+matched against a dictionary of common phrases. Each record is one append
+write, so pre-forked workers can share a file.
+"""
+
+import os
+import json
+import time
+import uuid
+import hashlib
+import threading
+from typing import Optional
+
+from loguru import logger
+
+TRAFFIC_RECORD_PATH = os.getenv("TRAFFIC_RECORD_PATH", "")
+TRAFFIC_RECORD_SALT = os.getenv("TRAFFIC_RECORD_SALT", "")
+TRAFFIC_RECORD_TEXT_HASH = os.getenv("TRAFFIC_RECORD_TEXT_HASH", "0") == "1"
+
+HASH_BYTES = 8
+
+
+class TrafficRecorder:
+    """Appends request shapes to a JSONL file (no-op when path is empty)"""
+
+    def __init__(self, path: str = "", salt: str = "", hash_text: bool = False):
+        self.path = path
+        self.salt = salt.encode()
+        self.hash_text = hash_text
+        self._lock = threading.Lock()
+        self._file = None
+
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            logger.info(f"Traffic recording enabled: {path} (text hash: {hash_text})")
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path)
+
+    def _hash(self, value: str) -> str:
+        return hashlib.blake2b(value.encode(), key=self.salt[:64], digest_size=HASH_BYTES).hexdigest()
+
+    @staticmethod
+    def new_session() -> str:
+        return uuid.uuid4().hex[:HASH_BYTES * 2]
+
+    def record(
+        self,
+        event: str,
+        endpoint: str,
+        user_id: str,
+        session: Optional[str] = None,
+        language: Optional[str] = None,
+        text: Optional[str] = None,
+    ):
+        if not self.path:
+            return
+
+        entry = {
+            "t": round(time.time(), 3),
+            "event": event,
+            "endpoint": endpoint,
+            "session": session,
+            "user": self._hash(user_id),
+            "language": language,
+            "chars": len(text) if text is not None else None,
+        }
+        if self.hash_text and text:
+            entry["text"] = self._hash(text)
+
+        line = json.dumps(entry, separators=(",", ":")) + "\n"
+        try:
+            with self._lock:
+                if self._file is None:
+                    # Line buffered append: one write() per record
+                    self._file = open(self.path, "a", buffering=1, encoding="utf-8")
+                self._file.write(line)
+        except OSError as e:
+            logger.warning(f"Traffic record failed: {e}")
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+traffic_recorder = TrafficRecorder(TRAFFIC_RECORD_PATH, TRAFFIC_RECORD_SALT, TRAFFIC_RECORD_TEXT_HASH)
@@ -0,0 +1,178 @@
+"""
+Audio and socket code shared by the TTS servers (server.py,
+server_openvoice_v2.py, server_unified.py).
+
+- DeepFilter:     DeepFilterNet, loaded once per process (the unified
+                  server's engines share one instance)
+- AudioProcessor: enrollment audio loading / resampling / enhancement
+                  (each server subclasses it for its own output rate)
+- open_encoder / configure_encoder: WebSocket output format negotiation
+"""
+
+import os
+import tempfile
+from typing import Any, Dict, Optional, Tuple
+
+import torch
+import numpy as np
+import librosa
+from loguru import logger
+
+from audio_codec import AudioEncoder
+from metrics import model_load_timer, stage_timer
+
+# ===========================================
+# DeepFilterNet Import
+# ===========================================
+DEEPFILTERNET_AVAILABLE = False
+df_enhance = None
+df_init_df = None
+
+try:
+    from df import enhance as df_enhance, init_df as df_init_df
+    DEEPFILTERNET_AVAILABLE = True
+    logger.info("DeepFilterNet imported successfully!")
+except ImportError as e:
+    logger.warning(f"DeepFilterNet ImportError: {e}")
+except OSError as e:
+    logger.warning(f"DeepFilterNet OSError (missing system library?): {e}")
+except Exception as e:
+    logger.warning(f"DeepFilterNet import failed with {type(e).__name__}: {e}")
+
+# ===========================================
+# Configuration
+# ===========================================
+SAMPLE_RATE_DF = 48000  # DeepFilterNet requires 48kHz
+
+
+# ===========================================
+# DeepFilterNet
+# ===========================================
+class DeepFilter:
+    """The process-wide DeepFilterNet model (None until load() succeeds)"""
+
+    model: Optional[Any] = None
+    state: Optional[Any] = None
+
+    @classmethod
+    def load(cls) -> bool:
+        """Load once; later calls (another engine's startup) reuse the instance"""
+        if cls.model is not None:
+            return True
+        if not DEEPFILTERNET_AVAILABLE:
+            return False
+
+        logger.info("Loading DeepFilterNet...")
+        try:
+            with model_load_timer("deepfilternet"):
+                cls.model, cls.state, _ = df_init_df()
+            logger.info("DeepFilterNet loaded!")
+        except Exception as e:
+            logger.warning(f"DeepFilterNet load failed: {e}")
+            cls.model = None
+            cls.state = None
+        return cls.model is not None
+
+    @classmethod
+    def loaded(cls) -> bool:
+        return cls.model is not None
+
+
+# ===========================================
+# Audio Processing Utilities
+# ===========================================
+class AudioProcessor:
+    """Audio processing for enrollment"""
+
+    @staticmethod
+    def resample_audio(
+        audio: np.ndarray,
+        orig_sr: int,
+        target_sr: int,
+        res_type: str = "kaiser_best"
+    ) -> np.ndarray:
+        """Resample audio using librosa"""
+        if orig_sr == target_sr:
+            return audio
+        logger.debug(f"Resampling {orig_sr}Hz -> {target_sr}Hz")
+        return librosa.resample(audio, orig_sr=orig_sr, target_sr=target_sr, res_type=res_type)
+
+    @staticmethod
+    def enhance_with_deepfilter(audio: np.ndarray, sample_rate: int) -> Tuple[np.ndarray, int]:
+        """
+        Apply DeepFilterNet noise reduction.
+
+        Returns the enhanced audio at SAMPLE_RATE_DF, or the input unchanged
+        if DeepFilterNet is not loaded or fails.
+        """
+        if DeepFilter.model is None:
+            logger.warning("DeepFilterNet not available")
+            return audio.astype(np.float32), sample_rate
+
+        try:
+            audio = audio.astype(np.float32)
+
+            # Resample to 48kHz for DeepFilterNet
+            audio_48k = AudioProcessor.resample_audio(audio, sample_rate, SAMPLE_RATE_DF)
+
+            # DeepFilterNet expects a torch.Tensor [1, samples]
+            audio_tensor = torch.from_numpy(audio_48k).unsqueeze(0)
+
+            logger.debug("Applying DeepFilterNet...")
+            with stage_timer("deepfilternet"):
+                enhanced_tensor = df_enhance(DeepFilter.model, DeepFilter.state, audio_tensor)
+
+            if isinstance(enhanced_tensor, torch.Tensor):
+                enhanced_48k = enhanced_tensor.squeeze().numpy()
+            else:
+                enhanced_48k = np.array(enhanced_tensor)
+
+            logger.info("DeepFilterNet enhancement successful!")
+            return enhanced_48k.astype(np.float32), SAMPLE_RATE_DF
+
+        except Exception as e:
+            logger.error(f"DeepFilterNet enhancement failed: {e}. Using raw audio.")
+            return audio.astype(np.float32), sample_rate
+
+    @staticmethod
+    def load_audio(file_path: str) -> Tuple[np.ndarray, int]:
+        """Load audio file (mono float32, native rate)"""
+        audio, sr = librosa.load(file_path, sr=None, mono=True)
+        return audio.astype(np.float32), sr
+
+    @staticmethod
+    def load_upload(data: bytes, filename: Optional[str] = None) -> Tuple[np.ndarray, int]:
+        """Decode uploaded audio bytes (via a temp file, keeping the extension for the decoder)"""
+        suffix = os.path.splitext(filename)[1] if filename else ".wav"
+        temp_audio_path = None
+        try:
+            with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as f:
+                f.write(data)
+                temp_audio_path = f.name
+            return AudioProcessor.load_audio(temp_audio_path)
+        finally:
+            if temp_audio_path and os.path.exists(temp_audio_path):
+                os.unlink(temp_audio_path)
+
+
+# ===========================================
+# WebSocket Output Format Negotiation
+# ===========================================
+async def open_encoder(websocket, source_rate: int) -> Optional[AudioEncoder]:
+    """Encoder from the connection's query params; on a bad request sends the error and closes (4003)"""
+    try:
+        return AudioEncoder.from_params(dict(websocket.query_params), source_rate)
+    except ValueError as e:
+        await websocket.send_json({"error": str(e)})
+        await websocket.close(code=4003)
+        return None
+
+
+async def configure_encoder(websocket, data: Dict[str, Any], encoder: AudioEncoder, source_rate: int) -> AudioEncoder:
+    """Handle a {"type": "config"} message: the new encoder, or the old one after sending the error"""
+    try:
+        encoder = AudioEncoder.from_params(data, source_rate)
+        await websocket.send_json({"status": "configured", **encoder.describe()})
+    except ValueError as e:
+        await websocket.send_json({"error": str(e)})
+    return encoder
@@ -0,0 +1,310 @@
+"""
+Continuous batching for XTTS GPT decoding.
+
+Each active XTTS stream is a sequence with its own prefix (conditioning
+latents + text), KV cache and sampling state. One decoder thread steps all
+active sequences together:
+
+- new sequences are prefilled on their own (prefix lengths differ) and join
+  the batch at the next step
+- each step left-pads the KV caches to a common length, runs one batched
+  forward pass and hands every sequence its (token, latent)
+- sequences leave after any step (stop token, length limit, cancelled)
+
+A sequence is consumed as a (token, latent) iterator, a drop-in for
+gpt.get_generator(), so chunking and HiFi-GAN decoding stay per session.
+Mirrors GPT2InferenceModel's forward / sampling (repetition penalty,
+temperature, top-k, top-p) without its per-model prefix cache, including
+the generate_stream details that change the output:
+
+- the stop token's (token, latent) is yielded too (HiFi-GAN decodes it)
+- the repetition penalty covers the whole input, i.e. also the fake
+  prefix ids (FAKE_INPUT_ID) and the start token, not just sampled tokens
+"""
+
+import time
+import queue
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import torch
+import torch.nn.functional as F
+from loguru import logger
+
+from metrics import observe_batch, observe_stage
+
+_END = object()
+
+# compute_embeddings() fills the fake input ids standing for the prefix with 1
+FAKE_INPUT_ID = 1
+
+GPT_ATTRS = (
+    "gpt_inference", "text_embedding", "text_pos_embedding", "start_text_token", "stop_text_token",
+    "start_audio_token", "stop_audio_token", "max_gen_mel_tokens",
+)
+INFERENCE_ATTRS = ("transformer", "embeddings", "pos_embedding", "lm_head", "final_norm")
+
+
+class _Sequence:
+    """One stream's decoding state (owned by the decoder thread after submit)"""
+
+    def __init__(self, prefix_emb: torch.Tensor, params: Dict[str, Any], max_tokens: int):
+        self.prefix_emb = prefix_emb  # [1, prefix, dim]
+        self.params = params
+        self.max_tokens = max_tokens
+        self.out: "queue.Queue[Any]" = queue.Queue()
+        self.cancelled = False
+        self.finished = False
+        self.past: Optional[Tuple[Tuple[torch.Tensor, torch.Tensor], ...]] = None  # Per layer [1, heads, length, d]
+        self.length = 0      # Positions in the KV cache
+        self.generated = 0   # Mel tokens sampled (start token excluded)
+        self.last_token = 0
+        self.seen: Optional[torch.Tensor] = None  # [vocab] bool, for the repetition penalty
+
+
+class ContinuousBatchDecoder:
+    """Batched GPT decode steps across concurrent XTTS streams"""
+
+    def __init__(self, gpt, max_batch: int = 8):
+        self.gpt = gpt
+        self.inference = gpt.gpt_inference
+        self.max_batch = max_batch
+        self.steps = 0
+        self.stepped_sequences = 0
+        self._pending: "queue.Queue[_Sequence]" = queue.Queue()
+        self._active: List[_Sequence] = []
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="xtts-batch", daemon=True)
+        self._thread.start()
+        logger.info(f"XTTS continuous batching: max {max_batch} sequences per step")
+
+    @staticmethod
+    def supports(model) -> bool:
+        """True if model exposes the GPT internals this decoder drives"""
+        gpt = getattr(model, "gpt", None)
+        if gpt is None or not all(hasattr(gpt, name) for name in GPT_ATTRS):
+            return False
+        return all(hasattr(gpt.gpt_inference, name) for name in INFERENCE_ATTRS)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "active": len(self._active),
+            "pending": self._pending.qsize(),
+            "steps": self.steps,
+            "avg_batch": round(self.stepped_sequences / self.steps, 2) if self.steps else 0.0,
+        }
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join(timeout=5)
+
+    # ===========================================
+    # Stream side
+    # ===========================================
+    def generate(
+        self,
+        cond_latent: torch.Tensor,
+        text_tokens: torch.Tensor,
+        **params
+    ) -> Iterator[Tuple[Any, torch.Tensor]]:
+        """
+        Same contract as gpt.get_generator(gpt.compute_embeddings(cond_latent, text_tokens), ...):
+        yields (token, latent [1, dim]) per step. params: top_k, top_p, temperature,
+        do_sample, repetition_penalty. Closing the iterator cancels the sequence.
+        """
+        gpt = self.gpt
+        with torch.inference_mode():
+            text_inputs = F.pad(text_tokens, (0, 1), value=gpt.stop_text_token)
+            text_inputs = F.pad(text_inputs, (1, 0), value=gpt.start_text_token)
+            emb = gpt.text_embedding(text_inputs) + gpt.text_pos_embedding(text_inputs)
+            prefix_emb = torch.cat([cond_latent, emb], dim=1)
+
+        sequence = _Sequence(prefix_emb, params, gpt.max_gen_mel_tokens)
+        self._pending.put(sequence)
+        try:
+            while True:
+                item = sequence.out.get()
+                if item is _END:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            sequence.cancelled = True
+
+    # ===========================================
+    # Decoder thread
+    # ===========================================
+    def _run(self):
+        while not self._stopped.is_set():
+            self._admit()
+            if not self._active:
+                continue
+
+            started = time.perf_counter()
+            try:
+                with torch.inference_mode():
+                    self._step(self._active)
+            except Exception as e:
+                logger.error(f"Batched GPT step failed: {e}")
+                for sequence in self._active:
+                    sequence.out.put(e)
+                self._active = []
+                continue
+
+            observe_stage("xtts_gpt_step", time.perf_counter() - started)
+            observe_batch("xtts_gpt", len(self._active))
+            self.steps += 1
+            self.stepped_sequences += len(self._active)
+            self._active = [s for s in self._active if not s.finished and not s.cancelled]
+
+        # Stopped: release every waiting stream
+        while True:
+            try:
+                self._active.append(self._pending.get_nowait())
+            except queue.Empty:
+                break
+        for sequence in self._active:
+            sequence.out.put(RuntimeError("Batch decoder stopped"))
+        self._active = []
+
+    def _admit(self):
+        """Prefill waiting sequences into free batch slots (blocks briefly when idle)"""
+        self._active = [s for s in self._active if not s.cancelled]
+        while len(self._active) < self.max_batch:
+            try:
+                sequence = self._pending.get(timeout=0.05 if not self._active else 0)
+            except queue.Empty:
+                return
+            if sequence.cancelled:
+                continue
+            try:
+                with torch.inference_mode():
+                    self._prefill(sequence)
+            except Exception as e:
+                logger.error(f"GPT prefill failed: {e}")
+                sequence.out.put(e)
+                continue
+            if not sequence.finished:
+                self._active.append(sequence)
+
+    @staticmethod
+    def _legacy(past) -> Tuple[Tuple[torch.Tensor, torch.Tensor], ...]:
+        """Per-layer (key, value) tuples (newer transformers return a Cache object)"""
+        if hasattr(past, "to_legacy_cache"):
+            return past.to_legacy_cache()
+        return tuple((layer[0], layer[1]) for layer in past)
+
+    def _prefill(self, sequence: _Sequence):
+        """Prefix + start token for one sequence (GPT2InferenceModel's first forward)"""
+        inference = self.inference
+        start = torch.full(
+            (1, 1), self.gpt.start_audio_token, dtype=torch.long, device=sequence.prefix_emb.device
+        )
+        gen_emb = inference.embeddings(start)
+        gen_emb = gen_emb + inference.pos_embedding(gen_emb)
+        emb = torch.cat([sequence.prefix_emb.to(gen_emb.dtype), gen_emb], dim=1)
+        mask = torch.ones(1, emb.shape[1], dtype=torch.long, device=emb.device)
+
+        outputs = inference.transformer(inputs_embeds=emb, attention_mask=mask, use_cache=True, return_dict=True)
+        sequence.past = self._legacy(outputs.past_key_values)
+        sequence.length = emb.shape[1]
+        sequence.prefix_emb = None  # Only needed once
+        self._emit([sequence], outputs.last_hidden_state)
+
+    def _step(self, sequences: List[_Sequence]):
+        """One batched decode step; KV caches are left-padded to the longest"""
+        inference = self.inference
+        device = sequences[0].past[0][0].device
+        longest = max(s.length for s in sequences)
+
+        tokens = torch.tensor([[s.last_token] for s in sequences], dtype=torch.long, device=device)
+        emb = inference.embeddings(tokens)
+        # Mel position = tokens generated so far (the start token is position 0)
+        emb = emb + torch.cat([inference.pos_embedding.get_fixed_embedding(s.generated, device) for s in sequences])
+
+        mask = torch.zeros(len(sequences), longest + 1, dtype=torch.long, device=device)
+        for i, sequence in enumerate(sequences):
+            mask[i, longest - sequence.length:] = 1
+
+        past = []
+        for layer in range(len(sequences[0].past)):
+            keys, values = [], []
+            for sequence in sequences:
+                key, value = sequence.past[layer]
+                pad = longest - sequence.length
+                keys.append(F.pad(key, (0, 0, pad, 0)) if pad else key)
+                values.append(F.pad(value, (0, 0, pad, 0)) if pad else value)
+            past.append((torch.cat(keys), torch.cat(values)))
+
+        outputs = inference.transformer(
+            inputs_embeds=emb, past_key_values=tuple(past), attention_mask=mask, use_cache=True, return_dict=True
+        )
+
+        # Split the batched cache back per sequence, dropping the padding
+        new_past = self._legacy(outputs.past_key_values)
+        for i, sequence in enumerate(sequences):
+            start = longest - sequence.length
+            sequence.past = tuple((key[i:i + 1, :, start:], value[i:i + 1, :, start:]) for key, value in new_past)
+            sequence.length += 1
+
+        self._emit(sequences, outputs.last_hidden_state)
+
+    def _emit(self, sequences: List[_Sequence], hidden: torch.Tensor):
+        """Sample each sequence's next token and hand out (token, latent)"""
+        inference = self.inference
+        logits = inference.lm_head(hidden)[:, -1, :].float()
+        latents = inference.final_norm(hidden[:, -1])
+
+        for sequence in sequences:
+            if sequence.seen is None:
+                sequence.seen = torch.zeros(logits.shape[-1], dtype=torch.bool, device=logits.device)
+                sequence.seen[FAKE_INPUT_ID] = True
+                sequence.seen[self.gpt.start_audio_token] = True
+
+        tokens = self._sample(sequences, logits).tolist()
+        stop_token = self.gpt.stop_audio_token
+
+        for i, sequence in enumerate(sequences):
+            token = tokens[i]
+            sequence.generated += 1
+            sequence.last_token = token
+            sequence.seen[token] = True
+
+            sequence.out.put((torch.tensor([token]), latents[i:i + 1]))
+            if token == stop_token or sequence.generated >= sequence.max_tokens:
+                sequence.finished = True
+                sequence.out.put(_END)
+
+    @staticmethod
+    def _sample(sequences: List[_Sequence], logits: torch.Tensor) -> torch.Tensor:
+        """Per-row repetition penalty, temperature, top-k, top-p, then sample / argmax"""
+        device = logits.device
+        vocab = logits.shape[-1]
+
+        def column(name: str, default: float) -> torch.Tensor:
+            return torch.tensor([float(s.params.get(name, default)) for s in sequences], device=device).unsqueeze(1)
+
+        seen = torch.stack([s.seen for s in sequences])
+        penalty = column("repetition_penalty", 1.0)
+        penalized = torch.where(logits > 0, logits / penalty, logits * penalty)
+        logits = torch.where(seen, penalized, logits)
+        logits = logits / column("temperature", 1.0).clamp(min=1e-5)
+
+        # Top-k: drop everything below each row's k-th largest logit
+        top_k = column("top_k", vocab).long().clamp(1, vocab)
+        sorted_logits = logits.sort(dim=-1, descending=True).values
+        kth = sorted_logits.gather(1, top_k - 1)
+        logits = logits.masked_fill(logits < kth, float("-inf"))
+
+        # Top-p: keep the smallest prefix whose probability mass reaches top_p
+        sorted_logits, sorted_index = logits.sort(dim=-1, descending=True)
+        probs = sorted_logits.softmax(dim=-1)
+        remove = probs.cumsum(dim=-1) - probs > column("top_p", 1.0)
+        remove[:, 0] = False
+        logits = logits.masked_fill(remove.scatter(1, sorted_index, remove), float("-inf"))
+
+        sampled = torch.multinomial(logits.softmax(dim=-1), num_samples=1).squeeze(1)
+        greedy = logits.argmax(dim=-1)
+        do_sample = torch.tensor([bool(s.params.get("do_sample", True)) for s in sequences], device=device)
+        return torch.where(do_sample, sampled, greedy)
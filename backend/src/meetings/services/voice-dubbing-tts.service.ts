@@ -6,6 +6,11 @@ import { S3StorageService } from '../../storage/s3-storage.service';
 import { User } from '../../users/entities/user.entity';
 import WebSocket from 'ws';
 
+// AI Server 출력 포맷 (WebSocket 연결 시 협상)
+const AI_SERVER_OUTPUT_FORMAT = 'pcm16';
+const AI_SERVER_SAMPLE_RATE = 24000;
+const PCM16_BYTES_PER_SAMPLE = 2;
+
 export interface VoiceDubbingTTSResult {
   audioUrl: string;
   durationMs: number;
@@ -141,16 +146,19 @@ export class VoiceDubbingTTSService {
       // 2. S3에 업로드
       const s3Key = `meeting-tts/${sessionId}/voice-dubbing-${speakerUserId}-${Date.now()}.wav`;
 
-      // Convert Float32 PCM to WAV
-      const wavBuffer = this.convertFloat32ToWav(audioBuffer, 24000); // XTTS outputs 24kHz
+      // AI Server가 Int16 PCM으로 변환해서 보내므로 WAV 헤더만 붙임
+      const wavBuffer = this.wrapPcm16AsWav(audioBuffer, AI_SERVER_SAMPLE_RATE);
 
       await this.s3StorageService.uploadFile(s3Key, wavBuffer, 'audio/wav');
 
       // 3. Presigned URL 생성 (1시간 유효)
       const audioUrl = await this.s3StorageService.getPresignedUrl(s3Key, 3600);
 
-      // 4. 오디오 길이 계산 (24kHz Float32 samples)
-      const durationMs = Math.round((audioBuffer.length / 4 / 24000) * 1000);
+      // 4. 오디오 길이 계산 (24kHz Int16 samples)
+      const durationMs = Math.round(
+        (audioBuffer.length / PCM16_BYTES_PER_SAMPLE / AI_SERVER_SAMPLE_RATE) *
+          1000,
+      );
 
       this.logger.log(
         `[VoiceDubbing TTS] Generated: ${durationMs}ms, S3=${s3Key}`,
@@ -180,7 +188,7 @@ export class VoiceDubbingTTSService {
     embeddingS3Key: string,
   ): Promise<Buffer> {
     return new Promise((resolve, reject) => {
-      const wsUrl = `${this.aiServerWsUrl}/ws/tts/${userId}`;
+      const wsUrl = `${this.aiServerWsUrl}/ws/tts/${userId}?format=${AI_SERVER_OUTPUT_FORMAT}&sample_rate=${AI_SERVER_SAMPLE_RATE}`;
       this.logger.debug(`[VoiceDubbing TTS] Connecting to ${wsUrl}`);
 
       const ws = new WebSocket(wsUrl);
@@ -263,7 +271,7 @@ export class VoiceDubbingTTSService {
             }
           }
         } else if (isBinary && Buffer.isBuffer(data)) {
-          // Binary audio data (Float32 PCM)
+          // Binary audio data (Int16 PCM)
           audioChunks.push(data);
         }
       });
@@ -317,65 +325,50 @@ export class VoiceDubbingTTSService {
   }
 
   /**
-   * Float32 PCM 데이터를 WAV 파일로 변환
+   * Int16 PCM 데이터에 WAV 헤더를 붙임 (샘플 변환은 AI Server에서 처리)
    */
-  private convertFloat32ToWav(
-    float32Buffer: Buffer,
-    sampleRate: number,
-  ): Buffer {
-    const numSamples = float32Buffer.length / 4; // Float32 = 4 bytes per sample
+  private wrapPcm16AsWav(pcm16Buffer: Buffer, sampleRate: number): Buffer {
     const numChannels = 1;
     const bitsPerSample = 16;
     const byteRate = sampleRate * numChannels * (bitsPerSample / 8);
     const blockAlign = numChannels * (bitsPerSample / 8);
-    const dataSize = numSamples * blockAlign;
+    const dataSize = pcm16Buffer.length - (pcm16Buffer.length % blockAlign);
     const fileSize = 36 + dataSize;
 
-    const wavBuffer = Buffer.alloc(44 + dataSize);
+    const header = Buffer.alloc(44);
     let offset = 0;
 
     // RIFF header
-    wavBuffer.write('RIFF', offset);
+    header.write('RIFF', offset);
     offset += 4;
-    wavBuffer.writeUInt32LE(fileSize, offset);
+    header.writeUInt32LE(fileSize, offset);
     offset += 4;
-    wavBuffer.write('WAVE', offset);
+    header.write('WAVE', offset);
     offset += 4;
 
     // fmt chunk
-    wavBuffer.write('fmt ', offset);
+    header.write('fmt ', offset);
     offset += 4;
-    wavBuffer.writeUInt32LE(16, offset);
+    header.writeUInt32LE(16, offset);
     offset += 4; // Subchunk1Size
-    wavBuffer.writeUInt16LE(1, offset);
+    header.writeUInt16LE(1, offset);
     offset += 2; // AudioFormat (PCM)
-    wavBuffer.writeUInt16LE(numChannels, offset);
+    header.writeUInt16LE(numChannels, offset);
     offset += 2;
-    wavBuffer.writeUInt32LE(sampleRate, offset);
+    header.writeUInt32LE(sampleRate, offset);
     offset += 4;
-    wavBuffer.writeUInt32LE(byteRate, offset);
+    header.writeUInt32LE(byteRate, offset);
     offset += 4;
-    wavBuffer.writeUInt16LE(blockAlign, offset);
+    header.writeUInt16LE(blockAlign, offset);
     offset += 2;
-    wavBuffer.writeUInt16LE(bitsPerSample, offset);
+    header.writeUInt16LE(bitsPerSample, offset);
     offset += 2;
 
     // data chunk
-    wavBuffer.write('data', offset);
-    offset += 4;
-    wavBuffer.writeUInt32LE(dataSize, offset);
+    header.write('data', offset);
     offset += 4;
+    header.writeUInt32LE(dataSize, offset);
 
-    // Convert Float32 to Int16
-    for (let i = 0; i < numSamples; i++) {
-      const float32Sample = float32Buffer.readFloatLE(i * 4);
-      // Clamp to [-1, 1] and convert to Int16
-      const clampedSample = Math.max(-1, Math.min(1, float32Sample));
-      const int16Sample = Math.round(clampedSample * 32767);
-      wavBuffer.writeInt16LE(int16Sample, offset);
-      offset += 2;
-    }
-
-    return wavBuffer;
+    return Buffer.concat([header, pcm16Buffer.subarray(0, dataSize)]);
   }
 }